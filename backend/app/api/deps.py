@@ -3,11 +3,14 @@
 
 提供所有 Service 和 Repository 的依赖注入
 使用 FastAPI 的 Depends 机制
+
+每个接口按是否写库选择工厂：写接口用 xxx_service（请求结束时提交），
+只读的 GET 接口用 xxx_reader（只读会话，不 flush、不提交）
 """
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.services.knowledge_service import KnowledgeService
 from app.services.problem_service import ProblemService
 from app.services.ocr_service import OCRService
@@ -30,9 +33,29 @@ def ocr_service(db: AsyncSession = Depends(get_db)) -> OCRService:
     return OCRService(db)
 
 
+# ============ 只读 Service 依赖工厂 ============
+
+def knowledge_reader(db: AsyncSession = Depends(get_read_db)) -> KnowledgeService:
+    """获取只读会话上的 KnowledgeService 实例"""
+    return KnowledgeService(db)
+
+
+def problem_reader(db: AsyncSession = Depends(get_read_db)) -> ProblemService:
+    """获取只读会话上的 ProblemService 实例"""
+    return ProblemService(db)
+
+
+def ocr_reader(db: AsyncSession = Depends(get_read_db)) -> OCRService:
+    """获取只读会话上的 OCRService 实例"""
+    return OCRService(db)
+
+
 # 导出所有依赖
 __all__ = [
     "knowledge_service",
     "problem_service",
     "ocr_service",
+    "knowledge_reader",
+    "problem_reader",
+    "ocr_reader",
 ]
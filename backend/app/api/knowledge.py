@@ -1,44 +1,92 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Query, Request, Response
+from typing import List, Optional
 
-from app.api.deps import knowledge_service
+from app.api.deps import knowledge_service, knowledge_reader
 from app.services.knowledge_service import KnowledgeService
+from app.services.knowledge_snapshot import Snapshot
 from app.schemas.knowledge import CurriculumSchema, ModuleSchema, TopicSchema
 
 router = APIRouter(prefix="/api/v1/knowledge", tags=["知识体系"])
 
 
+def _snapshot_response(request: Request, snapshot: Snapshot) -> Response:
+    """返回预序列化的快照（支持 If-None-Match / 预压缩）"""
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "X-Knowledge-Version": str(snapshot.version),
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if snapshot.etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    body, encoding = snapshot.encode_for(request.headers.get("accept-encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/curriculums", response_model=List[CurriculumSchema])
-async def get_curriculums(service: KnowledgeService = Depends(knowledge_service)):
-    """获取所有课程"""
-    return await service.get_all_curriculums()
+async def get_curriculums(request: Request, service: KnowledgeService = Depends(knowledge_reader)):
+    """获取所有课程（快照缓存，支持 ETag）"""
+    return _snapshot_response(request, await service.get_curriculums_snapshot())
 
 
 @router.get("/curriculums/{curriculum_id}", response_model=CurriculumSchema)
 async def get_curriculum(
     curriculum_id: int,
-    service: KnowledgeService = Depends(knowledge_service)
+    request: Request,
+    service: KnowledgeService = Depends(knowledge_reader)
 ):
     """根据 ID 获取课程详情(包含模块和专题)"""
-    return await service.get_curriculum_by_id(curriculum_id)
+    return _snapshot_response(request, await service.get_curriculum_snapshot(curriculum_id))
 
 
 @router.get("/modules/{module_id}", response_model=ModuleSchema)
 async def get_module(
     module_id: int,
-    service: KnowledgeService = Depends(knowledge_service)
+    request: Request,
+    service: KnowledgeService = Depends(knowledge_reader)
 ):
     """根据 ID 获取模块详情"""
-    return await service.get_module_by_id(module_id)
+    return _snapshot_response(request, await service.get_module_snapshot(module_id))
 
 
 @router.get("/topics/{topic_id}", response_model=TopicSchema)
 async def get_topic(
     topic_id: int,
-    service: KnowledgeService = Depends(knowledge_service)
+    request: Request,
+    service: KnowledgeService = Depends(knowledge_reader)
 ):
     """根据 ID 获取专题详情(包含知识点)"""
-    return await service.get_topic_by_id(topic_id)
+    return _snapshot_response(request, await service.get_topic_snapshot(topic_id))
+
+
+@router.get("/search")
+async def search_knowledge(
+    q: str = Query(..., min_length=1, max_length=50, description="汉字、拼音、拼音首字母或编号"),
+    limit: int = Query(10, ge=1, le=50, description="返回数量"),
+    kind: Optional[str] = Query(None, pattern="^(module|topic|knowledge_point)$", description="限定类型"),
+    service: KnowledgeService = Depends(knowledge_reader)
+):
+    """知识点自动补全（前缀、子串、拼音匹配）"""
+    return {"items": await service.search_knowledge(q, limit, kind)}
+
+
+@router.get("/nodes/{code}")
+async def get_knowledge_node(code: str, service: KnowledgeService = Depends(knowledge_reader)):
+    """按编号查询节点路径、祖先和下属知识点（内存层级映射）"""
+    return await service.get_node(code)
+
+
+@router.post("/import")
+async def import_knowledge_base(
+    dry_run: bool = Query(False, description="只比对并报告变化，不写入"),
+    service: KnowledgeService = Depends(knowledge_service)
+):
+    """从 knowledge_base 目录导入课程文件（增量、幂等），返回各课程的变化"""
+    return {"items": await service.import_knowledge_base(dry_run=dry_run)}
 
 
 @router.get("/health")
@@ -1,15 +1,19 @@
 """
 OCR 相关 API 路由
 """
-from fastapi import APIRouter, UploadFile, File, Depends
-from typing import Dict, Any
+import json
+from fastapi import APIRouter, UploadFile, File, Depends, status
+from typing import Dict, Any, List
 
-from app.api.deps import ocr_service
+from app.api.deps import ocr_service, ocr_reader
 from app.services.ocr_service import OCRService
-from app.schemas.problem import OCRResponseSchema
+from app.services.ocr_cache import get_ocr_cache
+from app.schemas.problem import OCRResponseSchema, PaperOCRResponseSchema, BatchOCRResponseSchema, OCRJobSchema
 from app.core.exceptions import NotFoundException, ValidationException, ExternalServiceException
 from app.core.config import get_settings
 from app.core.logger import logger
+from app.utils.upload_spool import spool_upload
+from app.utils.batch_upload import iter_upload_entries
 
 router = APIRouter(prefix="/api/v1/ocr", tags=["OCR识别"])
 
@@ -32,38 +36,124 @@ async def recognize_and_save(
     if not file.content_type.startswith('image/'):
         raise ValidationException("只支持图片文件")
 
-    # 2. 读取文件内容
-    image_bytes = await file.read()
+    # 2. 分块写入临时文件，同时校验文件大小、文件头并计算哈希
+    upload = await spool_upload(file)
 
-    # 3. 验证文件大小
-    settings = get_settings()
-    if len(image_bytes) > settings.max_file_size:
-        raise ValidationException(
-            f"文件大小超过限制 (最大 {settings.max_file_size // 1024 // 1024}MB)"
-        )
-
-    # 4. 验证是否为有效图片
-    if len(image_bytes) < 8:
-        raise ValidationException("图片文件无效")
-
-    # 文件头检查
-    jpeg_header = b'\xff\xd8\xff'
-    png_header = b'\x89\x50\x4e\x47'
-
-    if not (image_bytes.startswith(jpeg_header) or image_bytes.startswith(png_header)):
-        raise ValidationException("不支持的图片格式，仅支持 JPG 和 PNG")
-
-    logger.info(f"开始 OCR 识别: {file.filename}, 大小: {len(image_bytes)} bytes")
+    logger.info(f"开始 OCR 识别: {file.filename}, 大小: {upload.size} bytes")
 
-    # 5. 调用 OCR 服务
+    # 3. 调用 OCR 服务
     try:
-        result = await service.recognize_and_save(file.filename, image_bytes)
+        result = await service.recognize_upload(upload)
         logger.info(f"OCR 识别成功: {file.filename}")
         return result
 
     except Exception as e:
         logger.error(f"OCR 识别失败: {file.filename}, 错误: {str(e)}")
         raise ExternalServiceException("百度 OCR", str(e))
+    finally:
+        # 缓存命中时图片未持久化，删除临时文件（识别失败时服务层已删除保存的图片）
+        upload.discard()
+
+
+@router.post("/recognize-paper", response_model=PaperOCRResponseSchema)
+async def recognize_paper(
+    file: UploadFile = File(...),
+    service: OCRService = Depends(ocr_service)
+):
+    """
+    整页试卷识别：一次 OCR 调用，识别出的每道题各生成一条题目
+
+    Args:
+        file: 整页试卷图片 (支持 JPG、PNG)
+
+    Returns:
+        PaperOCRResponseSchema，按页面顺序列出题目及其区域坐标
+    """
+    if not file.content_type.startswith('image/'):
+        raise ValidationException("只支持图片文件")
+
+    upload = await spool_upload(file)
+    logger.info(f"开始整页识别: {file.filename}, 大小: {upload.size} bytes")
+
+    try:
+        return await service.recognize_paper(upload)
+    finally:
+        upload.discard()
+
+
+@router.post("/recognize-batch", response_model=BatchOCRResponseSchema)
+async def recognize_batch(
+    files: List[UploadFile] = File(...),
+    service: OCRService = Depends(ocr_service)
+):
+    """
+    批量 OCR 识别并保存到题库
+
+    Args:
+        files: 多个图片文件，或包含图片的 ZIP 压缩包（可混合上传）
+
+    Returns:
+        BatchOCRResponseSchema，逐条给出 problem_id、质量等级或错误信息
+    """
+    settings = get_settings()
+    logger.info(f"开始批量 OCR 识别: {len(files)} 个上传文件")
+
+    result = await service.recognize_batch(
+        iter_upload_entries(files),
+        concurrency=settings.ocr_batch_concurrency,
+        max_items=settings.ocr_batch_max_items
+    )
+
+    logger.info(f"批量 OCR 识别完成: 成功 {result.succeeded}, 失败 {result.failed}")
+    return result
+
+
+@router.post("/jobs", response_model=OCRJobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def create_ocr_job(
+    file: UploadFile = File(...),
+    service: OCRService = Depends(ocr_service)
+):
+    """
+    异步 OCR 识别：保存图片并排队，立即返回 202
+
+    通过 GET /api/v1/ocr/jobs/{job_id} 轮询识别结果
+
+    Args:
+        file: 图片文件 (支持 JPG、PNG)
+
+    Returns:
+        OCRJobSchema
+    """
+    if not file.content_type.startswith('image/'):
+        raise ValidationException("只支持图片文件")
+
+    upload = await spool_upload(file)
+    try:
+        job = await service.enqueue_upload(upload)
+    finally:
+        upload.discard()
+    return OCRJobSchema.model_validate(job)
+
+
+@router.get("/jobs/{job_id}", response_model=OCRJobSchema)
+async def get_ocr_job(
+    job_id: str,
+    service: OCRService = Depends(ocr_reader)
+):
+    """
+    查询异步 OCR 任务状态
+
+    Args:
+        job_id: 任务 ID
+
+    Returns:
+        OCRJobSchema（status: queued/running/succeeded/parked/failed；
+        parked 表示 OCR 熔断中，题目已暂存为 pending_ocr，稍后自动补识别）
+    """
+    job = await service.get_job(job_id)
+    if not job:
+        raise NotFoundException("OCR 任务", job_id)
+    return OCRJobSchema.model_validate(job)
 
 
 @router.post("/re-recognize")
@@ -96,10 +186,21 @@ async def re_recognize(
         raise ExternalServiceException("百度 OCR", "重新识别失败")
 
 
+@router.get("/cache/stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    """
+    OCR 结果缓存统计
+
+    Returns:
+        命中次数、未命中次数和命中率
+    """
+    return get_ocr_cache().stats()
+
+
 @router.get("/records/{ocr_record_id}")
 async def get_ocr_record(
     ocr_record_id: int,
-    service: OCRService = Depends(ocr_service)
+    service: OCRService = Depends(ocr_reader)
 ):
     """
     获取 OCR 记录详情
@@ -124,5 +225,6 @@ async def get_ocr_record(
         "words_count": ocr_record.words_count,
         "processing_time_ms": ocr_record.processing_time_ms,
         "status": ocr_record.status,
+        "preprocess_stats": json.loads(ocr_record.preprocess_stats) if ocr_record.preprocess_stats else None,
         "created_at": ocr_record.created_at.isoformat() if ocr_record.created_at else None
     }
@@ -4,7 +4,7 @@
 from fastapi import APIRouter, Depends, Query
 from typing import Optional
 
-from app.api.deps import problem_service
+from app.api.deps import problem_service, problem_reader
 from app.services.problem_service import ProblemService
 from app.schemas.problem import ProblemSchema, ProblemUpdate
 
@@ -13,36 +13,106 @@ router = APIRouter(prefix="/api/v1/problems", tags=["题目管理"])
 
 @router.get("/")
 async def get_problems(
-    page: int = Query(1, ge=1, description="页码"),
     size: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
     status: Optional[str] = Query(None, description="状态筛选"),
-    service: ProblemService = Depends(problem_service)
+    question_type: Optional[str] = Query(None, description="题型筛选"),
+    with_total: Optional[bool] = Query(None, description="是否返回总数（默认只在第一页返回）"),
+    knowledge_node: Optional[str] = Query(None, description="知识体系节点编号（如 C1、M01、T01_01、KP01_1），含其下所有知识点"),
+    page: Optional[int] = Query(None, ge=1, description="页码（旧的 OFFSET 分页，深页较慢）"),
+    service: ProblemService = Depends(problem_reader)
 ):
     """
-    获取题目列表（分页）
+    获取题目列表（游标分页）
+
+    按创建时间倒序，用返回的 next_cursor 请求下一页；has_more 为 false 时到底。
+    传 page 时使用旧的页码分页（筛选条件相同，忽略 cursor）。
     """
-    result = await service.get_problems(page=page, size=size, status=status)
+    if page is not None:
+        result = await service.get_problems(
+            page=page,
+            size=size,
+            status=status,
+            question_type=question_type,
+            knowledge_node=knowledge_node
+        )
+        return {
+            "total": result["total"],
+            "page": result["page"],
+            "size": result["size"],
+            "items": [ProblemSchema.model_validate(p) for p in result["items"]]
+        }
+
+    result = await service.get_problems_by_cursor(
+        size=size,
+        cursor=cursor,
+        status=status,
+        question_type=question_type,
+        with_total=with_total,
+        knowledge_node=knowledge_node
+    )
 
     # 使用 Schema 序列化
     items = [ProblemSchema.model_validate(p) for p in result["items"]]
 
     return {
         "total": result["total"],
-        "page": result["page"],
         "size": result["size"],
+        "next_cursor": result["next_cursor"],
+        "has_more": result["has_more"],
         "items": items
     }
 
 
+@router.get("/search")
+async def search_problems(
+    q: str = Query(..., min_length=1, max_length=100, description="搜索关键词，多个词以空格分隔"),
+    status: Optional[str] = Query(None, description="状态筛选"),
+    question_type: Optional[str] = Query(None, description="题型筛选"),
+    kp_id: Optional[str] = Query(None, description="知识点筛选"),
+    limit: int = Query(20, ge=1, le=100, description="返回数量"),
+    offset: int = Query(0, ge=0, description="跳过数量"),
+    service: ProblemService = Depends(problem_reader)
+):
+    """
+    全文检索题目（按相关度排序，snippet 中命中词以 <mark> 标记）
+
+    全部命中参与排序，has_more 表示 offset + limit 之后还有命中
+    """
+    result = await service.search_problems(q, status, question_type, kp_id, limit, offset)
+    return {
+        "items": [
+            {
+                **ProblemSchema.model_validate(hit["problem"]).model_dump(),
+                "score": hit["score"],
+                "snippet": hit["snippet"]
+            }
+            for hit in result["items"]
+        ],
+        "has_more": result["has_more"]
+    }
+
+
+@router.get("/stats")
+async def get_problem_stats(
+    service: ProblemService = Depends(problem_reader)
+):
+    """
+    题目统计：总数及按状态、题型、质量等级的分布
+    """
+    return await service.get_problem_stats()
+
+
 @router.get("/{problem_id}")
 async def get_problem_detail(
     problem_id: str,
-    service: ProblemService = Depends(problem_service)
+    include_raw: bool = Query(False, description="是否返回 parsed_data 和 OCR 原始 JSON"),
+    service: ProblemService = Depends(problem_reader)
 ):
     """
-    获取题目详情（包含 OCR 原始 JSON）
+    获取题目详情（OCR 原始 JSON 等大字段按需返回）
     """
-    return await service.get_problem_with_ocr(problem_id)
+    return await service.get_problem_with_ocr(problem_id, include_raw=include_raw)
 
 
 @router.put("/{problem_id}")
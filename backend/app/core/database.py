@@ -1,14 +1,194 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import get_settings
+from app.core.exceptions import ConfigurationException
 
 settings = get_settings()
 
+SQLITE_PROFILES = ("production", "default")
+_SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+_TEMP_STORES = ("DEFAULT", "FILE", "MEMORY")
+
+# session.info 中标记只读会话的键
+READ_ONLY_KEY = "read_only"
+
+
+def is_file_sqlite(database_url: str) -> bool:
+    """是否为文件型 SQLite（内存库无法拆分读写连接，也不支持 WAL）"""
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        return False
+    database = url.database or ""
+    return database not in ("", ":memory:") and "mode=memory" not in database
+
+
+def sqlite_pragmas(read_only: bool = False) -> List[str]:
+    """
+    production 存储配置下每个新连接执行的 PRAGMA
+
+    journal_mode 持久保存在数据库文件中，只由写连接设置；
+    读连接额外设置 query_only，误写会直接报错。
+    PRAGMA 不支持参数绑定，取值先按白名单校验。
+    """
+    synchronous = settings.sqlite_synchronous.upper()
+    if synchronous not in _SYNCHRONOUS_LEVELS:
+        raise ConfigurationException(f"sqlite_synchronous 取值无效: {settings.sqlite_synchronous}")
+    temp_store = settings.sqlite_temp_store.upper()
+    if temp_store not in _TEMP_STORES:
+        raise ConfigurationException(f"sqlite_temp_store 取值无效: {settings.sqlite_temp_store}")
+
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA synchronous = {synchronous}",
+        # 负数表示以 KiB 为单位
+        f"PRAGMA cache_size = {-int(settings.sqlite_cache_size_kb)}",
+        f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}",
+        f"PRAGMA temp_store = {temp_store}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+    return pragmas
+
+
+def apply_sqlite_profile(sync_engine, read_only: bool = False) -> None:
+    """在引擎每次建立新连接时执行 PRAGMA"""
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _use_sqlite_profile() -> bool:
+    if settings.sqlite_profile not in SQLITE_PROFILES:
+        raise ConfigurationException(f"sqlite_profile 取值无效: {settings.sqlite_profile}")
+    return settings.sqlite_profile == "production" and is_file_sqlite(settings.database_url)
+
+
+_split_read_write = _use_sqlite_profile()
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """按数据库类型生成 create_async_engine 的连接池参数"""
+    backend = make_url(database_url).get_backend_name()
+    if backend == "postgresql":
+        return {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_pre_ping": settings.db_pool_pre_ping,
+            "pool_recycle": settings.db_pool_recycle,
+            "connect_args": {"prepared_statement_cache_size": settings.db_statement_cache_size},
+        }
+    if backend == "sqlite" and _split_read_write:
+        # production 配置下以单写连接为主（写事务本就串行，多出的连接只会在 busy_timeout 上等锁）。
+        # 溢出连接数 = 后台任务数 + sqlite_write_max_overflow：
+        #   - 后台任务各自持有一个会话：OCR 任务 worker（ocr_job_workers 个）、pending_ocr 补识别、
+        #     题目计数对账、合并提交写入任务
+        #   - sqlite_write_max_overflow 为请求会话和题目 ID 预留（独立事务）的余量
+        # 后台任务同时占用连接时请求仍有连接可用；题目 ID 预留前 OCRService 会先归还会话的连接，
+        # 不会出现多个请求各占一个连接、再等第二个连接直到 pool_timeout 的情况。
+        # aiosqlite 默认 NullPool 每次借出都新建连接，PRAGMA 和页缓存无法复用，这里改为连接池
+        background_sessions = settings.ocr_job_workers + 3
+        return {
+            "poolclass": AsyncAdaptedQueuePool,
+            "pool_size": 1,
+            "max_overflow": background_sessions + settings.sqlite_write_max_overflow,
+        }
+    return {}
+
+
 # Create async engine
 engine = create_async_engine(
     settings.database_url,
     echo=False,  # Set to True for SQL query debugging
+    **engine_options(settings.database_url)
+)
+
+
+def create_read_engine(database_url: str) -> AsyncEngine:
+    """
+    SQLite 只读引擎（独立连接池，每个连接 query_only）
+
+    整个引擎为 AUTOCOMMIT：不开启事务、归还连接时无需回滚。
+    不用会话级的 execution_options 切换，aiosqlite 下每次借出/归还都要多一次线程往返
+    """
+    read_engine = create_async_engine(
+        database_url,
+        echo=False,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=0,
+        isolation_level="AUTOCOMMIT",
+    )
+    apply_sqlite_profile(read_engine.sync_engine, read_only=True)
+    return read_engine
+
+
+# 只读引擎：WAL 下读不阻塞写，GET 请求从独立连接池取连接；未拆分时与写引擎相同
+read_engine = create_read_engine(settings.database_url) if _split_read_write else engine
+
+if _split_read_write:
+    apply_sqlite_profile(engine.sync_engine)
+
+
+
+class ConnectionHoldStats:
+    """连接池借出时长统计（checkout 到 checkin），用于观察请求占用连接的时间"""
+
+    def __init__(self):
+        self.checked_out = 0
+        self.checkouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def attach(self, sync_engine) -> "ConnectionHoldStats":
+        """挂到引擎的连接池事件上"""
+        event.listen(sync_engine, "checkout", self._on_checkout)
+        event.listen(sync_engine, "checkin", self._on_checkin)
+        return self
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checkout_at"] = time.perf_counter()
+        self.checked_out += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("checkout_at", None)
+        if started is None:
+            return
+        held_ms = (time.perf_counter() - started) * 1000
+        self.checked_out -= 1
+        self.checkouts += 1
+        self.total_ms += held_ms
+        self.max_ms = max(self.max_ms, held_ms)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "checked_out": self.checked_out,
+            "checkouts": self.checkouts,
+            "avg_hold_ms": round(self.total_ms / self.checkouts, 2) if self.checkouts else 0.0,
+            "max_hold_ms": round(self.max_ms, 2),
+        }
+
+
+connection_hold_stats = ConnectionHoldStats().attach(engine.sync_engine)
+read_connection_hold_stats: Optional[ConnectionHoldStats] = (
+    ConnectionHoldStats().attach(read_engine.sync_engine) if _split_read_write else None
 )
 
 # Create async session factory
@@ -16,6 +196,30 @@ async_session_maker = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+
+def make_read_session_maker(bind) -> sessionmaker:
+    """
+    只读会话工厂
+
+    查询不发 BEGIN/COMMIT，请求结束即归还连接；
+    不自动 flush，显式 flush / commit 会被拒绝（见 _reject_read_only_flush）
+
+    PostgreSQL 等以 AUTOCOMMIT 方式使用连接（asyncpg 只是不再开启事务，无额外往返）；
+    SQLite 驱动本就不为 SELECT 开启事务，不切换隔离级别（只读引擎已整体为 AUTOCOMMIT）
+    """
+    if bind.dialect.name != "sqlite":
+        bind = bind.execution_options(isolation_level="AUTOCOMMIT")
+    return sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+        info={READ_ONLY_KEY: True},
+    )
+
+
+read_session_maker = make_read_session_maker(read_engine)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -33,7 +237,77 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
-async def init_db():
-    """Initialize database tables"""
-    async with engine.begin() as conn:
+async def get_read_db() -> AsyncSession:
+    """
+    只读会话依赖（GET 接口使用）
+
+    不 flush、不提交；production 存储配置下从只读连接池取连接
+    """
+    async with read_session_maker() as session:
+        yield session
+
+
+async def begin_write_transaction(session: AsyncSession) -> None:
+    """
+    显式开启写事务
+
+    pysqlite 驱动只在 DML 前隐式 BEGIN：之前的 SELECT 不在事务中，SAVEPOINT 会自行开启并在 RELEASE 时提交。
+    SQLite 下先显式 BEGIN IMMEDIATE（同时提前取得写锁，后续读取与写入之间不会有其他事务提交）；
+    其他数据库的会话在第一条语句时已开启事务，无需处理。
+    """
+    connection = await session.connection()
+    if connection.dialect.name != "sqlite":
+        return
+    raw = await connection.get_raw_connection()
+    if not raw.driver_connection.in_transaction:
+        await connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_read_only_flush(session: Session, flush_context, instances) -> None:
+    if session.info.get(READ_ONLY_KEY) and (session.new or session.dirty or session.deleted):
+        raise RuntimeError("只读会话不能写入数据库，请改用写会话（get_db）")
+
+
+def _sync_schema(conn) -> None:
+    """
+    为已存在的表补齐新增的列和索引
+
+    create_all 只会创建缺失的表，不会修改已有表结构
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+
+        existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(conn)
+
+
+async def init_db(bind=None):
+    """
+    Initialize database tables
+
+    Args:
+        bind: 目标引擎，默认为应用引擎（迁移、压测脚本可传入其他数据库）
+    """
+    async with (bind or engine).begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_sync_schema)
+
+        from app.models.problem_search import ensure_search_index
+        await conn.run_sync(ensure_search_index)
+
+        from app.models.knowledge_path import ensure_knowledge_paths
+        await conn.run_sync(ensure_knowledge_paths)
+
+        from app.models.knowledge_version import ensure_knowledge_version
+        await conn.run_sync(ensure_knowledge_version)
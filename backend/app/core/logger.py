@@ -7,12 +7,14 @@ import os
 from loguru import logger
 from pathlib import Path
 
+from app.core.config import get_settings
+
 # 移除默认的 handler
 logger.remove()
 
 # 确保日志目录存在
-log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
+log_dir = Path(get_settings().log_dir)
+log_dir.mkdir(parents=True, exist_ok=True)
 
 # 控制台输出 - 彩色格式
 logger.add(
@@ -5,9 +5,19 @@ from fastapi.responses import JSONResponse
 from fastapi import status
 
 from app.core.config import get_settings
-from app.core.database import init_db
+from app.core.database import (
+    init_db, async_session_maker, engine, read_engine, connection_hold_stats, read_connection_hold_stats
+)
 from app.core.exceptions import MathTutorException
 from app.core.logger import logger
+from app.utils.baidu_ocr import get_async_ocr_client, close_async_ocr_client
+from app.services.ocr_worker import OCRWorkerPool, PendingOCRDrainer
+from app.services.ocr_cache import get_ocr_cache
+from app.services.problem_counter_reconciler import ProblemCounterReconciler
+from app.repositories.group_commit import get_group_commit_writer
+from app.services.knowledge_service import KnowledgeService
+from app.utils.circuit_breaker import CLOSED
+from app.utils.image_preprocess import shutdown_image_preprocessor
 from app.middleware.logging import logging_middleware
 from app.middleware.error_handler import math_tutor_exception_handler, general_exception_handler
 from app.api.knowledge import router as knowledge_router
@@ -21,6 +31,11 @@ import os
 
 settings = get_settings()
 
+# 进程内 OCR 任务 worker
+ocr_worker_pool = OCRWorkerPool(settings.ocr_job_workers)
+pending_ocr_drainer = PendingOCRDrainer()
+problem_counter_reconciler = ProblemCounterReconciler()
+
 # Create FastAPI app
 app = FastAPI(
     title="MathTutor API",
@@ -80,11 +95,37 @@ async def startup_event():
     await init_db()
     logger.info("数据库初始化成功")
 
+    # 校正题目计数（已有数据库首次启动时补建），之后定期对账
+    if settings.background_tasks_enabled:
+        await problem_counter_reconciler.run_once()
+        problem_counter_reconciler.start()
+
+    # 构建知识点补全索引、预热知识体系快照（之后随知识体系修改增量更新 / 失效）
+    async with async_session_maker() as session:
+        knowledge = KnowledgeService(session)
+        await knowledge.sync_caches()  # 记录当前共享版本号
+        await knowledge.build_search_index()
+        await knowledge.build_hierarchy()
+        await knowledge.warm_snapshots()
+
     # 打印配置信息
     logger.info(f"环境: {'Development' if settings.api_reload else 'Production'}")
     logger.info(f"数据库: {settings.database_url[:20]}...")
     logger.info(f"OCR 配置: {'已配置' if settings.baidu_ocr_configured else '未配置'}")
 
+    if settings.background_tasks_enabled:
+        # 预取并后台刷新百度 Access Token
+        if settings.baidu_ocr_configured:
+            await get_async_ocr_client().token_manager.start()
+
+        # 启动异步 OCR 任务 worker
+        if settings.ocr_job_workers > 0:
+            ocr_worker_pool.start()
+
+        # 熔断降级暂存的题目由后台补识别
+        if settings.ocr_degraded_mode == 'park':
+            pending_ocr_drainer.start()
+
     logger.info("MathTutor API 启动完成")
 
 
@@ -93,6 +134,23 @@ async def shutdown_event():
     """应用关闭时清理"""
     logger.info("MathTutor API 正在关闭...")
 
+    # 停止 OCR 任务 worker
+    await ocr_worker_pool.stop()
+    await pending_ocr_drainer.stop()
+    await problem_counter_reconciler.stop()
+
+    # 提交合并写入队列中剩余的操作
+    await get_group_commit_writer().stop()
+
+    # 关闭 OCR 连接池和图片预处理进程池
+    await close_async_ocr_client()
+    shutdown_image_preprocessor()
+
+    # 关闭连接池（WAL 模式下最后一个连接关闭时执行检查点）
+    if read_engine is not engine:
+        await read_engine.dispose()
+    await engine.dispose()
+
 
 # ============ 基础端点 ============
 
@@ -109,8 +167,23 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """健康检查"""
-    return {"status": "healthy", "service": "MathTutor API"}
+    """健康检查（含 OCR 熔断器状态）"""
+    ocr_client = get_async_ocr_client()
+    circuit = ocr_client.circuit_breaker.snapshot()
+    return {
+        "status": "healthy" if circuit["state"] == CLOSED else "degraded",
+        "service": "MathTutor API",
+        "ocr": {
+            "circuit": circuit,
+            "concurrency": ocr_client.concurrency_limiter.snapshot(),
+            "cache": get_ocr_cache().stats()
+        },
+        "database": {
+            "pool": connection_hold_stats.snapshot(),
+            "read_pool": read_connection_hold_stats.snapshot() if read_connection_hold_stats else None,
+            "group_commit": get_group_commit_writer().stats() if settings.group_commit_enabled else None
+        }
+    }
 
 
 # ============ API 文档端点 ============
@@ -1,7 +1,14 @@
 from app.models.knowledge import KnowledgePoint, Module, Topic, Curriculum
 from app.models.problem import Problem, ProblemKnowledgePoint, OCRRecord
+from app.models.ocr_job import OCRJob
+from app.models.id_sequence import IDSequence
+from app.models.problem_counter import ProblemCounter
+from app.models.knowledge_version import KnowledgeVersion
+from app.models import problem_search  # noqa: F401  注册全文索引同步
+from app.models import knowledge_path  # noqa: F401  注册知识体系路径维护
 
 __all__ = [
     "KnowledgePoint", "Module", "Topic", "Curriculum",
-    "Problem", "ProblemKnowledgePoint", "OCRRecord"
+    "Problem", "ProblemKnowledgePoint", "OCRRecord",
+    "OCRJob", "IDSequence", "ProblemCounter", "KnowledgeVersion"
 ]
@@ -0,0 +1,15 @@
+"""
+ID 序列数据模型
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class IDSequence(Base):
+    """ID 计数器表（按名称分段预分配，如 problem:2026）"""
+    __tablename__ = "id_sequences"
+
+    name = Column(String(50), primary_key=True)
+    next_value = Column(Integer, nullable=False, default=1)  # 下一个未分配的值
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
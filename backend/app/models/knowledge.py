@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, Text, ForeignKey
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.models.types import PathString
 
 
 class Curriculum(Base):
@@ -26,6 +27,7 @@ class Module(Base):
     module_tag = Column(String(100))
     overview = Column(Text)
     curriculum_id = Column(Integer, ForeignKey("curriculums.id"))
+    path = Column(PathString, index=True)  # 物化路径，如 C1/M01（自动维护）
 
     # Relationships
     curriculum = relationship("Curriculum", back_populates="modules")
@@ -41,6 +43,7 @@ class Topic(Base):
     topic_name = Column(String(200), nullable=False)
     alias = Column(String(100))
     module_id = Column(Integer, ForeignKey("modules.id"))
+    path = Column(PathString, index=True)  # 物化路径，如 C1/M01/T01_01（自动维护）
 
     # Relationships
     module = relationship("Module", back_populates="topics")
@@ -56,6 +59,11 @@ class KnowledgePoint(Base):
     kp_name = Column(String(200), nullable=False)
     detail = Column(Text)
     topic_id = Column(Integer, ForeignKey("topics.id"))
+    path = Column(PathString, index=True)  # 物化路径，如 C1/M01/T01_01/KP01_1（自动维护）
 
     # Relationships
     topic = relationship("Topic", back_populates="knowledge_points")
+
+
+# 知识体系的全部模型（缓存失效、版本号递增等钩子据此判断 flush 是否修改了知识体系）
+KNOWLEDGE_MODELS = (Curriculum, Module, Topic, KnowledgePoint)
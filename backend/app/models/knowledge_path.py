@@ -0,0 +1,214 @@
+"""
+知识体系物化路径
+
+modules / topics / knowledge_points 的 path 列保存从课程到节点的编号路径，
+如 C1/M01/T01_01/KP01_1；problem_knowledge_points.kp_path 冗余保存知识点路径，
+「模块 M01 下的所有题目」即一次 kp_path 前缀范围查询（走索引）。
+
+路径在 ORM flush 时于同一事务内增量维护：只重算编号或父节点发生变化的节点
+及其子树，以及引用这些知识点的题目关联。刷新后的 (编号, 路径) 记录在
+session.info 中，提交后由进程内层级映射（app.services.knowledge_hierarchy）增量应用。
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import String, and_, cast, event, inspect, literal, or_, select, true, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.logger import logger
+from app.models.knowledge import Curriculum, KnowledgePoint, Module, Topic
+from app.models.problem import ProblemKnowledgePoint
+
+PATH_SEPARATOR = '/'
+
+# session.info 中记录已刷新路径的键：[(编号, 路径或 None)]
+PATH_CHANGES_KEY = 'knowledge_path_changes'
+
+_modules = Module.__table__
+_topics = Topic.__table__
+_kps = KnowledgePoint.__table__
+_pkps = ProblemKnowledgePoint.__table__
+
+
+def curriculum_code(curriculum_id: int) -> str:
+    """课程在路径中的编号"""
+    return f"C{curriculum_id}"
+
+
+def subtree_condition(column, path: str):
+    """
+    节点本身及其所有后代的路径条件（可走索引的范围比较）
+
+    '0' 是 '/' 的下一个字符，[path/, path0) 恰好覆盖以 path/ 开头的所有路径
+    """
+    return or_(
+        column == path,
+        and_(column >= path + PATH_SEPARATOR, column < path + chr(ord(PATH_SEPARATOR) + 1))
+    )
+
+
+def refresh_paths(
+    connection,
+    module_ids: Optional[Iterable[int]] = None,
+    topic_ids: Iterable[int] = (),
+    kp_ids: Iterable[int] = (),
+    pkp_ids: Iterable[int] = (),
+    stale_kp_codes: Iterable[str] = ()
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    重算指定节点及其子树的路径，并同步题目关联的 kp_path
+
+    Args:
+        connection: 同步数据库连接
+        module_ids: 需要重算的模块；None 表示全量重算
+        topic_ids: 需要重算的专题（所属模块变化或新建）
+        kp_ids: 需要重算的知识点
+        pkp_ids: 需要同步的题目关联
+        stale_kp_codes: 已删除或改名前的知识点编号（其题目关联路径置空）
+
+    Returns:
+        重算后的 [(节点编号, 路径)]
+    """
+    if module_ids is None:
+        module_filter = topic_filter = kp_filter = pkp_filter = true()
+    else:
+        module_filter = _modules.c.id.in_(list(module_ids))
+        topic_filter = or_(_topics.c.id.in_(list(topic_ids)), _topics.c.module_id.in_(list(module_ids)))
+        kp_filter = or_(
+            _kps.c.id.in_(list(kp_ids)),
+            _kps.c.topic_id.in_(select(_topics.c.id).where(topic_filter))
+        )
+        pkp_filter = or_(
+            _pkps.c.id.in_(list(pkp_ids)),
+            _pkps.c.kp_id.in_(list(stale_kp_codes)),
+            _pkps.c.kp_id.in_(select(_kps.c.kp_id).where(kp_filter))
+        )
+
+    connection.execute(
+        update(_modules).where(module_filter).values(
+            path=literal('C', String) + cast(_modules.c.curriculum_id, String) + PATH_SEPARATOR + _modules.c.module_id
+        )
+    )
+    connection.execute(
+        update(_topics).where(topic_filter).values(
+            path=select(_modules.c.path).where(_modules.c.id == _topics.c.module_id).scalar_subquery()
+            + PATH_SEPARATOR + _topics.c.topic_id
+        )
+    )
+    connection.execute(
+        update(_kps).where(kp_filter).values(
+            path=select(_topics.c.path).where(_topics.c.id == _kps.c.topic_id).scalar_subquery()
+            + PATH_SEPARATOR + _kps.c.kp_id
+        )
+    )
+    connection.execute(
+        update(_pkps).where(pkp_filter).values(
+            kp_path=select(_kps.c.path).where(_kps.c.kp_id == _pkps.c.kp_id).scalar_subquery()
+        )
+    )
+
+    refreshed: List[Tuple[str, Optional[str]]] = []
+    for table, code_column, condition in (
+        (_modules, _modules.c.module_id, module_filter),
+        (_topics, _topics.c.topic_id, topic_filter),
+        (_kps, _kps.c.kp_id, kp_filter),
+    ):
+        rows = connection.execute(select(code_column, table.c.path).where(condition)).all()
+        refreshed.extend((code, path) for code, path in rows)
+    return refreshed
+
+
+def _changed(session: Session, obj, *names: str) -> bool:
+    state = inspect(obj)
+    return obj in session.new or any(state.attrs[name].history.has_changes() for name in names)
+
+
+def _previous(obj, name: str) -> Optional[str]:
+    history = inspect(obj).attrs[name].history
+    return history.deleted[0] if history.deleted else None
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_knowledge_paths(session: Session, flush_context) -> None:
+    """按本次 flush 中知识体系和题目关联的变化增量刷新路径"""
+    module_ids: Set[int] = set()
+    topic_ids: Set[int] = set()
+    kp_ids: Set[int] = set()
+    pkp_ids: Set[int] = set()
+    stale_codes: Set[str] = set()
+    changes: List[Tuple[str, Optional[str]]] = []
+
+    for obj in list(session.new) + list(session.dirty):
+        if obj in session.deleted:
+            continue
+        if isinstance(obj, Curriculum) and obj in session.new:
+            changes.append((curriculum_code(obj.id), curriculum_code(obj.id)))
+        elif isinstance(obj, Module) and _changed(session, obj, 'module_id', 'curriculum_id'):
+            module_ids.add(obj.id)
+            if _previous(obj, 'module_id'):
+                changes.append((_previous(obj, 'module_id'), None))
+        elif isinstance(obj, Topic) and _changed(session, obj, 'topic_id', 'module_id'):
+            topic_ids.add(obj.id)
+            if _previous(obj, 'topic_id'):
+                changes.append((_previous(obj, 'topic_id'), None))
+        elif isinstance(obj, KnowledgePoint) and _changed(session, obj, 'kp_id', 'topic_id'):
+            kp_ids.add(obj.id)
+            if _previous(obj, 'kp_id'):
+                stale_codes.add(_previous(obj, 'kp_id'))
+                changes.append((_previous(obj, 'kp_id'), None))
+        elif isinstance(obj, ProblemKnowledgePoint) and _changed(session, obj, 'kp_id'):
+            pkp_ids.add(obj.id)
+
+    for obj in session.deleted:
+        if isinstance(obj, Curriculum):
+            changes.append((curriculum_code(obj.id), None))
+        elif isinstance(obj, Module):
+            module_ids.add(obj.id)
+            changes.append((obj.module_id, None))
+        elif isinstance(obj, Topic):
+            topic_ids.add(obj.id)
+            changes.append((obj.topic_id, None))
+        elif isinstance(obj, KnowledgePoint):
+            stale_codes.add(obj.kp_id)
+            changes.append((obj.kp_id, None))
+
+    if not (module_ids or topic_ids or kp_ids or pkp_ids or stale_codes or changes):
+        return
+
+    connection = session.connection()
+    if module_ids or topic_ids or kp_ids or pkp_ids or stale_codes:
+        refreshed = refresh_paths(connection, module_ids, topic_ids, kp_ids, pkp_ids, stale_codes)
+        changes.extend(refreshed)
+        _update_loaded_objects(session, dict(refreshed))
+
+    session.info.setdefault(PATH_CHANGES_KEY, []).extend(changes)
+
+
+def _update_loaded_objects(session: Session, paths: Dict[str, Optional[str]]) -> None:
+    """把数据库中刷新后的路径同步到会话内已加载的对象（不产生新的修改）"""
+    code_attrs = {Module: 'module_id', Topic: 'topic_id', KnowledgePoint: 'kp_id'}
+    # 本次新增的对象在 after_flush 时尚未进入 identity_map
+    for obj in list(session.identity_map.values()) + list(session.new):
+        attr = code_attrs.get(type(obj))
+        if attr and getattr(obj, attr) in paths:
+            set_committed_value(obj, 'path', paths[getattr(obj, attr)])
+
+
+def ensure_knowledge_paths(connection) -> None:
+    """
+    补齐缺失的路径（同步函数，配合 run_sync 使用）
+
+    升级后首次启动时 path 列为空，全量重算一次
+    """
+    missing = connection.execute(
+        select(_modules.c.id).where(_modules.c.path.is_(None), _modules.c.curriculum_id.isnot(None)).limit(1)
+    ).first() or connection.execute(
+        select(_pkps.c.id).where(
+            _pkps.c.kp_path.is_(None), _pkps.c.kp_id.in_(select(_kps.c.kp_id))
+        ).limit(1)
+    ).first()
+    if missing is None:
+        return
+
+    refreshed = refresh_paths(connection)
+    logger.info(f"已重算知识体系路径: {len(refreshed)} 个节点")
@@ -0,0 +1,67 @@
+"""
+知识体系版本号（跨进程缓存失效）
+
+快照缓存、补全索引和层级映射都在进程内存中，ORM 钩子只能通知本进程。
+knowledge_version 表只有一行：知识体系的写入事务中版本号 +1
+（ORM flush 时自动完成，绕过 ORM 的写入需调用 bump_knowledge_version），
+各进程按检查间隔读取版本号，发现变化后重建本进程的缓存
+（见 app.services.knowledge_version_watcher）。
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.knowledge import KNOWLEDGE_MODELS
+
+# 单行表的主键
+VERSION_ROW_ID = 1
+
+
+class KnowledgeVersion(Base):
+    """知识体系版本号（单行表）"""
+    __tablename__ = "knowledge_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def ensure_knowledge_version(connection) -> None:
+    """初始化版本行（init_db 调用，同步连接）"""
+    table = KnowledgeVersion.__table__
+    exists = connection.execute(select(table.c.id).where(table.c.id == VERSION_ROW_ID)).first()
+    if exists is None:
+        connection.execute(table.insert().values(id=VERSION_ROW_ID, version=0, updated_at=datetime.utcnow()))
+
+
+def bump_knowledge_version(connection) -> None:
+    """
+    版本号 +1（同步连接，在知识体系的写入事务中调用）
+
+    版本行缺失时（未经 init_db 建表）补建
+    """
+    table = KnowledgeVersion.__table__
+    result = connection.execute(
+        update(table).where(table.c.id == VERSION_ROW_ID)
+        .values(version=table.c.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(id=VERSION_ROW_ID, version=1, updated_at=datetime.utcnow()))
+
+
+async def read_knowledge_version(db: AsyncSession) -> int:
+    """读取当前版本号（版本行不存在时为 0）"""
+    result = await db.execute(select(KnowledgeVersion.version).where(KnowledgeVersion.id == VERSION_ROW_ID))
+    return result.scalar() or 0
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_knowledge_write(session: Session, flush_context) -> None:
+    """本次 flush 修改了知识体系时，在同一事务中递增版本号"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, KNOWLEDGE_MODELS):
+            bump_knowledge_version(session.connection())
+            return
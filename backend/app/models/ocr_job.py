@@ -0,0 +1,40 @@
+"""
+OCR 异步任务数据模型
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class OCRJob(Base):
+    """OCR 异步任务表（数据库队列）"""
+    __tablename__ = "ocr_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(32), unique=True, nullable=False, index=True)
+    status = Column(String(20), default='queued', nullable=False)  # queued/running/succeeded/parked/failed
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(500), nullable=False)  # 已持久化的上传图片
+    content_hash = Column(String(64))
+
+    # 重试
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # 最早可执行时间（退避）
+
+    # 租约：worker 领取任务后在 lease_expires_at 前完成，否则任务被回收
+    lease_owner = Column(String(64))
+    lease_expires_at = Column(DateTime)
+
+    # 结果
+    problem_id = Column(String(50))
+    ocr_record_id = Column(Integer)
+    error_message = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_ocr_jobs_status_run_after', 'status', 'run_after'),
+    )
@@ -1,10 +1,11 @@
 """
 题目相关数据模型
 """
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean, Index
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.core.database import Base
+from app.models.types import CompressedJSON, PathString
 
 
 class Problem(Base):
@@ -18,14 +19,17 @@ class Problem(Base):
     difficulty = Column(Integer)  # 1-5
     source = Column(String(50), default='OCR识别')
     ocr_record_id = Column(Integer, ForeignKey('ocr_records.id'), nullable=True)
-    status = Column(String(20), default='pending')  # pending/completed/archived
+    status = Column(String(20), default='pending')  # pending/completed/archived/pending_ocr/ocr_failed
     quality_score = Column(String(1))  # A/B/C/D
     tags = Column(Text)  # JSON 数组字符串
 
     # OCR 解析后的额外信息
     question_number = Column(String(20))  # 题号，如 "24"
     score = Column(String(10))  # 分值，如 "10"
-    parsed_data = Column(Text)  # JSON 字符串，存储解析后的完整结构化数据
+    # 解析后的完整结构化数据（压缩 JSON，延迟加载）
+    parsed_data = deferred(Column(CompressedJSON))
+    question_index = Column(Integer)  # 在整页试卷中的序号（从 0 开始）
+    qus_location = Column(Text)  # 题目区域四角点坐标 JSON，可回溯到原图位置
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -34,6 +38,13 @@ class Problem(Base):
     ocr_record = relationship("OCRRecord", back_populates="problem")
     knowledge_points = relationship("ProblemKnowledgePoint", back_populates="problem", cascade="all, delete-orphan")
 
+    # 列表游标分页: ORDER BY created_at DESC, id DESC（可带状态/题型筛选）
+    __table_args__ = (
+        Index('ix_problems_created_at_id', 'created_at', 'id'),
+        Index('ix_problems_status_created_at_id', 'status', 'created_at', 'id'),
+        Index('ix_problems_question_type_created_at_id', 'question_type', 'created_at', 'id'),
+    )
+
 
 class ProblemKnowledgePoint(Base):
     """题目-知识点关联表"""
@@ -42,11 +53,17 @@ class ProblemKnowledgePoint(Base):
     id = Column(Integer, primary_key=True, index=True)
     problem_id = Column(Integer, ForeignKey('problems.id'), nullable=False)
     kp_id = Column(String(20), nullable=False)  # 知识点ID，如 KP02_1
+    kp_path = Column(PathString)  # 知识点物化路径（自动维护），按模块/专题查题目用
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # 关系
     problem = relationship("Problem", back_populates="knowledge_points")
 
+    __table_args__ = (
+        Index('ix_problem_knowledge_points_kp_path', 'kp_path', 'problem_id'),
+        Index('ix_problem_knowledge_points_kp_id', 'kp_id'),
+    )
+
 
 class OCRRecord(Base):
     """OCR识别记录表"""
@@ -58,12 +75,24 @@ class OCRRecord(Base):
     recognized_text = Column(Text, nullable=False)
     confidence_score = Column(Float, nullable=False)
     words_count = Column(Integer)
-    raw_json = Column(Text)  # 原始API返回的JSON
+    # 原始 API 返回的 JSON（压缩存储，延迟加载）
+    raw_json = deferred(Column(CompressedJSON))
     processing_time_ms = Column(Integer)
-    status = Column(String(20), default='success')  # success/failed
+    status = Column(String(20), default='success')  # success/failed/pending
     error_message = Column(Text)
     api_version = Column(String(50), default='paper_cut_edu')
+    content_hash = Column(String(64))  # 图片内容 SHA-256，用于识别结果缓存
+    ocr_params = Column(String(16))  # OCR 参数集指纹
+    preprocess_stats = Column(Text)  # 图片预处理统计（各阶段耗时、压缩前后字节数）JSON
+    # 熔断暂存（status=pending）的补识别：已尝试次数、下次可领取时间（领取时作为租约）
+    attempts = Column(Integer, default=0, nullable=False, server_default='0')
+    next_retry_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # 关系 - 通过 Problem.ocr_record_id 建立反向关系
     problem = relationship("Problem", back_populates="ocr_record")
+
+    __table_args__ = (
+        Index('ix_ocr_records_content_hash', 'content_hash', 'ocr_params'),
+        Index('ix_ocr_records_status_next_retry', 'status', 'next_retry_at'),
+    )
@@ -0,0 +1,125 @@
+"""
+题目计数数据模型
+
+problem_counters 按 状态 × 题型 × 质量等级 保存题目数量，
+列表总数和统计看板直接读取这张小表，不再对 problems 做 COUNT(*)。
+
+计数在 ORM flush 时与题目写入同一事务更新（新增 +1、删除 -1、
+维度字段变化时旧组合 -1 新组合 +1），事务回滚时一并回滚。
+绕过 ORM 的批量 SQL 不会更新计数，由定期对账任务修正。
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Column, Integer, String, DateTime, event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.problem import Problem
+
+# 计数维度（Problem 上的字段名）
+COUNTER_DIMENSIONS = ('status', 'question_type', 'quality_score')
+
+# 维度为 NULL 时在计数表中的取值（主键列不能为 NULL）
+UNSET = ''
+
+CounterKey = Tuple[str, str, str]
+
+
+class ProblemCounter(Base):
+    """题目计数表"""
+    __tablename__ = "problem_counters"
+
+    status = Column(String(20), primary_key=True, default=UNSET)
+    question_type = Column(String(20), primary_key=True, default=UNSET)
+    quality_score = Column(String(1), primary_key=True, default=UNSET)
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def counter_key(status: Optional[str], question_type: Optional[str], quality_score: Optional[str]) -> CounterKey:
+    """题目维度取值 -> 计数表主键"""
+    return (status or UNSET, question_type or UNSET, quality_score or UNSET)
+
+
+def counter_upsert(dialect_name: str, increment: bool = True):
+    """
+    计数表 upsert 语句（SQLite / PostgreSQL 均支持 ON CONFLICT）
+
+    Args:
+        dialect_name: 数据库方言名
+        increment: True 时在已有计数上累加，False 时直接覆盖
+    """
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = ProblemCounter.__table__
+    stmt = insert(table)
+    count = table.c.count + stmt.excluded.count if increment else stmt.excluded.count
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.status, table.c.question_type, table.c.quality_score],
+        set_={'count': count, 'updated_at': stmt.excluded.updated_at}
+    )
+
+
+def _key_of(obj: Problem, committed: bool) -> CounterKey:
+    """取题目当前（或 flush 前已提交）的维度组合"""
+    state = inspect(obj)
+    values = []
+    for name in COUNTER_DIMENSIONS:
+        if not committed:
+            values.append(getattr(obj, name))
+            continue
+        history = state.attrs[name].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        else:
+            values.append(None)
+    return counter_key(*values)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_counter_deltas(session: Session, flush_context) -> None:
+    """把本次 flush 中题目的增删改折算为计数增量，在同一事务中写入"""
+    deltas: Dict[CounterKey, int] = defaultdict(int)
+
+    for obj in session.new:
+        if isinstance(obj, Problem):
+            deltas[_key_of(obj, committed=False)] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Problem):
+            deltas[_key_of(obj, committed=True)] -= 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Problem) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in COUNTER_DIMENSIONS):
+            continue
+        old_key, new_key = _key_of(obj, committed=True), _key_of(obj, committed=False)
+        if old_key != new_key:
+            deltas[old_key] -= 1
+            deltas[new_key] += 1
+
+    rows = [
+        {'status': k[0], 'question_type': k[1], 'quality_score': k[2], 'count': d, 'updated_at': datetime.utcnow()}
+        for k, d in deltas.items() if d
+    ]
+    if rows:
+        connection = session.connection()
+        connection.execute(counter_upsert(connection.dialect.name), rows)
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+# 修改维度字段时先加载旧值，保证旧组合能被正确扣减
+for _name in COUNTER_DIMENSIONS:
+    event.listen(getattr(Problem, _name), "set", _load_previous_value, active_history=True)
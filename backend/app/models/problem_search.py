@@ -0,0 +1,170 @@
+"""
+题目全文检索索引（SQLite FTS5 / PostgreSQL tsvector + GIN）
+
+problems_fts 的 rowid 与 problems.id 一致，content 列保存 bigram 分词后的题目内容
+（分词见 app.utils.text_search）。分词在 Python 中完成，无法用数据库触发器维护，
+因此和题目计数一样在 ORM flush 时于同一事务内同步；绕过 ORM 的批量修改后
+用 scripts/rebuild_search_index.py 重建。
+
+SQLite 下为 FTS5 虚拟表；PostgreSQL 下为普通表，tsv 列由 content 生成并建 GIN 索引，
+两者的写入语句相同。其他数据库不创建该表，检索退回 LIKE 查询。
+"""
+from typing import Dict, List
+
+from sqlalchemy import DDL, column, event, func, inspect, literal_column, table, text
+from sqlalchemy.orm import Session
+
+from app.core.logger import logger
+from app.models.problem import Problem
+from app.utils.text_search import build_match_query, build_tsquery, tokenize_for_index
+
+FTS_TABLE = "problems_fts"
+
+problems_fts = table(FTS_TABLE, column("rowid"), column("content"), column("tsv"))
+
+# PostgreSQL 文本检索配置：simple 只做小写化，不做词干和停用词处理（索引文本已是 bigram）
+TS_CONFIG = "simple"
+
+_CREATE_FTS: Dict[str, List[str]] = {
+    # prefix='1': 为单字前缀查询（如「圆」*）建立前缀索引
+    "sqlite": [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(content, tokenize = 'unicode61 remove_diacritics 0', prefix = '1')"
+    ],
+    "postgresql": [
+        f"CREATE TABLE IF NOT EXISTS {FTS_TABLE} ("
+        "rowid INTEGER PRIMARY KEY, "
+        "content TEXT NOT NULL DEFAULT '', "
+        f"tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('{TS_CONFIG}', content)) STORED)",
+        f"CREATE INDEX IF NOT EXISTS ix_{FTS_TABLE}_tsv ON {FTS_TABLE} USING GIN (tsv)",
+    ],
+}
+
+# 随 problems 表一起创建 / 删除
+for _dialect, _statements in _CREATE_FTS.items():
+    for _statement in _statements:
+        event.listen(Problem.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+    event.listen(
+        Problem.__table__, "before_drop", DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect=_dialect)
+    )
+
+
+def search_index_supported(connection) -> bool:
+    """当前数据库是否有全文索引"""
+    return connection.dialect.name in _CREATE_FTS
+
+
+def search_match_condition(dialect_name: str, keyword: str):
+    """
+    全文索引命中条件（需 join problems_fts）
+
+    SQLite: problems_fts MATCH 短语查询；PostgreSQL: tsv @@ tsquery
+    """
+    if dialect_name == "postgresql":
+        config = literal_column(f"'{TS_CONFIG}'::regconfig")
+        return problems_fts.c.tsv.op("@@")(func.to_tsquery(config, build_tsquery(keyword)))
+    return literal_column(FTS_TABLE).match(build_match_query(keyword))
+
+
+def search_rank(dialect_name: str, keyword: str):
+    """
+    全文检索相关度（越大越相关，需 join problems_fts 并带 search_match_condition）
+
+    SQLite: FTS5 bm25()（越小越相关，取负）；PostgreSQL: ts_rank
+    """
+    if dialect_name == "postgresql":
+        config = literal_column(f"'{TS_CONFIG}'::regconfig")
+        return func.ts_rank(problems_fts.c.tsv, func.to_tsquery(config, build_tsquery(keyword)))
+    return -func.bm25(literal_column(FTS_TABLE))
+
+
+def _index_rows(problems):
+    return [{"rowid": p.id, "content": tokenize_for_index(p.content)} for p in problems]
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_search_index(session: Session, flush_context) -> None:
+    """把本次 flush 中新增、修改内容、删除的题目同步到 FTS 索引"""
+    removed = [obj.id for obj in session.deleted if isinstance(obj, Problem)]
+    changed = [
+        obj for obj in session.dirty
+        if isinstance(obj, Problem) and obj not in session.deleted
+        and inspect(obj).attrs.content.history.has_changes()
+    ]
+    added = [obj for obj in session.new if isinstance(obj, Problem)]
+    if not (removed or changed or added):
+        return
+
+    connection = session.connection()
+    if not search_index_supported(connection):
+        return
+
+    stale = removed + [obj.id for obj in changed]
+    if stale:
+        connection.execute(
+            text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid"), [{"rowid": i} for i in stale]
+        )
+    if changed or added:
+        connection.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, content) VALUES (:rowid, :content)"),
+            _index_rows(changed + added)
+        )
+
+
+def rebuild_search_index(connection, batch_size: int = 1000) -> int:
+    """
+    清空并按 problems 重建 FTS 索引（同步函数，配合 run_sync 使用）
+
+    Args:
+        connection: 同步数据库连接
+        batch_size: 每批读取的题目数
+
+    Returns:
+        写入索引的题目数
+    """
+    if not search_index_supported(connection):
+        return 0
+
+    for statement in _CREATE_FTS[connection.dialect.name]:
+        connection.execute(text(statement))
+    connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text("SELECT id, content FROM problems WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": batch_size}
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, content) VALUES (:rowid, :content)"),
+            [{"rowid": row_id, "content": tokenize_for_index(content)} for row_id, content in rows]
+        )
+        indexed += len(rows)
+        last_id = rows[-1][0]
+
+    if connection.dialect.name == "sqlite":
+        # 合并 b-tree 段，减少查询时需要扫描的段数
+        connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+    else:
+        # 更新统计信息，GIN 索引的选择率估计依赖它
+        connection.execute(text(f"ANALYZE {FTS_TABLE}"))
+    return indexed
+
+
+def ensure_search_index(connection) -> None:
+    """
+    确保 FTS 索引存在（同步函数，配合 run_sync 使用）
+
+    已有数据库首次建立索引时自动回填
+    """
+    if not search_index_supported(connection):
+        return
+
+    if inspect(connection).has_table(FTS_TABLE):
+        return
+
+    indexed = rebuild_search_index(connection)
+    logger.info(f"已建立题目全文索引: {indexed} 道题目")
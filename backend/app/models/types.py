@@ -0,0 +1,64 @@
+"""
+自定义列类型
+"""
+import json
+import zlib
+from typing import Any, Optional, Union
+
+from sqlalchemy import LargeBinary, String
+from sqlalchemy.types import TypeDecorator
+
+# 物化路径列：按字节序比较，子树范围查询（见 app.models.knowledge_path）才成立。
+# SQLite 默认 BINARY 排序即字节序；PostgreSQL 的语言排序规则会忽略 '/' 等标点，需指定 "C"
+PathString = String(255).with_variant(String(255, collation="C"), "postgresql")
+
+# 压缩格式标记（紧凑 JSON + zlib）
+COMPRESSED_JSON_PREFIX = b'ZJ1:'
+COMPRESSION_LEVEL = 6
+
+
+def compact_json(value: Union[str, dict, list]) -> str:
+    """转换为紧凑 JSON 文本（去掉缩进和多余空白）"""
+    if isinstance(value, str):
+        value = json.loads(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def encode_json_blob(text: str) -> bytes:
+    """压缩 JSON 文本"""
+    return COMPRESSED_JSON_PREFIX + zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decode_json_blob(value: Union[str, bytes, None]) -> Optional[str]:
+    """
+    解压 JSON 文本
+
+    兼容迁移前的明文 TEXT 值（原样返回）
+    """
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value.startswith(COMPRESSED_JSON_PREFIX):
+        return zlib.decompress(value[len(COMPRESSED_JSON_PREFIX):]).decode('utf-8')
+    return value.decode('utf-8')
+
+
+class CompressedJSON(TypeDecorator):
+    """
+    压缩存储的 JSON 文本列
+
+    Python 侧读写的仍是 JSON 字符串（dict/list 会先序列化为紧凑 JSON），
+    数据库中保存为 zlib 压缩后的二进制。迁移前的明文行可以照常读取。
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            value = compact_json(value)
+        return encode_json_blob(value)
+
+    def process_result_value(self, value: Any, dialect) -> Optional[str]:
+        return decode_json_blob(value)
@@ -4,9 +4,13 @@ Repository 数据访问层
 from app.repositories.base import BaseRepository
 from app.repositories.problem_repository import ProblemRepository
 from app.repositories.knowledge_repository import KnowledgeRepository
+from app.repositories.ocr_repository import OCRRecordRepository
+from app.repositories.ocr_job_repository import OCRJobRepository
 
 __all__ = [
     "BaseRepository",
     "ProblemRepository",
     "KnowledgeRepository",
+    "OCRRecordRepository",
+    "OCRJobRepository",
 ]
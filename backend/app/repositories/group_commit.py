@@ -0,0 +1,200 @@
+"""
+合并提交写入（group commit）
+
+SQLite 同一时刻只有一个写事务，每个请求各自提交时，并发的识别入库和题目更新
+会争抢写锁（database is locked），批量导入时吞吐受每次提交的 fsync 限制。
+
+启用后（settings.group_commit_enabled），这些写操作不再由请求会话提交，
+而是提交到进程内唯一的写入任务：写入任务每攒够 group_commit_max_batch 个操作
+或等待 group_commit_max_delay_ms 毫秒，就在一个事务中依次执行并一次提交，
+再把各操作的返回值（如生成的主键）交回调用方。
+
+写操作是接收 AsyncSession 的协程函数，只做数据库写入、在函数内构造 ORM 对象；
+每个操作在各自的保存点（SAVEPOINT）中执行，失败时只回滚该操作，其余操作照常提交；
+提交本身失败时整批回滚，再逐个单独重试。失败只影响该操作的调用方。
+未启用时各请求仍使用自己的会话，行为不变。
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker, begin_write_transaction
+from app.core.logger import logger
+
+settings = get_settings()
+
+T = TypeVar("T")
+WriteOp = Callable[[AsyncSession], Awaitable[T]]
+
+_Pending = Tuple[WriteOp, asyncio.Future]
+# (返回值, 异常)
+_Outcome = Tuple[Any, Optional[BaseException]]
+
+# 停止信号：之前排队的操作处理完后写入任务退出
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """合并提交写入任务（每个进程一个）"""
+
+    def __init__(
+        self,
+        max_batch: Optional[int] = None,
+        max_delay_ms: Optional[float] = None,
+        session_factory=async_session_maker
+    ):
+        self.max_batch = max(1, max_batch if max_batch is not None else settings.group_commit_max_batch)
+        self.max_delay = (max_delay_ms if max_delay_ms is not None else settings.group_commit_max_delay_ms) / 1000
+        self.session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.operations = 0
+        self.retried_batches = 0
+
+    async def submit(self, op: WriteOp) -> T:
+        """
+        提交一个写操作，等待所在批次提交后返回其结果
+
+        Args:
+            op: async def op(session) -> 结果；不要在其中提交或回滚
+
+        Returns:
+            op 的返回值（ORM 对象在提交后脱离会话，已加载的属性可直接读取）
+
+        Raises:
+            op 抛出的异常，或提交失败的异常
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((op, future))
+        return await future
+
+    # ============ 写入任务 ============
+
+    async def run_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if pending is _STOP:
+                    stopping = True
+                    break
+                batch.append(pending)
+            await self._process(batch)
+
+    async def _process(self, batch: List[_Pending]) -> None:
+        batch = [(op, future) for op, future in batch if not future.done()]
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        try:
+            outcomes = await self._run(batch)
+        except Exception as e:
+            # 提交失败时整批已回滚，逐个重试，只让失败的操作报错
+            self.retried_batches += 1
+            logger.warning(f"合并提交失败，逐个重试 {len(batch)} 个操作: {str(e)}")
+            outcomes = []
+            for pending in batch:
+                try:
+                    outcomes.extend(await self._run([pending]))
+                except Exception as single_error:
+                    outcomes.append((None, single_error))
+
+        for (_, future), (result, error) in zip(batch, outcomes):
+            self._resolve(future, result=result, error=error)
+
+        self.batches += 1
+        self.operations += len(batch)
+        logger.debug(f"合并提交: {len(batch)} 个操作, 耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    async def _run(self, batch: List[_Pending]) -> List[_Outcome]:
+        """在一个事务中执行一批操作并提交，每个操作使用独立的保存点"""
+        async with self.session_factory() as session:
+            try:
+                await begin_write_transaction(session)
+                outcomes: List[_Outcome] = []
+                for op, _ in batch:
+                    try:
+                        async with session.begin_nested():
+                            outcomes.append((await op(session), None))
+                    except Exception as e:
+                        # 保存点已回滚，同批其他操作的写入不受影响
+                        outcomes.append((None, e))
+                await session.commit()
+            except BaseException:
+                await session.rollback()
+                raise
+        return outcomes
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    # ============ 生命周期 ============
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        if self._queue is not None:
+            # 写入任务意外退出时，旧队列中的操作不会再被处理，直接通知调用方失败
+            self._fail_queued(self._queue, RuntimeError("合并提交写入任务已退出，操作未执行"))
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self.run_forever())
+
+    @classmethod
+    def _fail_queued(cls, queue: asyncio.Queue, error: BaseException) -> None:
+        while not queue.empty():
+            pending = queue.get_nowait()
+            if pending is not _STOP:
+                cls._resolve(pending[1], error=error)
+
+    async def stop(self) -> None:
+        """处理完已排队的操作后停止"""
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._queue.put(_STOP)
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "operations": self.operations,
+            "avg_batch_size": round(self.operations / self.batches, 2) if self.batches else 0.0,
+            "retried_batches": self.retried_batches,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+_writer: Optional[GroupCommitWriter] = None
+
+
+def get_group_commit_writer() -> GroupCommitWriter:
+    """获取进程内共享的合并提交写入任务"""
+    global _writer
+    if _writer is None:
+        _writer = GroupCommitWriter()
+    return _writer
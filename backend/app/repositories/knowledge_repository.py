@@ -1,13 +1,14 @@
 """
 知识体系 Repository
 """
-from typing import Optional, List
+from typing import Optional, List, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from app.repositories.base import BaseRepository
 from app.models.knowledge import Curriculum, Module, Topic, KnowledgePoint
+from app.models.knowledge_path import curriculum_code
 
 
 class KnowledgeRepository(BaseRepository[KnowledgePoint]):
@@ -114,3 +115,24 @@ class KnowledgeRepository(BaseRepository[KnowledgePoint]):
             .where(KnowledgePoint.kp_name.contains(keyword))
         )
         return list(result.scalars().all())
+
+    async def get_all_tree_nodes(self) -> List[Union[Module, Topic, KnowledgePoint]]:
+        """获取全部模块、专题、知识点（不加载关联，用于构建补全索引）"""
+        nodes: List[Union[Module, Topic, KnowledgePoint]] = []
+        for model in (Module, Topic, KnowledgePoint):
+            result = await self.db.execute(select(model))
+            nodes.extend(result.scalars().all())
+        return nodes
+
+    async def get_hierarchy_paths(self) -> List[Tuple[str, Optional[str]]]:
+        """获取全部节点的 (编号, 物化路径)，用于构建层级映射"""
+        paths = [(curriculum_code(cid), curriculum_code(cid)) for cid in
+                 (await self.db.execute(select(Curriculum.id))).scalars().all()]
+        for code_column, path_column in (
+            (Module.module_id, Module.path),
+            (Topic.topic_id, Topic.path),
+            (KnowledgePoint.kp_id, KnowledgePoint.path),
+        ):
+            result = await self.db.execute(select(code_column, path_column).where(path_column.isnot(None)))
+            paths.extend((code, path) for code, path in result.all())
+        return paths
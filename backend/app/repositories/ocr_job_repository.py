@@ -0,0 +1,214 @@
+"""
+OCR 异步任务 Repository
+
+任务领取采用「条件更新」：UPDATE ... WHERE id = ? AND status = 'queued'，
+只有影响行数为 1 的 worker 才算领取成功。不依赖 SELECT FOR UPDATE / Redis，
+多个进程、多台机器共享同一个数据库即可共享同一个队列。
+"""
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_
+
+from app.repositories.base import BaseRepository
+from app.models.ocr_job import OCRJob
+from app.core.logger import logger
+
+# 候选任务被其他 worker 抢走时的重试次数
+CLAIM_RETRIES = 3
+
+
+class OCRJobRepository(BaseRepository[OCRJob]):
+    """OCR 任务数据访问层"""
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(OCRJob, db)
+
+    async def enqueue(
+        self,
+        filename: str,
+        file_path: str,
+        content_hash: Optional[str] = None,
+        max_attempts: int = 5
+    ) -> OCRJob:
+        """
+        新建排队任务
+
+        Args:
+            filename: 原始文件名
+            file_path: 已保存图片的相对路径
+            content_hash: 图片 SHA-256
+            max_attempts: 最大尝试次数
+
+        Returns:
+            OCRJob 实例
+        """
+        return await self.create(
+            job_id=uuid.uuid4().hex,
+            status='queued',
+            filename=filename,
+            file_path=file_path,
+            content_hash=content_hash,
+            max_attempts=max_attempts,
+            run_after=datetime.utcnow()
+        )
+
+    async def get_by_job_id(self, job_id: str) -> Optional[OCRJob]:
+        """根据 job_id 获取任务"""
+        result = await self.db.execute(
+            select(OCRJob).where(OCRJob.job_id == job_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def claim_next(self, worker_id: str, lease_seconds: int) -> Optional[OCRJob]:
+        """
+        领取一个到期的排队任务
+
+        Args:
+            worker_id: worker 标识
+            lease_seconds: 租约时长
+
+        Returns:
+            领取到的任务，队列为空返回 None
+        """
+        for _ in range(CLAIM_RETRIES):
+            now = datetime.utcnow()
+            result = await self.db.execute(
+                select(OCRJob.id)
+                .where(OCRJob.status == 'queued', OCRJob.run_after <= now)
+                .order_by(OCRJob.run_after, OCRJob.id)
+                .limit(1)
+                # PostgreSQL 下跳过其他 worker 正在领取的行；SQLite 忽略该子句
+                .with_for_update(skip_locked=True)
+            )
+            candidate_id = result.scalar_one_or_none()
+            if candidate_id is None:
+                return None
+
+            claimed = await self.db.execute(
+                update(OCRJob)
+                .where(OCRJob.id == candidate_id, OCRJob.status == 'queued')
+                .values(
+                    status='running',
+                    lease_owner=worker_id,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    attempts=OCRJob.attempts + 1,
+                    updated_at=now
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+
+            if claimed.rowcount == 1:
+                job = await self.get_by_id(candidate_id)
+                await self.db.refresh(job)
+                return job
+
+        return None
+
+    async def mark_succeeded(
+        self,
+        id: int,
+        worker_id: str,
+        problem_id: Optional[str],
+        ocr_record_id: Optional[int],
+        parked: bool = False
+    ) -> bool:
+        """
+        标记任务完成（仅当租约仍属于当前 worker）
+
+        Args:
+            parked: OCR 熔断时题目已暂存为 pending_ocr、尚未识别，任务记为 parked 而非 succeeded
+
+        Returns:
+            是否更新成功；租约已被回收时返回 False
+        """
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            update(OCRJob)
+            .where(OCRJob.id == id, OCRJob.lease_owner == worker_id, OCRJob.status == 'running')
+            .values(
+                status='parked' if parked else 'succeeded',
+                problem_id=problem_id,
+                ocr_record_id=ocr_record_id,
+                error_message=None,
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=now,
+                finished_at=now
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    async def mark_failed(
+        self,
+        id: int,
+        worker_id: str,
+        error: str,
+        retry_delay: float,
+        exhausted: bool
+    ) -> bool:
+        """
+        记录一次失败：未达最大次数时按退避时间重新排队，否则标记为 failed
+
+        Args:
+            id: 任务数据库 ID
+            worker_id: 当前 worker
+            error: 错误信息
+            retry_delay: 重新排队的退避秒数
+            exhausted: 是否已用完重试次数
+
+        Returns:
+            是否更新成功；租约已被回收时返回 False
+        """
+        now = datetime.utcnow()
+        values = dict(
+            error_message=error,
+            lease_owner=None,
+            lease_expires_at=None,
+            updated_at=now
+        )
+        if exhausted:
+            values.update(status='failed', finished_at=now)
+        else:
+            values.update(status='queued', run_after=now + timedelta(seconds=retry_delay))
+
+        result = await self.db.execute(
+            update(OCRJob)
+            .where(OCRJob.id == id, OCRJob.lease_owner == worker_id, OCRJob.status == 'running')
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    async def recover_expired_leases(self) -> int:
+        """
+        回收租约过期的任务（worker 崩溃或卡死）
+
+        Returns:
+            回收的任务数
+        """
+        now = datetime.utcnow()
+        expired = and_(OCRJob.status == 'running', OCRJob.lease_expires_at < now)
+
+        failed = await self.db.execute(
+            update(OCRJob)
+            .where(expired, OCRJob.attempts >= OCRJob.max_attempts)
+            .values(status='failed', error_message='租约过期且已达最大重试次数',
+                    lease_owner=None, lease_expires_at=None, updated_at=now, finished_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        requeued = await self.db.execute(
+            update(OCRJob)
+            .where(expired)
+            .values(status='queued', run_after=now,
+                    lease_owner=None, lease_expires_at=None, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+        recovered = failed.rowcount + requeued.rowcount
+        if recovered:
+            logger.warning(f"回收租约过期的 OCR 任务: {recovered} 个")
+        return recovered
@@ -0,0 +1,159 @@
+"""
+OCR 记录 Repository
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, update
+
+from app.repositories.base import BaseRepository
+from app.models.problem import OCRRecord, Problem
+
+
+class OCRRecordRepository(BaseRepository[OCRRecord]):
+    """OCR 记录数据访问层"""
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(OCRRecord, db)
+
+    async def get_by_content_hash(
+        self,
+        content_hash: str,
+        ocr_params: str,
+        created_after: Optional[datetime] = None
+    ) -> Optional[OCRRecord]:
+        """
+        根据图片哈希和参数集查找最近一次成功的识别记录
+
+        Args:
+            content_hash: 图片 SHA-256
+            ocr_params: OCR 参数集指纹
+            created_after: 只查找该时间之后的记录（缓存 TTL）
+
+        Returns:
+            OCRRecord 实例,不存在则返回 None
+        """
+        stmt = (
+            select(OCRRecord)
+            .where(
+                OCRRecord.content_hash == content_hash,
+                OCRRecord.ocr_params == ocr_params,
+                OCRRecord.status == 'success'
+            )
+            .order_by(OCRRecord.id.desc())
+            .limit(1)
+        )
+        if created_after is not None:
+            stmt = stmt.where(OCRRecord.created_at >= created_after)
+
+        result = await self.db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_first_problem(self, ocr_record_id: int) -> Optional[Problem]:
+        """
+        获取 OCR 记录关联的第一道题目
+
+        Args:
+            ocr_record_id: OCR 记录 ID
+
+        Returns:
+            Problem 实例,不存在则返回 None
+        """
+        result = await self.db.execute(
+            select(Problem)
+            .where(Problem.ocr_record_id == ocr_record_id)
+            .order_by(Problem.id)
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_problems(self, ocr_record_id: int) -> List[Problem]:
+        """
+        获取 OCR 记录关联的所有题目（整页试卷按题目顺序）
+
+        Args:
+            ocr_record_id: OCR 记录 ID
+
+        Returns:
+            Problem 列表
+        """
+        result = await self.db.execute(
+            select(Problem)
+            .where(Problem.ocr_record_id == ocr_record_id)
+            .order_by(Problem.question_index, Problem.id)
+        )
+        return list(result.scalars().all())
+
+    async def get_raw_json(self, ocr_record_id: int) -> Optional[str]:
+        """
+        读取 OCR 记录的原始 JSON（raw_json 为延迟加载列，需要时单独查询）
+
+        Args:
+            ocr_record_id: OCR 记录 ID
+
+        Returns:
+            原始 JSON 字符串
+        """
+        result = await self.db.execute(
+            select(OCRRecord.raw_json).where(OCRRecord.id == ocr_record_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_due_pending_problems(self, limit: int) -> List[Problem]:
+        """
+        到期可补识别的熔断暂存题目（未在退避或被其他进程领取中）
+
+        Args:
+            limit: 最大数量
+
+        Returns:
+            Problem 列表（按 ID 顺序）
+        """
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            select(Problem)
+            .join(OCRRecord, OCRRecord.id == Problem.ocr_record_id)
+            .where(
+                Problem.status == 'pending_ocr',
+                OCRRecord.status == 'pending',
+                or_(OCRRecord.next_retry_at.is_(None), OCRRecord.next_retry_at <= now)
+            )
+            .order_by(Problem.id)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def claim_pending(self, ocr_record_id: int, lease_seconds: int) -> bool:
+        """
+        领取一条暂存记录：尝试次数加一，并把下次可领取时间推迟到租约结束
+
+        条件更新，多个进程同时领取时只有一个成功
+
+        Args:
+            ocr_record_id: OCR 记录 ID
+            lease_seconds: 租约时长
+
+        Returns:
+            是否领取成功
+        """
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            update(OCRRecord)
+            .where(
+                OCRRecord.id == ocr_record_id,
+                OCRRecord.status == 'pending',
+                or_(OCRRecord.next_retry_at.is_(None), OCRRecord.next_retry_at <= now)
+            )
+            .values(attempts=OCRRecord.attempts + 1, next_retry_at=now + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    async def release_pending(self, ocr_record_id: int) -> None:
+        """放弃本次领取（未实际调用 OCR，如熔断器再次打开），不计入尝试次数"""
+        await self.db.execute(
+            update(OCRRecord)
+            .where(OCRRecord.id == ocr_record_id, OCRRecord.status == 'pending')
+            .values(attempts=OCRRecord.attempts - 1, next_retry_at=None)
+            .execution_options(synchronize_session=False)
+        )
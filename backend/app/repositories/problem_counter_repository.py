@@ -0,0 +1,120 @@
+"""
+题目计数 Repository
+
+读取 problem_counters 得到题目总数和分布（行数只与维度组合数有关，与题目数量无关），
+以及把计数表与 problems 实际数据对账。
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, delete, text
+
+from app.core.database import begin_write_transaction
+from app.models.problem import Problem
+from app.models.problem_counter import ProblemCounter, counter_key, counter_upsert
+from app.core.logger import logger
+
+# 统计结果中维度为空时显示的键
+UNSET_LABEL = 'unknown'
+
+
+class ProblemCounterRepository:
+    """题目计数数据访问层"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def total(
+        self,
+        status: Optional[str] = None,
+        question_type: Optional[str] = None,
+        quality_score: Optional[str] = None
+    ) -> int:
+        """
+        符合筛选条件的题目数量
+
+        Args:
+            status: 状态筛选
+            question_type: 题型筛选
+            quality_score: 质量等级筛选
+        """
+        stmt = select(func.coalesce(func.sum(ProblemCounter.count), 0))
+        if status:
+            stmt = stmt.where(ProblemCounter.status == status)
+        if question_type:
+            stmt = stmt.where(ProblemCounter.question_type == question_type)
+        if quality_score:
+            stmt = stmt.where(ProblemCounter.quality_score == quality_score)
+        return (await self.db.execute(stmt)).scalar()
+
+    async def breakdown(self) -> Dict[str, Any]:
+        """
+        题目总数及按状态、题型、质量等级的分布
+
+        Returns:
+            total、by_status、by_question_type、by_quality_score
+        """
+        result = await self.db.execute(select(ProblemCounter).where(ProblemCounter.count != 0))
+
+        stats: Dict[str, Any] = {"total": 0, "by_status": {}, "by_question_type": {}, "by_quality_score": {}}
+        for counter in result.scalars():
+            stats["total"] += counter.count
+            for dimension in ("status", "question_type", "quality_score"):
+                key = getattr(counter, dimension) or UNSET_LABEL
+                bucket = stats[f"by_{dimension}"]
+                bucket[key] = bucket.get(key, 0) + counter.count
+        return stats
+
+    async def reconcile(self) -> Dict[str, int]:
+        """
+        按 problems 实际数据校正计数表（在调用方事务中执行）
+
+        先锁住计数表再读取：读取实际数据到写回绝对值之间，其他事务不能提交题目增删改
+        （计数表在同一次 flush 中更新），否则其增量会被覆盖丢失。
+
+        Returns:
+            checked（实际维度组合数）、fixed（被校正的组合数）
+        """
+        await self._lock_counters()
+
+        actual_rows = await self.db.execute(
+            select(Problem.status, Problem.question_type, Problem.quality_score, func.count(Problem.id))
+            .group_by(Problem.status, Problem.question_type, Problem.quality_score)
+        )
+        actual: Dict[tuple, int] = {}
+        for status, question_type, quality_score, count in actual_rows:
+            key = counter_key(status, question_type, quality_score)
+            actual[key] = actual.get(key, 0) + count
+
+        stored_rows = await self.db.execute(
+            select(ProblemCounter.status, ProblemCounter.question_type, ProblemCounter.quality_score, ProblemCounter.count)
+        )
+        stored = {(s, q, g): c for s, q, g, c in stored_rows}
+
+        fixes = [
+            {
+                'status': key[0], 'question_type': key[1], 'quality_score': key[2],
+                'count': actual.get(key, 0), 'updated_at': datetime.utcnow()
+            }
+            for key in set(actual) | set(stored)
+            if actual.get(key, 0) != stored.get(key)
+        ]
+        if fixes:
+            await self.db.execute(counter_upsert(self.db.bind.dialect.name, increment=False), fixes)
+            await self.db.execute(delete(ProblemCounter).where(ProblemCounter.count == 0))
+            logger.warning(f"题目计数已校正: {len(fixes)} 个组合")
+
+        return {"checked": len(actual), "fixed": len(fixes)}
+
+    async def _lock_counters(self) -> None:
+        """
+        对账期间阻止其他事务修改计数表（锁随调用方事务提交释放）
+
+        - PostgreSQL: SHARE ROW EXCLUSIVE 与写入方的 ROW EXCLUSIVE 互斥，
+          等进行中的写事务提交后才开始读取（READ COMMITTED 下之后的查询能看到它们）
+        - SQLite: BEGIN IMMEDIATE 提前取得数据库写锁
+        """
+        if self.db.bind.dialect.name == "postgresql":
+            await self.db.execute(text(f"LOCK TABLE {ProblemCounter.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+        else:
+            await begin_write_transaction(self.db)
@@ -1,12 +1,18 @@
 """
 题目 Repository
 """
-from typing import Optional, List, Dict, Any
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, desc, func, tuple_, exists
+from sqlalchemy.orm import undefer
 
 from app.repositories.base import BaseRepository
+from app.repositories.problem_counter_repository import ProblemCounterRepository
 from app.models.problem import Problem, OCRRecord, ProblemKnowledgePoint
+from app.models.knowledge_path import subtree_condition
+from app.models.problem_search import problems_fts, search_index_supported, search_match_condition, search_rank
+from app.utils.text_search import search_terms, bm25_scores
 
 
 class ProblemRepository(BaseRepository[Problem]):
@@ -14,6 +20,16 @@ class ProblemRepository(BaseRepository[Problem]):
 
     def __init__(self, db: AsyncSession):
         super().__init__(Problem, db)
+        self.counters = ProblemCounterRepository(db)
+
+    async def count(self) -> int:
+        """
+        获取题目总数（读取计数表，不扫描 problems）
+
+        Returns:
+            题目数量
+        """
+        return await self.counters.total()
 
     async def get_by_problem_id(self, problem_id: str) -> Optional[Problem]:
         """
@@ -32,28 +48,33 @@ class ProblemRepository(BaseRepository[Problem]):
 
     async def get_with_ocr(
         self,
-        problem_id: str
+        problem_id: str,
+        include_raw: bool = False
     ) -> Optional[Dict[str, Any]]:
         """
         获取题目及关联的 OCR 记录
 
         Args:
             problem_id: 题目 ID
+            include_raw: 是否同时加载延迟加载的大字段（parsed_data、raw_json）
 
         Returns:
             包含题目和 OCR 信息的字典
         """
-        problem = await self.get_by_problem_id(problem_id)
+        problem_stmt = select(Problem).where(Problem.problem_id == problem_id)
+        if include_raw:
+            problem_stmt = problem_stmt.options(undefer(Problem.parsed_data))
+        problem = (await self.db.execute(problem_stmt)).scalar_one_or_none()
         if not problem:
             return None
 
         # 获取 OCR 记录
         ocr_record = None
         if problem.ocr_record_id:
-            ocr_result = await self.db.execute(
-                select(OCRRecord).where(OCRRecord.id == problem.ocr_record_id)
-            )
-            ocr_record = ocr_result.scalar_one_or_none()
+            ocr_stmt = select(OCRRecord).where(OCRRecord.id == problem.ocr_record_id)
+            if include_raw:
+                ocr_stmt = ocr_stmt.options(undefer(OCRRecord.raw_json))
+            ocr_record = (await self.db.execute(ocr_stmt)).scalar_one_or_none()
 
         return {
             "problem": problem,
@@ -64,7 +85,9 @@ class ProblemRepository(BaseRepository[Problem]):
         self,
         page: int = 1,
         size: int = 20,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        question_type: Optional[str] = None,
+        knowledge_path: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         分页查询题目
@@ -73,18 +96,15 @@ class ProblemRepository(BaseRepository[Problem]):
             page: 页码 (从 1 开始)
             size: 每页数量
             status: 状态筛选
+            question_type: 题型筛选
+            knowledge_path: 知识体系节点路径，只返回关联到该节点子树下知识点的题目
 
         Returns:
             分页结果字典
         """
         # 构建查询
-        stmt = select(Problem)
-        count_stmt = select(func.count(Problem.id))
-
-        # 状态筛选
-        if status:
-            stmt = stmt.where(Problem.status == status)
-            count_stmt = count_stmt.where(Problem.status == status)
+        filters = self._list_filters(status, question_type, knowledge_path)
+        stmt = select(Problem).where(*filters)
 
         # 排序
         stmt = stmt.order_by(desc(Problem.created_at))
@@ -97,9 +117,11 @@ class ProblemRepository(BaseRepository[Problem]):
         result = await self.db.execute(stmt)
         problems = list(result.scalars().all())
 
-        # 总数
-        count_result = await self.db.execute(count_stmt)
-        total = count_result.scalar()
+        # 总数（计数表；按知识体系筛选时计数表无此维度，直接统计）
+        if knowledge_path:
+            total = await self.db.scalar(select(func.count()).select_from(Problem).where(*filters))
+        else:
+            total = await self.counters.total(status=status, question_type=question_type)
 
         return {
             "items": problems,
@@ -109,6 +131,81 @@ class ProblemRepository(BaseRepository[Problem]):
             "pages": (total + size - 1) // size  # 总页数
         }
 
+    async def get_page_by_cursor(
+        self,
+        size: int = 20,
+        after: Optional[Tuple[datetime, int]] = None,
+        status: Optional[str] = None,
+        question_type: Optional[str] = None,
+        with_total: bool = False,
+        knowledge_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        游标（keyset）分页查询题目
+
+        按 (created_at, id) 倒序，从上一页最后一行之后继续读取，
+        借助复合索引定位起点，任意深度的翻页代价相同。
+
+        Args:
+            size: 每页数量
+            after: 上一页最后一行的 (created_at, id)，None 表示第一页
+            status: 状态筛选
+            question_type: 题型筛选
+            with_total: 是否统计符合条件的总数
+            knowledge_path: 知识体系节点路径，只返回关联到该节点子树下知识点的题目
+
+        Returns:
+            items、has_more、last（本页最后一行的排序键，无下一页时为 None）、total
+        """
+        filters = self._list_filters(status, question_type, knowledge_path)
+
+        stmt = select(Problem).where(*filters)
+        if after is not None:
+            stmt = stmt.where(tuple_(Problem.created_at, Problem.id) < tuple_(*after))
+        # 多取一行判断是否还有下一页
+        stmt = stmt.order_by(desc(Problem.created_at), desc(Problem.id)).limit(size + 1)
+
+        problems = list((await self.db.execute(stmt)).scalars().all())
+        has_more = len(problems) > size
+        problems = problems[:size]
+
+        total = None
+        if with_total and knowledge_path:
+            total = await self.db.scalar(select(func.count()).select_from(Problem).where(*filters))
+        elif with_total:
+            total = await self.counters.total(status=status, question_type=question_type)
+
+        last = (problems[-1].created_at, problems[-1].id) if has_more else None
+        return {
+            "items": problems,
+            "has_more": has_more,
+            "last": last,
+            "total": total
+        }
+
+    def _list_filters(
+        self,
+        status: Optional[str],
+        question_type: Optional[str],
+        knowledge_path: Optional[str]
+    ) -> List[Any]:
+        """列表查询的筛选条件（页码分页与游标分页共用）"""
+        filters = []
+        if status:
+            filters.append(Problem.status == status)
+        if question_type:
+            filters.append(Problem.question_type == question_type)
+        if knowledge_path:
+            filters.append(Problem.id.in_(self._problem_ids_under(knowledge_path)))
+        return filters
+
+    @staticmethod
+    def _problem_ids_under(path: str):
+        """关联到 path 子树下任一知识点的题目 ID（kp_path 索引范围扫描）"""
+        return select(ProblemKnowledgePoint.problem_id).where(
+            subtree_condition(ProblemKnowledgePoint.kp_path, path)
+        )
+
     async def get_by_status(
         self,
         status: str,
@@ -187,11 +284,105 @@ class ProblemRepository(BaseRepository[Problem]):
             limit: 最大返回数量
 
         Returns:
-            题目列表
+            题目列表（按相关度排序）
         """
-        result = await self.db.execute(
-            select(Problem)
-            .where(Problem.content.contains(keyword))
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+        return [problem for problem, _ in await self.search(keyword, limit=limit)]
+
+    async def search(
+        self,
+        keyword: str,
+        status: Optional[str] = None,
+        question_type: Optional[str] = None,
+        kp_id: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[Tuple[Problem, float]]:
+        """
+        全文检索题目（按相关度排序）
+
+        Returns:
+            (题目, 相关度分数) 列表，分数越大越相关
+        """
+        hits, _ = await self.search_page(keyword, status, question_type, kp_id, limit, offset)
+        return hits
+
+    async def search_page(
+        self,
+        keyword: str,
+        status: Optional[str] = None,
+        question_type: Optional[str] = None,
+        kp_id: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Tuple[Problem, float]], bool]:
+        """
+        全文检索题目，并返回是否还有下一页
+
+        在数据库中对全部命中排序后分页（SQLite: FTS5 bm25()；PostgreSQL: ts_rank），
+        相关度相同时新题目在前。没有全文索引的数据库退回 LIKE 查询，在 Python 中计算 BM25。
+
+        Args:
+            keyword: 搜索关键词（多个词以空格分隔，需同时命中）
+            status: 状态筛选
+            question_type: 题型筛选
+            kp_id: 知识点筛选
+            limit: 最大返回数量
+            offset: 跳过数量
+
+        Returns:
+            ((题目, 相关度分数) 列表, 是否还有更多命中)
+        """
+        filters = []
+        if status:
+            filters.append(Problem.status == status)
+        if question_type:
+            filters.append(Problem.question_type == question_type)
+        if kp_id:
+            filters.append(exists().where(
+                ProblemKnowledgePoint.problem_id == Problem.id,
+                ProblemKnowledgePoint.kp_id == kp_id
+            ))
+
+        terms = search_terms(keyword)
+        if not terms:
+            return [], False
+
+        connection = await self.db.connection()
+        if not search_index_supported(connection):
+            return await self._search_page_fallback(keyword, terms, filters, limit, offset)
+
+        score = search_rank(connection.dialect.name, keyword).label("score")
+        # 多取一条用于判断是否还有下一页
+        rows = (await self.db.execute(
+            select(Problem, score)
+            .join(problems_fts, problems_fts.c.rowid == Problem.id)
+            .where(search_match_condition(connection.dialect.name, keyword), *filters)
+            .order_by(desc(score), desc(Problem.id))
+            .offset(offset)
+            .limit(limit + 1)
+        )).all()
+        return [(problem, round(value, 4)) for problem, value in rows[:limit]], len(rows) > limit
+
+    async def _search_page_fallback(
+        self,
+        keyword: str,
+        terms: List[str],
+        filters: list,
+        limit: int,
+        offset: int
+    ) -> Tuple[List[Tuple[Problem, float]], bool]:
+        """没有全文索引时：LIKE 取全部命中，在 Python 中按 BM25 排序分页"""
+        candidates = (await self.db.execute(
+            select(Problem.id, Problem.content)
+            .where(*filters, *[Problem.content.contains(t) for t in terms])
+        )).all()
+
+        scores = bm25_scores([content for _, content in candidates], keyword)
+        ranked = sorted(zip(scores, (row_id for row_id, _ in candidates)), key=lambda x: (-x[0], -x[1]))
+        page = ranked[offset:offset + limit]
+        if not page:
+            return [], False
+
+        problems = await self.db.execute(select(Problem).where(Problem.id.in_([row_id for _, row_id in page])))
+        by_id = {p.id: p for p in problems.scalars()}
+        return [(by_id[row_id], round(score, 4)) for score, row_id in page], len(ranked) > offset + limit
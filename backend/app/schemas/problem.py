@@ -64,6 +64,7 @@ class ProblemSchema(BaseModel):
     quality_score: Optional[str] = None
     tags: Optional[str] = None
     ocr_record_id: Optional[int] = None
+    question_index: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -87,5 +88,72 @@ class OCRResponseSchema(BaseModel):
     words_count: Optional[int] = None
     quality_assessment: Optional[dict] = None
     ocr_record_id: Optional[int] = None
+    cache_hit: bool = False
+    ocr_pending: bool = False  # OCR 熔断中，题目已暂存待补识别
     error: Optional[str] = None
     error_code: Optional[str] = None
+    retryable: bool = True  # 失败时重试是否可能成功（如图片格式错误、配额用尽则为 False）
+
+
+class PaperQuestionSchema(BaseModel):
+    """整页试卷识别出的单道题目 Schema"""
+    problem_id: str
+    question_index: int
+    question_number: Optional[str] = None
+    question_type: Optional[str] = None
+    score: Optional[str] = None
+    content: str
+    quality_grade: Optional[str] = None
+    qus_location: Optional[dict] = None
+
+
+class PaperOCRResponseSchema(BaseModel):
+    """整页试卷识别响应 Schema"""
+    success: bool
+    ocr_record_id: Optional[int] = None
+    total_questions: int = 0
+    problems: List[PaperQuestionSchema] = []
+    confidence_score: Optional[float] = None
+    processing_time_ms: Optional[int] = None
+    cache_hit: bool = False
+    error: Optional[str] = None
+    error_code: Optional[str] = None
+
+
+class BatchOCRItemSchema(BaseModel):
+    """批量识别单条结果 Schema"""
+    index: int
+    filename: str
+    success: bool
+    problem_id: Optional[str] = None
+    ocr_record_id: Optional[int] = None
+    quality_grade: Optional[str] = None
+    cache_hit: bool = False
+    error: Optional[str] = None
+
+
+class BatchOCRResponseSchema(BaseModel):
+    """批量识别响应 Schema"""
+    total: int
+    succeeded: int
+    failed: int
+    items: List[BatchOCRItemSchema] = []
+
+
+class OCRJobSchema(BaseModel):
+    """OCR 异步任务 Schema"""
+    job_id: str
+    status: str
+    filename: str
+    attempts: int
+    max_attempts: int
+    problem_id: Optional[str] = None
+    ocr_record_id: Optional[int] = None
+    error_message: Optional[str] = None
+    run_after: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,138 @@
+"""
+题目 ID 分配器
+
+格式: P_MATH_{年份}_{序号:06d}，序号按年份单调递增。
+
+计数器保存在 id_sequences 表（每年一行）。每个进程一次预留一段（block）序号，
+段内分配只在内存中进行，无需访问数据库；用完后再用一条
+UPDATE ... RETURNING 原子地预留下一段。预留在独立事务中立即提交，
+调用方事务回滚也不会让同一段号被其他进程重复分配（只会留下空号）。
+
+计数器首次创建时从已有题目的最大序号开始，兼容旧的随机 3 位序号。
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import get_settings
+from app.core.logger import logger
+from app.models.id_sequence import IDSequence
+from app.models.problem import Problem
+
+settings = get_settings()
+
+PROBLEM_ID_PREFIX = "P_MATH"
+
+
+def format_problem_id(year: int, number: int) -> str:
+    """生成题目 ID 字符串"""
+    return f"{PROBLEM_ID_PREFIX}_{year}_{number:06d}"
+
+
+def sequence_name(year: int) -> str:
+    """年份对应的计数器名称"""
+    return f"problem:{year}"
+
+
+class ProblemIDAllocator:
+    """按年份分段预分配的题目 ID 分配器（进程级单例）"""
+
+    def __init__(self, block_size: Optional[int] = None):
+        self.block_size = max(1, block_size or settings.problem_id_block_size)
+        # 年份 -> [下一个可用序号, 段末（不含）]
+        self._blocks: Dict[int, List[int]] = {}
+        self._lock = asyncio.Lock()
+
+    async def allocate(self, bind: AsyncEngine, count: int = 1) -> List[str]:
+        """
+        分配 count 个题目 ID
+
+        必须在调用方会话写入数据之前调用：预留新段时使用独立连接，
+        SQLite 下调用方持有写锁会导致等待超时。
+
+        Args:
+            bind: 数据库引擎（通常为 session.bind）
+            count: 需要的 ID 数量
+
+        Returns:
+            题目 ID 列表（同一进程内单调递增）
+        """
+        year = datetime.now().year
+        problem_ids: List[str] = []
+
+        async with self._lock:
+            while len(problem_ids) < count:
+                block = self._blocks.get(year)
+                if block is None or block[0] >= block[1]:
+                    start, end = await self._reserve(bind, year, max(self.block_size, count - len(problem_ids)))
+                    block = self._blocks[year] = [start, end]
+
+                take = min(count - len(problem_ids), block[1] - block[0])
+                problem_ids.extend(format_problem_id(year, n) for n in range(block[0], block[0] + take))
+                block[0] += take
+
+        return problem_ids
+
+    async def _reserve(self, bind: AsyncEngine, year: int, size: int) -> Tuple[int, int]:
+        """在独立事务中预留 [start, end) 一段序号"""
+        name = sequence_name(year)
+
+        for _ in range(3):
+            async with bind.begin() as conn:
+                end = (await conn.execute(
+                    update(IDSequence)
+                    .where(IDSequence.name == name)
+                    .values(next_value=IDSequence.next_value + size, updated_at=datetime.utcnow())
+                    .returning(IDSequence.next_value)
+                )).scalar_one_or_none()
+                if end is not None:
+                    logger.debug(f"预留题目序号: {name} [{end - size}, {end})")
+                    return end - size, end
+
+            # 计数器不存在：从已有题目的最大序号之后开始
+            try:
+                async with bind.begin() as conn:
+                    start = await self._max_existing_number(conn, year) + 1
+                    await conn.execute(
+                        insert(IDSequence).values(name=name, next_value=start + size, updated_at=datetime.utcnow())
+                    )
+                logger.info(f"创建题目序号计数器: {name}, 起始 {start}")
+                return start, start + size
+            except IntegrityError:
+                # 其他进程已创建，重新走 UPDATE
+                continue
+
+        raise RuntimeError(f"无法预留题目序号: {name}")
+
+    @staticmethod
+    async def _max_existing_number(conn, year: int) -> int:
+        """已有题目中该年份的最大序号"""
+        prefix = f"{PROBLEM_ID_PREFIX}_{year}_"
+        result = await conn.execute(
+            select(Problem.problem_id).where(Problem.problem_id.like(f"{prefix}%"))
+        )
+        max_number = 0
+        for (problem_id,) in result:
+            suffix = problem_id[len(prefix):]
+            if suffix.isdigit():
+                max_number = max(max_number, int(suffix))
+        return max_number
+
+    def reset(self) -> None:
+        """丢弃已预留的号段（测试或切换数据库时使用）"""
+        self._blocks.clear()
+
+
+_allocator: Optional[ProblemIDAllocator] = None
+
+
+def get_problem_id_allocator() -> ProblemIDAllocator:
+    """获取进程内共享的题目 ID 分配器"""
+    global _allocator
+    if _allocator is None:
+        _allocator = ProblemIDAllocator()
+    return _allocator
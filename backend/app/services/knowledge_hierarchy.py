@@ -0,0 +1,126 @@
+"""
+知识体系层级映射（进程内存）
+
+按物化路径（见 app.models.knowledge_path）维护：
+- 编号 -> 路径：祖先即路径上的各段，O(1) 取得
+- 祖先编号 -> 其下所有知识点编号：后代查询 O(1)
+
+启动时从数据库加载；知识体系通过 ORM 修改时，flush 时刷新的路径在提交后增量应用
+（回滚则丢弃）。绕过 ORM 的批量写入后调用 rebuild()。
+"""
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.logger import logger
+from app.models.knowledge_path import PATH_CHANGES_KEY, PATH_SEPARATOR
+
+# 路径深度 -> 节点类型
+KIND_BY_DEPTH = {1: 'curriculum', 2: 'module', 3: 'topic', 4: 'knowledge_point'}
+
+
+class KnowledgeHierarchy:
+    """知识体系层级映射"""
+
+    def __init__(self):
+        self._paths: Dict[str, str] = {}
+        self._descendant_kps: Dict[str, Set[str]] = {}
+        self.built = False
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._paths
+
+    # ============ 构建与增量更新 ============
+
+    def rebuild(self, paths: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """全量重建（paths 为 [(编号, 路径)]）"""
+        start = time.perf_counter()
+        self._paths.clear()
+        self._descendant_kps.clear()
+        for code, path in paths:
+            self._set(code, path)
+        self.built = True
+
+        logger.info(
+            f"知识体系层级映射已构建: {len(self._paths)} 个节点, "
+            f"耗时 {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+
+    def apply(self, changes: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """按顺序应用已提交的路径变更（路径为 None 表示节点已删除或改名）"""
+        count = 0
+        for code, path in changes:
+            self._set(code, path)
+            count += 1
+        logger.debug(f"知识体系层级映射增量更新: {count} 个节点")
+
+    def _set(self, code: str, path: Optional[str]) -> None:
+        old = self._paths.pop(code, None)
+        if old is not None and self._kind(old) == 'knowledge_point':
+            for ancestor in self._segments(old):
+                members = self._descendant_kps.get(ancestor)
+                if members is not None:
+                    members.discard(code)
+        if not path:
+            return
+
+        self._paths[code] = path
+        self._descendant_kps.setdefault(code, set())
+        if self._kind(path) == 'knowledge_point':
+            for ancestor in self._segments(path):
+                self._descendant_kps.setdefault(ancestor, set()).add(code)
+
+    @staticmethod
+    def _segments(path: str) -> List[str]:
+        return path.split(PATH_SEPARATOR)
+
+    def _kind(self, path: str) -> Optional[str]:
+        return KIND_BY_DEPTH.get(len(self._segments(path)))
+
+    # ============ 查询 ============
+
+    def path_of(self, code: str) -> Optional[str]:
+        """节点路径，如 C1/M01/T01_01"""
+        return self._paths.get(code)
+
+    def kind_of(self, code: str) -> Optional[str]:
+        """节点类型（curriculum / module / topic / knowledge_point）"""
+        path = self._paths.get(code)
+        return self._kind(path) if path else None
+
+    def ancestors(self, code: str) -> List[str]:
+        """祖先编号（从课程到父节点）"""
+        path = self._paths.get(code)
+        return self._segments(path)[:-1] if path else []
+
+    def descendant_kps(self, code: str) -> Set[str]:
+        """节点下所有知识点编号（知识点本身返回自身）"""
+        return set(self._descendant_kps.get(code, ()))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_path_changes(session: Session) -> None:
+    changes = session.info.pop(PATH_CHANGES_KEY, None)
+    if changes and _hierarchy is not None and _hierarchy.built:
+        _hierarchy.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_path_changes(session: Session) -> None:
+    session.info.pop(PATH_CHANGES_KEY, None)
+
+
+_hierarchy: Optional[KnowledgeHierarchy] = None
+
+
+def get_knowledge_hierarchy() -> KnowledgeHierarchy:
+    """获取进程内共享的知识体系层级映射"""
+    global _hierarchy
+    if _hierarchy is None:
+        _hierarchy = KnowledgeHierarchy()
+    return _hierarchy
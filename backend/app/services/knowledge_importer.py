@@ -0,0 +1,332 @@
+"""
+知识体系批量导入（knowledge_base/*.json）
+
+每个文件是一份课程：
+    {"curriculum": 名称, "grade"?: 年级, "semester"?: 学期,
+     "modules": [{module_id, ..., "topics": [{topic_id, ..., "knowledge_points": [...]}]}]}
+未写 grade / semester 时从文件名推断（grade7_sem1 -> 七年级 / 上册）。
+
+逐个文件读取，按 module_id / topic_id / kp_id 与数据库中的现状比对，只把新增、
+变化和删除的行以集合化的 upsert / delete 写入，每份课程一个事务；内容未变时不写库，
+重复执行只有几次按编号的查询。
+
+导入使用 Core 语句，不经过 ORM 的 flush 钩子，因此在事务内直接刷新物化路径，
+提交后使快照缓存失效并重建补全索引和层级映射。
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import ValidationException
+from app.core.logger import logger
+from app.models.knowledge import Curriculum, KnowledgePoint, Module, Topic
+from app.models.knowledge_path import refresh_paths
+from app.models.knowledge_version import bump_knowledge_version
+
+MODULES = 'modules'
+TOPICS = 'topics'
+KNOWLEDGE_POINTS = 'knowledge_points'
+
+_CN_NUMBERS = ['', '一', '二', '三', '四', '五', '六', '七', '八', '九', '十', '十一', '十二']
+_FILENAME_RE = re.compile(r'grade(\d+)_sem([12])')
+
+
+@dataclass(frozen=True)
+class _Level:
+    """一层节点：表、编号列、父节点外键列及需要比对的字段"""
+    name: str
+    table: Any
+    code: str
+    parent: str
+    fields: Tuple[str, ...]
+
+
+_LEVELS = (
+    _Level(MODULES, Module.__table__, 'module_id', 'curriculum_id', ('module_name', 'module_tag', 'overview')),
+    _Level(TOPICS, Topic.__table__, 'topic_id', 'module_id', ('topic_name', 'alias')),
+    _Level(KNOWLEDGE_POINTS, KnowledgePoint.__table__, 'kp_id', 'topic_id', ('kp_name', 'detail')),
+)
+
+
+@dataclass
+class ImportReport:
+    """一份课程的导入结果：各层新增、更新、删除的编号"""
+    curriculum: str
+    source: str = ''
+    created: Dict[str, List[str]] = field(default_factory=dict)
+    updated: Dict[str, List[str]] = field(default_factory=dict)
+    deleted: Dict[str, List[str]] = field(default_factory=dict)
+    curriculum_created: bool = False
+    dry_run: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return self.curriculum_created or any(
+            codes for changes in (self.created, self.updated, self.deleted) for codes in changes.values()
+        )
+
+    def summary(self) -> str:
+        if not self.changed:
+            return f"{self.curriculum}: 无变化"
+        parts = []
+        for level in _LEVELS:
+            counts = [len(self.created.get(level.name, [])), len(self.updated.get(level.name, [])),
+                      len(self.deleted.get(level.name, []))]
+            if any(counts):
+                parts.append(f"{level.name} +{counts[0]} ~{counts[1]} -{counts[2]}")
+        prefix = "[预览] " if self.dry_run else ""
+        created = "（新建课程）" if self.curriculum_created else ""
+        return f"{prefix}{self.curriculum}{created}: " + (", ".join(parts) or "课程信息更新")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "curriculum": self.curriculum,
+            "source": self.source,
+            "changed": self.changed,
+            "curriculum_created": self.curriculum_created,
+            "dry_run": self.dry_run,
+            "created": self.created,
+            "updated": self.updated,
+            "deleted": self.deleted,
+        }
+
+
+def infer_grade_semester(filename: str) -> Tuple[Optional[str], Optional[str]]:
+    """从文件名推断年级和学期（grade7_sem1 -> 七年级, 上册）"""
+    match = _FILENAME_RE.search(filename)
+    if not match or not 0 < int(match.group(1)) < len(_CN_NUMBERS):
+        return None, None
+    return f"{_CN_NUMBERS[int(match.group(1))]}年级", "上册" if match.group(2) == '1' else "下册"
+
+
+def iter_curriculum_files(path) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+    """
+    逐个读取课程文件（目录下按文件名排序的 *.json，或单个文件）
+
+    一次只在内存中保留一份课程
+    """
+    path = Path(path)
+    files = sorted(path.glob('*.json')) if path.is_dir() else [path]
+    for file in files:
+        with file.open(encoding='utf-8') as f:
+            try:
+                document = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValidationException(f"课程文件不是合法的 JSON: {file.name}: {e}")
+        yield file, document
+
+
+def _flatten(document: Dict[str, Any], source: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """课程文档 -> {层: {编号: 行}}，行中父节点以编号表示；校验编号缺失和重复"""
+    rows: Dict[str, Dict[str, Dict[str, Any]]] = {level.name: {} for level in _LEVELS}
+
+    def add(level: _Level, item: Dict[str, Any], parent_code: Optional[str]) -> str:
+        code = item.get(level.code)
+        if not code:
+            raise ValidationException(f"{source}: {level.name} 缺少 {level.code}", level.code)
+        if code in rows[level.name]:
+            raise ValidationException(f"{source}: {level.code} 重复: {code}", level.code)
+        row = {name: item.get(name) for name in level.fields}
+        row['parent'] = parent_code
+        rows[level.name][code] = row
+        return code
+
+    module_level, topic_level, kp_level = _LEVELS
+    for module in document.get('modules') or []:
+        module_code = add(module_level, module, None)
+        for topic in module.get('topics') or []:
+            topic_code = add(topic_level, topic, module_code)
+            for kp in topic.get('knowledge_points') or []:
+                add(kp_level, kp, topic_code)
+    return rows
+
+
+class KnowledgeImporter:
+    """知识体系批量导入"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def import_path(self, path, dry_run: bool = False) -> List[ImportReport]:
+        """导入目录下的所有课程文件（或单个文件），每份课程一个事务"""
+        reports = []
+        for file, document in iter_curriculum_files(path):
+            reports.append(await self.import_curriculum(document, source=file.name, dry_run=dry_run))
+        return reports
+
+    async def import_curriculum(
+        self,
+        document: Dict[str, Any],
+        source: str = '',
+        dry_run: bool = False
+    ) -> ImportReport:
+        """
+        导入一份课程（比对后集合化写入）
+
+        Args:
+            document: 课程文档
+            source: 来源文件名（用于推断年级学期和报告）
+            dry_run: 只比对不写入
+
+        Returns:
+            导入报告
+
+        Raises:
+            ValidationException: 文档缺少课程名、年级学期或节点编号，或编号重复
+        """
+        name = document.get('curriculum')
+        if not name:
+            raise ValidationException(f"{source}: 缺少 curriculum（课程名称）", 'curriculum')
+        inferred_grade, inferred_semester = infer_grade_semester(source)
+        grade = document.get('grade') or inferred_grade
+        semester = document.get('semester') or inferred_semester
+        if not grade or not semester:
+            raise ValidationException(f"{source}: 无法确定年级和学期，请在文件中填写 grade / semester", 'grade')
+
+        desired = _flatten(document, source)
+        report = ImportReport(curriculum=name, source=source, dry_run=dry_run)
+
+        try:
+            await self._apply(name, grade, semester, desired, report)
+        except Exception:
+            await self.db.rollback()
+            raise
+
+        if not dry_run:
+            if report.changed:
+                # 其他进程据此刷新各自的缓存
+                await self.db.run_sync(lambda session: bump_knowledge_version(session.connection()))
+            await self.db.commit()
+            if report.changed:
+                await self._refresh_caches()
+        logger.info(f"知识体系导入 {source}: {report.summary()}")
+        return report
+
+    async def _apply(
+        self,
+        name: str,
+        grade: str,
+        semester: str,
+        desired: Dict[str, Dict[str, Dict[str, Any]]],
+        report: ImportReport
+    ) -> None:
+        """比对并写入；预览（report.dry_run）时只读取现状、填写报告，不执行任何写入"""
+        write = not report.dry_run
+        curriculums = Curriculum.__table__
+        existing_curriculum = (await self.db.execute(
+            select(curriculums.c.id, curriculums.c.grade, curriculums.c.semester)
+            .where(curriculums.c.name == name).order_by(curriculums.c.id).limit(1)
+        )).first()
+
+        # 预览时新建的节点没有主键，以 None 代替（与任何已有主键都不相等）
+        curriculum_id: Optional[int] = None
+        if existing_curriculum is None:
+            if write:
+                curriculum_id = (await self.db.execute(
+                    curriculums.insert().values(name=name, grade=grade, semester=semester).returning(curriculums.c.id)
+                )).scalar_one()
+            report.curriculum_created = True
+        else:
+            curriculum_id = existing_curriculum.id
+            if (existing_curriculum.grade, existing_curriculum.semester) != (grade, semester):
+                if write:
+                    await self.db.execute(
+                        update(curriculums).where(curriculums.c.id == curriculum_id)
+                        .values(grade=grade, semester=semester)
+                    )
+                report.updated.setdefault('curriculum', []).append(name)
+
+        # 父节点：课程 -> 模块 -> 专题，按编号解析为主键
+        parent_ids: Dict[str, Optional[int]] = {}
+        owned_parent_ids = [curriculum_id] if curriculum_id is not None else []
+        affected_ids: Dict[str, List[int]] = {}
+        deletions: List[Tuple[_Level, List[int], List[str]]] = []
+
+        for level in _LEVELS:
+            table = level.table
+            code_col, parent_col = table.c[level.code], table.c[level.parent]
+            wanted = desired[level.name]
+
+            # 现状：属于本课程的节点 + 文件中出现的编号（可能挂在其他课程下，导入即移动）
+            current_rows = (await self.db.execute(
+                select(table.c.id, code_col, parent_col, *[table.c[f] for f in level.fields])
+                .where(parent_col.in_(owned_parent_ids) | code_col.in_(list(wanted)))
+            )).mappings().all()
+            current = {row[level.code]: row for row in current_rows}
+
+            upserts = []
+            for code, row in wanted.items():
+                parent_id = curriculum_id if level.parent == 'curriculum_id' else parent_ids[row['parent']]
+                values = {level.code: code, level.parent: parent_id, **{f: row[f] for f in level.fields}}
+                old = current.get(code)
+                if old is None:
+                    report.created.setdefault(level.name, []).append(code)
+                elif any(old[key] != value for key, value in values.items()):
+                    report.updated.setdefault(level.name, []).append(code)
+                else:
+                    continue
+                upserts.append(values)
+
+            if upserts and write:
+                await self.db.execute(self._upsert(level), upserts)
+
+            stale = [row for code, row in current.items() if code not in wanted]
+            if stale:
+                report.deleted[level.name] = [row[level.code] for row in stale]
+                deletions.append((level, [row['id'] for row in stale], report.deleted[level.name]))
+
+            if write:
+                ids = dict((await self.db.execute(
+                    select(code_col, table.c.id).where(code_col.in_(list(wanted)))
+                )).all()) if wanted else {}
+            else:
+                ids = {code: current[code]['id'] if code in current else None for code in wanted}
+            parent_ids = ids
+            # 待删除节点的子节点也属于本课程（未在文件中出现时一并删除）
+            owned_parent_ids = [i for i in ids.values() if i is not None] + [row['id'] for row in stale]
+            changed_codes = set(report.created.get(level.name, [])) | set(report.updated.get(level.name, []))
+            affected_ids[level.name] = [ids[code] for code in changed_codes]
+
+        if not write:
+            return
+
+        # 自下而上删除（子节点已先行 upsert 到新的父节点）
+        for level, ids, _ in reversed(deletions):
+            await self.db.execute(delete(level.table).where(level.table.c.id.in_(ids)))
+
+        if report.changed:
+            stale_kp_codes = report.deleted.get(KNOWLEDGE_POINTS, [])
+            connection = await self.db.connection()
+            await connection.run_sync(
+                refresh_paths,
+                affected_ids[MODULES],
+                affected_ids[TOPICS],
+                affected_ids[KNOWLEDGE_POINTS],
+                (),
+                stale_kp_codes
+            )
+
+    def _upsert(self, level: _Level):
+        """按编号冲突更新的 insert 语句（SQLite / PostgreSQL）"""
+        if self.db.bind.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(level.table)
+        columns = (level.parent, *level.fields)
+        return stmt.on_conflict_do_update(
+            index_elements=[level.table.c[level.code]],
+            set_={name: stmt.excluded[name] for name in columns}
+        )
+
+    async def _refresh_caches(self) -> None:
+        """Core 写入不触发 ORM 钩子：手动使快照失效并重建进程内索引"""
+        from app.services.knowledge_service import KnowledgeService
+
+        await KnowledgeService(self.db).refresh_caches()
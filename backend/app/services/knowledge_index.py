@@ -0,0 +1,297 @@
+"""
+知识点自动补全索引（进程内存）
+
+启动时从 modules / topics / knowledge_points 构建，查询不访问数据库。支持：
+- 前缀: 名称、别名、编号（kp_id / topic_id / module_id）
+- 子串: 名称和别名的字符二元组倒排，任意位置的片段都能命中
+- 拼音: 全拼前缀和首字母前缀（如 "ldfdf" -> 零点分段法），需要安装 pypinyin
+
+知识体系通过 ORM 修改时，flush 时记录变更，提交后增量更新索引（回滚则丢弃）。
+"""
+import bisect
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.logger import logger
+from app.models.knowledge import KnowledgePoint, Module, Topic
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # pragma: no cover - 未安装时不支持拼音匹配
+    lazy_pinyin = None
+
+MODULE = 'module'
+TOPIC = 'topic'
+KNOWLEDGE_POINT = 'knowledge_point'
+
+# 同分时的类型顺序：知识点优先
+KIND_ORDER = {KNOWLEDGE_POINT: 0, TOPIC: 1, MODULE: 2}
+
+# 匹配方式 -> 基础分
+MATCH_SCORES = {
+    'name': 90,
+    'code': 85,
+    'alias': 80,
+    'pinyin_initials': 75,
+    'pinyin': 70,
+    'substring': 50,
+}
+
+# 单个前缀最多扫描的候选数（单字母前缀可能覆盖大量条目）
+MAX_PREFIX_SCAN = 200
+
+EntryKey = Tuple[str, int]
+
+
+@dataclass(frozen=True)
+class KnowledgeEntry:
+    """索引条目（模块 / 专题 / 知识点）"""
+    kind: str
+    id: int
+    code: str
+    name: str
+    aliases: Tuple[str, ...] = ()
+    parent_id: Optional[int] = None  # 专题所属模块 / 知识点所属专题
+
+    @property
+    def key(self) -> EntryKey:
+        return (self.kind, self.id)
+
+
+def entry_from_model(obj) -> Optional[KnowledgeEntry]:
+    """ORM 对象 -> 索引条目（非知识体系对象返回 None）"""
+    if isinstance(obj, KnowledgePoint):
+        return KnowledgeEntry(KNOWLEDGE_POINT, obj.id, obj.kp_id, obj.kp_name, (), obj.topic_id)
+    if isinstance(obj, Topic):
+        return KnowledgeEntry(TOPIC, obj.id, obj.topic_id, obj.topic_name, tuple(filter(None, [obj.alias])), obj.module_id)
+    if isinstance(obj, Module):
+        return KnowledgeEntry(MODULE, obj.id, obj.module_id, obj.module_name, tuple(filter(None, [obj.module_tag])))
+    return None
+
+
+def _pinyin_keys(text: str) -> Tuple[str, str]:
+    """(全拼, 首字母)，未安装 pypinyin 时为空串"""
+    if lazy_pinyin is None:
+        return '', ''
+    syllables = [s.lower() for s in lazy_pinyin(text) if s.strip()]
+    return ''.join(syllables), ''.join(s[0] for s in syllables)
+
+
+def _grams(text: str) -> Set[str]:
+    """单字和相邻二字片段"""
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _normalize(text: str) -> str:
+    return ''.join(text.lower().split())
+
+
+class KnowledgeAutocompleteIndex:
+    """知识点自动补全索引"""
+
+    def __init__(self):
+        self._entries: Dict[EntryKey, KnowledgeEntry] = {}
+        # 有序的 (检索词, 条目, 匹配方式)，用二分查找定位前缀区间
+        self._prefix_terms: List[Tuple[str, EntryKey, str]] = []
+        self._grams: Dict[str, Set[EntryKey]] = {}
+        self._indexed_terms: Dict[EntryKey, List[Tuple[str, EntryKey, str]]] = {}
+        self.built = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ============ 构建与增量更新 ============
+
+    def rebuild(self, entries: Iterable[KnowledgeEntry]) -> None:
+        """全量重建"""
+        start = time.perf_counter()
+        self._entries.clear()
+        self._grams.clear()
+        self._indexed_terms.clear()
+
+        terms = []
+        for entry in entries:
+            terms.extend(self._add(entry))
+        self._prefix_terms = sorted(terms)
+        self.built = True
+
+        logger.info(
+            f"知识点补全索引已构建: {len(self._entries)} 个条目, {len(self._prefix_terms)} 个检索词, "
+            f"耗时 {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+
+    def upsert(self, entry: KnowledgeEntry) -> None:
+        """新增或更新一个条目"""
+        self.remove(entry.kind, entry.id)
+        for term in self._add(entry):
+            bisect.insort(self._prefix_terms, term)
+
+    def remove(self, kind: str, entry_id: int) -> None:
+        """删除一个条目"""
+        key = (kind, entry_id)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for term in self._indexed_terms.pop(key, []):
+            index = bisect.bisect_left(self._prefix_terms, term)
+            if index < len(self._prefix_terms) and self._prefix_terms[index] == term:
+                del self._prefix_terms[index]
+
+        for text in (entry.name, *entry.aliases):
+            for gram in _grams(_normalize(text)):
+                postings = self._grams.get(gram)
+                if postings is not None:
+                    postings.discard(key)
+                    if not postings:
+                        del self._grams[gram]
+
+    def _add(self, entry: KnowledgeEntry) -> List[Tuple[str, EntryKey, str]]:
+        """登记条目，返回需要加入前缀表的检索词"""
+        key = entry.key
+        self._entries[key] = entry
+
+        terms = {(_normalize(entry.code), key, 'code'), (_normalize(entry.name), key, 'name')}
+        terms.update((_normalize(alias), key, 'alias') for alias in entry.aliases)
+
+        full, initials = _pinyin_keys(entry.name)
+        if full:
+            terms.add((full, key, 'pinyin'))
+            terms.add((initials, key, 'pinyin_initials'))
+
+        for text in (entry.name, *entry.aliases):
+            for gram in _grams(_normalize(text)):
+                self._grams.setdefault(gram, set()).add(key)
+
+        terms = sorted(t for t in terms if t[0])
+        self._indexed_terms[key] = terms
+        return terms
+
+    # ============ 查询 ============
+
+    def search(self, query: str, limit: int = 10, kinds: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        自动补全查询
+
+        Args:
+            query: 输入（汉字、拼音、拼音首字母或编号）
+            limit: 返回数量
+            kinds: 限定条目类型（module / topic / knowledge_point）
+
+        Returns:
+            [{kind, id, code, name, path, matched_by}]，按匹配质量排序
+        """
+        q = _normalize(query)
+        if not q:
+            return []
+        allowed = set(kinds) if kinds else None
+
+        best: Dict[EntryKey, Tuple[int, str]] = {}
+
+        def consider(key: EntryKey, score: int, matched_by: str) -> None:
+            if allowed is not None and key[0] not in allowed:
+                return
+            if key not in best or score > best[key][0]:
+                best[key] = (score, matched_by)
+
+        # 前缀
+        index = bisect.bisect_left(self._prefix_terms, (q,))
+        for term, key, matched_by in self._prefix_terms[index:index + MAX_PREFIX_SCAN]:
+            if not term.startswith(q):
+                break
+            consider(key, MATCH_SCORES[matched_by] + (10 if term == q else 0), matched_by)
+
+        # 子串：倒排求交后核对
+        grams = [q[i:i + 2] for i in range(len(q) - 1)] or [q]
+        postings = [self._grams.get(g) for g in grams]
+        if all(postings):
+            for key in set.intersection(*postings):
+                entry = self._entries[key]
+                if any(q in _normalize(text) for text in (entry.name, *entry.aliases)):
+                    consider(key, MATCH_SCORES['substring'], 'substring')
+
+        ranked = sorted(
+            best.items(),
+            key=lambda item: (-item[1][0], KIND_ORDER[item[0][0]], len(self._entries[item[0]].name), self._entries[item[0]].code)
+        )
+        return [self._result(self._entries[key], matched_by) for key, (_, matched_by) in ranked[:limit]]
+
+    def _result(self, entry: KnowledgeEntry, matched_by: str) -> Dict:
+        return {
+            'kind': entry.kind,
+            'id': entry.id,
+            'code': entry.code,
+            'name': entry.name,
+            'path': self._path(entry),
+            'matched_by': matched_by,
+        }
+
+    def _path(self, entry: KnowledgeEntry) -> List[str]:
+        """所属模块、专题名称（从上到下）"""
+        path = []
+        parent_kind = {KNOWLEDGE_POINT: TOPIC, TOPIC: MODULE}.get(entry.kind)
+        parent = self._entries.get((parent_kind, entry.parent_id)) if parent_kind else None
+        while parent is not None:
+            path.insert(0, parent.name)
+            parent_kind = {TOPIC: MODULE}.get(parent.kind)
+            parent = self._entries.get((parent_kind, parent.parent_id)) if parent_kind else None
+        return path
+
+    # ============ 事务变更 ============
+
+    def apply_changes(self, changes: List[Tuple[str, KnowledgeEntry]]) -> None:
+        """按顺序应用已提交的变更"""
+        for action, entry in changes:
+            if action == 'remove':
+                self.remove(entry.kind, entry.id)
+            else:
+                self.upsert(entry)
+        logger.debug(f"知识点补全索引增量更新: {len(changes)} 个条目")
+
+
+_PENDING_KEY = 'knowledge_index_changes'
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_knowledge_changes(session: Session, flush_context) -> None:
+    """记录本次 flush 中知识体系的变更（提交后才应用到索引）"""
+    changes = []
+    for obj in list(session.new) + list(session.dirty):
+        if obj in session.deleted:
+            continue
+        entry = entry_from_model(obj)
+        if entry is not None:
+            changes.append(('upsert', entry))
+    for obj in session.deleted:
+        entry = entry_from_model(obj)
+        if entry is not None:
+            changes.append(('remove', entry))
+    if changes:
+        session.info.setdefault(_PENDING_KEY, []).extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_knowledge_changes(session: Session) -> None:
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes and _index is not None and _index.built:
+        _index.apply_changes(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_knowledge_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+_index: Optional[KnowledgeAutocompleteIndex] = None
+
+
+def get_knowledge_index() -> KnowledgeAutocompleteIndex:
+    """获取进程内共享的知识点补全索引"""
+    global _index
+    if _index is None:
+        _index = KnowledgeAutocompleteIndex()
+    return _index
@@ -3,15 +3,33 @@
 
 使用 Repository 模式进行数据访问
 """
-from typing import List
+from typing import List, Optional, Dict, Any
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repositories.knowledge_repository import KnowledgeRepository
 from app.models.knowledge import Curriculum, Module, Topic, KnowledgePoint
+from app.services.knowledge_index import get_knowledge_index, entry_from_model
+from app.services.knowledge_hierarchy import KnowledgeHierarchy, get_knowledge_hierarchy
+from app.services.knowledge_importer import KnowledgeImporter
+from app.services.knowledge_snapshot import Snapshot, get_knowledge_snapshot_cache
+from app.services.knowledge_version_watcher import get_knowledge_version_watcher
+from app.schemas.knowledge import CurriculumSchema, ModuleSchema, TopicSchema
 from app.core.exceptions import NotFoundException
+from app.core.config import get_settings
 from app.core.logger import logger
 
 
+settings = get_settings()
+
+_CURRICULUM_LIST = TypeAdapter(List[CurriculumSchema])
+
+
+def _dump(schema, obj) -> bytes:
+    """ORM 对象 -> JSON 字节（与 response_model 序列化结果一致）"""
+    return schema.model_validate(obj).model_dump_json().encode('utf-8')
+
+
 class KnowledgeService:
     """知识体系业务逻辑服务"""
 
@@ -109,3 +127,167 @@ class KnowledgeService:
 
         return kp
 
+    async def build_search_index(self) -> int:
+        """
+        从数据库全量构建知识点补全索引
+
+        Returns:
+            索引条目数
+        """
+        nodes = await self.knowledge_repo.get_all_tree_nodes()
+        index = get_knowledge_index()
+        index.rebuild(entry_from_model(node) for node in nodes)
+        return len(index)
+
+    async def search_knowledge(
+        self,
+        query: str,
+        limit: int = 10,
+        kind: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        知识点自动补全（内存索引，未构建时先构建）
+
+        Args:
+            query: 输入（汉字、拼音、拼音首字母或编号）
+            limit: 返回数量
+            kind: 限定类型 module / topic / knowledge_point
+
+        Returns:
+            匹配条目列表
+        """
+        await self.sync_caches()
+        index = get_knowledge_index()
+        if not index.built:
+            await self.build_search_index()
+        return index.search(query, limit, [kind] if kind else None)
+
+    # ============ 层级映射 ============
+
+    async def build_hierarchy(self) -> int:
+        """
+        从数据库全量构建知识体系层级映射
+
+        Returns:
+            节点数
+        """
+        hierarchy = get_knowledge_hierarchy()
+        hierarchy.rebuild(await self.knowledge_repo.get_hierarchy_paths())
+        return len(hierarchy)
+
+    async def get_hierarchy(self) -> KnowledgeHierarchy:
+        """获取层级映射（未构建时先构建）"""
+        await self.sync_caches()
+        hierarchy = get_knowledge_hierarchy()
+        if not hierarchy.built:
+            await self.build_hierarchy()
+        return hierarchy
+
+    async def get_node(self, code: str) -> Dict[str, Any]:
+        """
+        按编号获取节点在知识体系中的位置
+
+        Args:
+            code: 课程（C1）、模块、专题或知识点编号
+
+        Returns:
+            {code, kind, path, ancestors, descendant_kps}
+        """
+        hierarchy = await self.get_hierarchy()
+        path = hierarchy.path_of(code)
+        if path is None:
+            raise NotFoundException("知识体系节点", code)
+
+        return {
+            "code": code,
+            "kind": hierarchy.kind_of(code),
+            "path": path,
+            "ancestors": hierarchy.ancestors(code),
+            "descendant_kps": sorted(hierarchy.descendant_kps(code)),
+        }
+
+    # ============ 缓存刷新 ============
+
+    async def refresh_caches(self) -> None:
+        """使快照缓存失效，并重建本进程已构建的补全索引和层级映射"""
+        get_knowledge_snapshot_cache().invalidate()
+        if get_knowledge_index().built:
+            await self.build_search_index()
+        if get_knowledge_hierarchy().built:
+            await self.build_hierarchy()
+
+    async def sync_caches(self) -> None:
+        """其他进程修改过知识体系时（共享版本号变化）刷新本进程缓存"""
+        if await get_knowledge_version_watcher().changed(self.db):
+            await self.refresh_caches()
+
+    # ============ 批量导入 ============
+
+    async def import_knowledge_base(self, path: Optional[str] = None, dry_run: bool = False) -> List[Dict[str, Any]]:
+        """
+        导入课程文件（默认 settings.knowledge_base_dir），在本进程内刷新缓存和索引
+
+        Args:
+            path: 目录或单个 JSON 文件
+            dry_run: 只比对不写入
+
+        Returns:
+            各课程的导入报告
+        """
+        reports = await KnowledgeImporter(self.db).import_path(path or settings.knowledge_base_dir, dry_run)
+        return [report.to_dict() for report in reports]
+
+    # ============ 快照缓存 ============
+
+    async def get_curriculums_snapshot(self) -> Snapshot:
+        """课程列表（完整课程树）快照"""
+        async def load() -> bytes:
+            curriculums = await self.get_all_curriculums()
+            return _CURRICULUM_LIST.dump_json(_CURRICULUM_LIST.validate_python(curriculums, from_attributes=True))
+        return await self._snapshot("curriculums", load)
+
+    async def get_curriculum_snapshot(self, curriculum_id: int) -> Snapshot:
+        """单个课程快照（课程不存在时抛出 NotFoundException）"""
+        async def load() -> bytes:
+            return _dump(CurriculumSchema, await self.get_curriculum_by_id(curriculum_id))
+        return await self._snapshot(f"curriculum:{curriculum_id}", load)
+
+    async def get_module_snapshot(self, module_id: int) -> Snapshot:
+        """单个模块快照（模块不存在时抛出 NotFoundException）"""
+        async def load() -> bytes:
+            return _dump(ModuleSchema, await self.get_module_by_id(module_id))
+        return await self._snapshot(f"module:{module_id}", load)
+
+    async def get_topic_snapshot(self, topic_id: int) -> Snapshot:
+        """单个专题快照（专题不存在时抛出 NotFoundException）"""
+        async def load() -> bytes:
+            return _dump(TopicSchema, await self.get_topic_by_id(topic_id))
+        return await self._snapshot(f"topic:{topic_id}", load)
+
+    async def _snapshot(self, key: str, load) -> Snapshot:
+        await self.sync_caches()
+        return await get_knowledge_snapshot_cache().get(key, load)
+
+    async def warm_snapshots(self) -> int:
+        """
+        预热快照缓存：加载一次完整课程树，生成列表及各课程、模块、专题的快照
+
+        Returns:
+            快照数量
+        """
+        cache = get_knowledge_snapshot_cache()
+        version = cache.version
+        curriculums = await self.knowledge_repo.get_all_curriculums()
+
+        cache.put("curriculums", _CURRICULUM_LIST.dump_json(
+            _CURRICULUM_LIST.validate_python(curriculums, from_attributes=True)
+        ), version)
+        for curriculum in curriculums:
+            cache.put(f"curriculum:{curriculum.id}", _dump(CurriculumSchema, curriculum), version)
+            for module in curriculum.modules:
+                cache.put(f"module:{module.id}", _dump(ModuleSchema, module), version)
+                for topic in module.topics:
+                    cache.put(f"topic:{topic.id}", _dump(TopicSchema, topic), version)
+
+        logger.info(f"知识体系快照已预热: {len(cache)} 个")
+        return len(cache)
@@ -0,0 +1,171 @@
+"""
+知识体系快照缓存（进程内存）
+
+知识体系一个学期才变动几次，而课程树接口每次都要执行多层 selectinload、
+构造 ORM 对象、再经嵌套 Schema 校验和序列化。这里把每个课程 / 模块 / 专题
+序列化后的 JSON 字节连同 gzip（及可选的 brotli）压缩版本缓存起来直接返回，
+并以内容哈希作为 ETag 支持 304。
+
+- 启动时预热：一次加载整棵课程树，生成列表、各课程、各模块、各专题的快照
+- 失效：ORM 写入知识体系表并提交后整体失效（版本号 +1）；
+  绕过 ORM 的批量写入需调用 invalidate()；其他进程的修改通过共享版本号发现
+  （见 app.services.knowledge_version_watcher）
+- 未命中时按 key 加锁加载，避免并发请求重复查询
+"""
+import asyncio
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.logger import logger
+from app.models.knowledge import KNOWLEDGE_MODELS
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 未安装时只提供 gzip
+    brotli = None
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """一份序列化后的响应"""
+    body: bytes
+    etag: str
+    version: int
+    gzip: bytes
+    br: Optional[bytes] = None
+
+    @classmethod
+    def build(cls, body: bytes, version: int) -> "Snapshot":
+        return cls(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            version=version,
+            gzip=gzip.compress(body, compresslevel=9, mtime=0),
+            br=brotli.compress(body, quality=11) if brotli is not None else None
+        )
+
+    def encode_for(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """
+        按 Accept-Encoding 选择预压缩版本（优先 br，其次 gzip）
+
+        Returns:
+            (响应体, Content-Encoding)
+        """
+        accepted = set()
+        for part in (accept_encoding or '').lower().split(','):
+            coding, _, params = part.partition(';')
+            params = params.replace(' ', '')
+            try:
+                quality = float(params[2:]) if params.startswith('q=') else 1.0
+            except ValueError:
+                quality = 0.0
+            if quality > 0:
+                accepted.add(coding.strip())
+
+        if self.br is not None and 'br' in accepted:
+            return self.br, 'br'
+        if 'gzip' in accepted and len(self.gzip) < len(self.body):
+            return self.gzip, 'gzip'
+        return self.body, None
+
+
+class KnowledgeSnapshotCache:
+    """知识体系快照缓存（进程级单例）"""
+
+    def __init__(self):
+        self.version = 0
+        self._entries: Dict[str, Snapshot] = {}
+        # key -> (加载锁, 等待者数)
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, key: str) -> Optional[Snapshot]:
+        return self._entries.get(key)
+
+    def put(self, key: str, body: bytes, version: Optional[int] = None) -> Snapshot:
+        """
+        写入快照
+
+        Args:
+            key: 缓存键
+            body: JSON 字节
+            version: 开始加载时的版本号；加载期间发生失效则丢弃（避免写入旧数据）
+        """
+        snapshot = Snapshot.build(body, self.version)
+        if version is not None and version != self.version:
+            return snapshot
+        self._entries[key] = snapshot
+        return snapshot
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[bytes]]) -> Snapshot:
+        """
+        读取快照，未命中时调用 loader 加载（同一 key 只加载一次）
+
+        loader 抛出的异常（如 NotFoundException）原样抛出，不缓存
+        """
+        snapshot = self._entries.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        # 锁按等待者计数，最后一个离开时删除，请求不存在的 id 不会留下锁
+        lock, waiters = self._locks.get(key) or (asyncio.Lock(), 0)
+        self._locks[key] = (lock, waiters + 1)
+        try:
+            async with lock:
+                snapshot = self._entries.get(key)
+                if snapshot is None:
+                    version = self.version
+                    snapshot = self.put(key, await loader(), version)
+        finally:
+            lock, waiters = self._locks[key]
+            if waiters == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, waiters - 1)
+        return snapshot
+
+    def invalidate(self) -> None:
+        """整体失效（版本号 +1）"""
+        self.version += 1
+        self._entries.clear()
+        logger.info(f"知识体系快照缓存已失效: version={self.version}")
+
+
+_PENDING_KEY = 'knowledge_snapshot_dirty'
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_knowledge_written(session: Session, flush_context) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, KNOWLEDGE_MODELS):
+            session.info[_PENDING_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False) and _cache is not None:
+        _cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+_cache: Optional[KnowledgeSnapshotCache] = None
+
+
+def get_knowledge_snapshot_cache() -> KnowledgeSnapshotCache:
+    """获取进程内共享的知识体系快照缓存"""
+    global _cache
+    if _cache is None:
+        _cache = KnowledgeSnapshotCache()
+    return _cache
@@ -0,0 +1,58 @@
+"""
+知识体系跨进程失效检查
+
+多个 worker 进程或多台主机共用一个数据库时，某个进程修改知识体系后，
+其他进程的快照缓存、补全索引和层级映射仍是旧数据。
+读取这些缓存前按 knowledge_version_check_interval 检查共享版本号
+（见 app.models.knowledge_version），变化时由 KnowledgeService.sync_caches 重建。
+"""
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.logger import logger
+from app.models.knowledge_version import read_knowledge_version
+
+settings = get_settings()
+
+
+class KnowledgeVersionWatcher:
+    """共享版本号检查（进程级单例）"""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._checked_at = 0.0
+
+    async def changed(self, db: AsyncSession) -> bool:
+        """
+        距上次检查超过间隔时读取版本号
+
+        首次检查只记录版本号；并发请求在间隔内只有一个会查询数据库
+
+        Returns:
+            版本号是否与上次记录的不同（其他进程修改过知识体系）
+        """
+        now = time.monotonic()
+        if self.version is not None and now - self._checked_at < settings.knowledge_version_check_interval:
+            return False
+        self._checked_at = now
+
+        current = await read_knowledge_version(db)
+        changed = self.version is not None and current != self.version
+        if changed:
+            logger.info(f"知识体系版本变化: {self.version} -> {current}，刷新本进程缓存")
+        self.version = current
+        return changed
+
+
+_watcher: Optional[KnowledgeVersionWatcher] = None
+
+
+def get_knowledge_version_watcher() -> KnowledgeVersionWatcher:
+    """获取进程内共享的版本检查器"""
+    global _watcher
+    if _watcher is None:
+        _watcher = KnowledgeVersionWatcher()
+    return _watcher
@@ -0,0 +1,118 @@
+"""
+OCR 结果缓存
+
+以「图片 SHA-256 + OCR 参数集指纹」为键：
+- 第一级：进程内 LRU（键 -> ocr_record_id）
+- 第二级：ocr_records 表（content_hash + ocr_params 索引）
+
+重复上传同一张图片时直接复用已有的识别记录，不再调用百度 OCR。
+"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.logger import logger
+from app.models.problem import OCRRecord
+from app.repositories.ocr_repository import OCRRecordRepository
+from app.utils.lru_cache import TTLLRUCache
+
+settings = get_settings()
+
+
+def compute_content_hash(image_bytes: bytes) -> str:
+    """计算图片内容的 SHA-256"""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class OCRResultCache:
+    """OCR 结果缓存（进程级单例）"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.enabled = settings.ocr_cache_enabled if enabled is None else enabled
+        self.ttl = settings.ocr_cache_ttl if ttl is None else ttl
+        self._lru = TTLLRUCache(
+            max_size=max_entries or settings.ocr_cache_max_entries,
+            ttl=self.ttl or None
+        )
+        self.hits = 0
+        self.misses = 0
+
+    async def lookup(
+        self,
+        db: AsyncSession,
+        content_hash: str,
+        ocr_params: str
+    ) -> Optional[OCRRecord]:
+        """
+        查找缓存的识别记录
+
+        Args:
+            db: 数据库会话
+            content_hash: 图片 SHA-256
+            ocr_params: OCR 参数集指纹
+
+        Returns:
+            命中的 OCRRecord，未命中返回 None
+        """
+        if not self.enabled:
+            return None
+
+        key = (content_hash, ocr_params)
+        repo = OCRRecordRepository(db)
+        record = None
+
+        record_id = self._lru.get(key)
+        if record_id is not None:
+            record = await repo.get_by_id(record_id)
+            # 记录已删除或内容不符（例如切换了数据库）时作废
+            if record is None or record.content_hash != content_hash or record.status != 'success':
+                self._lru.pop(key)
+                record = None
+
+        if record is None:
+            created_after = datetime.utcnow() - timedelta(seconds=self.ttl) if self.ttl else None
+            record = await repo.get_by_content_hash(content_hash, ocr_params, created_after)
+            if record is not None:
+                self._lru.set(key, record.id)
+
+        if record is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        logger.info(f"OCR 缓存命中: hash={content_hash[:12]}, ocr_record_id={record.id}")
+        return record
+
+    def store(self, content_hash: str, ocr_params: str, ocr_record_id: int) -> None:
+        """登记新的识别记录"""
+        if self.enabled:
+            self._lru.set((content_hash, ocr_params), ocr_record_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计（命中率）"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._lru),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+_ocr_cache: Optional[OCRResultCache] = None
+
+
+def get_ocr_cache() -> OCRResultCache:
+    """获取进程内共享的 OCR 结果缓存"""
+    global _ocr_cache
+    if _ocr_cache is None:
+        _ocr_cache = OCRResultCache()
+    return _ocr_cache
@@ -2,15 +2,46 @@
 OCR 服务层 - 业务逻辑
 """
 import os
-import uuid
 import json
-from datetime import datetime
-from typing import Dict, Any, Optional
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, AsyncIterator, Awaitable, Callable, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.utils.baidu_ocr import BaiduOCRClient
+from app.utils.baidu_ocr import OCR_OPTIONS, BaiduOCRError, get_async_ocr_client, ocr_params_fingerprint
+from app.utils.circuit_breaker import CircuitOpenError, OPEN
+from app.utils.rate_limiter import backoff_delay
 from app.models.problem import Problem, OCRRecord
-from app.schemas.problem import OCRResponseSchema
+from app.repositories.ocr_repository import OCRRecordRepository
+from app.repositories.ocr_job_repository import OCRJobRepository
+from app.models.ocr_job import OCRJob
+from app.schemas.problem import (
+    OCRResponseSchema, BatchOCRItemSchema, BatchOCRResponseSchema,
+    PaperOCRResponseSchema, PaperQuestionSchema
+)
+from app.services.ocr_cache import get_ocr_cache, compute_content_hash
+from app.utils.batch_upload import BatchEntry
+from app.utils.image_validation import validate_image_bytes
+from app.utils.upload_spool import SpooledImage, allocate_image_path, new_spool_path
+from app.utils.image_preprocess import get_image_preprocessor
+from app.services.id_allocator import get_problem_id_allocator
+from app.repositories.group_commit import get_group_commit_writer
+from app.core.logger import logger
+
+
+def resolve_image_path(file_path: str) -> str:
+    """
+    将数据库中保存的相对路径（uploads/ocr/...）转换为实际文件路径
+
+    图片实际保存在 settings.upload_path 下
+    """
+    from app.core.config import get_settings
+    settings = get_settings()
+
+    prefix = "uploads/"
+    if file_path and file_path.startswith(prefix):
+        return os.path.join(settings.upload_path, file_path[len(prefix):])
+    return file_path
 
 
 class OCRService:
@@ -18,12 +49,19 @@ class OCRService:
 
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.ocr_client = BaiduOCRClient()
+        # 共享的异步客户端（进程内复用连接池）
+        self.ocr_client = get_async_ocr_client()
+        self.cache = get_ocr_cache()
+        # 图片预处理（未启用时为 None）
+        self.preprocessor = get_image_preprocessor()
+        # AsyncSession 不支持并发使用，批量识别时串行化数据库操作
+        self._db_lock = asyncio.Lock()
 
     async def recognize_and_save(
         self,
         filename: str,
-        image_bytes: bytes
+        image_bytes: bytes,
+        file_path: Optional[str] = None
     ) -> OCRResponseSchema:
         """
         OCR 识别并直接保存到题库
@@ -31,58 +69,364 @@ class OCRService:
         Args:
             filename: 文件名
             image_bytes: 图片二进制数据
+            file_path: 图片已保存时的相对路径（异步任务），为空则保存图片
 
         Returns:
             OCRResponseSchema
         """
+        async def persist() -> str:
+            if file_path is not None:
+                return file_path
+            return await self._save_image(filename, image_bytes)
+
+        return await self._recognize_and_save(
+            filename,
+            compute_content_hash(image_bytes),
+            lambda: self._recognize_bytes(image_bytes),
+            persist,
+            owns_image=file_path is None
+        )
+
+    async def recognize_upload(self, upload: SpooledImage) -> OCRResponseSchema:
+        """
+        识别流式落盘的上传图片并保存到题库
+
+        哈希已在落盘时计算；缓存命中时不调用 OCR，也不保留图片。
+        未命中时临时文件先原子移动到正式目录，识别请求体再从该文件流式编码。
+        调用方负责在结束后调用 upload.discard() 清理未持久化的临时文件。
+
+        Args:
+            upload: spool_upload 返回的临时图片
+
+        Returns:
+            OCRResponseSchema
+        """
+        async def persist() -> str:
+            return upload.persist()
+
+        async def recognize() -> Dict[str, Any]:
+            # persist_first：保存完成后才执行，upload.path 已指向正式目录
+            return await self._recognize_path(upload.path)
+
+        return await self._recognize_and_save(
+            upload.filename,
+            upload.content_hash,
+            recognize,
+            persist,
+            persist_first=True
+        )
+
+    async def recognize_file(self, filename: str, file_path: str, content_hash: str) -> OCRResponseSchema:
+        """
+        识别已保存在上传目录中的图片（异步任务）
+
+        Args:
+            filename: 原始文件名
+            file_path: 图片相对路径（uploads/ocr/...）
+            content_hash: 图片 SHA-256
+
+        Returns:
+            OCRResponseSchema
+        """
+        async def persist() -> str:
+            return file_path
+
+        return await self._recognize_and_save(
+            filename,
+            content_hash,
+            lambda: self._recognize_path(resolve_image_path(file_path)),
+            persist,
+            owns_image=False
+        )
+
+    async def recognize_paper(self, upload: SpooledImage) -> PaperOCRResponseSchema:
+        """
+        整页试卷识别：一次 OCR 调用，每道题生成一条题目
+
+        所有题目关联同一条 OCR 记录并保留题目区域坐标，在同一个事务中批量写入。
+        缓存命中时从记录的原始 JSON 补齐缺少的题目，不再调用 OCR。
+        熔断时直接失败（整页题目数未知，无法暂存）。
+
+        Args:
+            upload: spool_upload 返回的临时图片
+
+        Returns:
+            PaperOCRResponseSchema
+        """
         try:
-            # 1. 调用百度 OCR 识别
-            ocr_result = self.ocr_client.recognize_paper_cut_edu(image_bytes)
+            ocr_params = self._ocr_params()
+            async with self._db_lock:
+                cached_record = await self.cache.lookup(self.db, upload.content_hash, ocr_params)
+                if cached_record is not None:
+                    raw_json = await OCRRecordRepository(self.db).get_raw_json(cached_record.id)
+                    questions = self.ocr_client._parse_ocr_response(json.loads(raw_json or '{}'))['questions']
+                    return await self._save_paper_problems(cached_record, questions, cache_hit=True)
+                await self._release_connection()
+
+            try:
+                ocr_result = await self._recognize_path(upload.path)
+            except CircuitOpenError as e:
+                return PaperOCRResponseSchema(success=False, error=str(e), error_code="ERR_OCR_UNAVAILABLE")
+
+            questions = ocr_result['questions']
+            file_path = upload.persist()
+
+            async with self._db_lock:
+                # 题目 ID 须在本会话写入前分配
+                problem_ids = await self._allocate_problem_ids(len(questions))
+                ocr_record = OCRRecord(
+                    filename=upload.filename,
+                    file_path=file_path,
+                    recognized_text='\n'.join(q['text'] for q in questions),
+                    confidence_score=self._paper_confidence(questions),
+                    words_count=sum(q['words_count'] for q in questions),
+                    raw_json=ocr_result.get('raw_json'),
+                    processing_time_ms=ocr_result['processing_time_ms'],
+                    status='success',
+                    content_hash=upload.content_hash,
+                    ocr_params=ocr_params,
+                    preprocess_stats=self._dump_preprocess_stats(ocr_result)
+                )
+                self.db.add(ocr_record)
+                await self.db.flush()
+
+                response = await self._save_paper_problems(ocr_record, questions, problem_ids=problem_ids)
+                self.cache.store(upload.content_hash, ocr_params, ocr_record.id)
+
+            logger.info(f"整页识别完成: {upload.filename}, 共 {response.total_questions} 道题")
+            return response
 
-            # 2. 质量评估
-            quality_assessment = self.ocr_client.assess_quality(ocr_result['confidence'])
+        except Exception as e:
+            async with self._db_lock:
+                await self.db.rollback()
+            logger.error(f"整页识别失败: {upload.filename}, 错误: {str(e)}")
+            return PaperOCRResponseSchema(success=False, error=str(e), error_code="ERR_OCR_FAILED")
+
+    async def _save_paper_problems(
+        self,
+        ocr_record: OCRRecord,
+        questions: List[Dict[str, Any]],
+        cache_hit: bool = False,
+        problem_ids: Optional[List[str]] = None
+    ) -> PaperOCRResponseSchema:
+        """
+        为整页的每道题创建题目（已存在的题目序号跳过），一次提交
 
-            # 3. 保存图片文件
-            file_path = await self._save_image(filename, image_bytes)
+        Args:
+            ocr_record: OCR 记录
+            questions: 逐题解析结果
+            cache_hit: 是否来自缓存命中
+            problem_ids: 预先分配的题目 ID（为空时在写入前分配）
+        """
+        existing = await OCRRecordRepository(self.db).get_problems(ocr_record.id)
+        # 单题模式创建的旧题目没有序号，视为第 0 题
+        by_index = {p.question_index or 0: p for p in existing}
+
+        missing = [q for q in questions if q['question_index'] not in by_index]
+        if problem_ids is None:
+            problem_ids = await self._allocate_problem_ids(len(missing))
+        new_problems = [
+            self._build_problem(problem_id, question, ocr_record.id)
+            for problem_id, question in zip(problem_ids, missing)
+        ]
+        self.db.add_all(new_problems)
+        await self.db.commit()
 
-            # 4. 生成题目 ID
-            problem_id = self._generate_problem_id()
+        for problem in new_problems:
+            by_index[problem.question_index] = problem
 
-            # 5. 先创建 OCR 记录 (确保获取 ID)
-            ocr_record = OCRRecord(
-                filename=filename,
-                file_path=file_path,
-                recognized_text=ocr_result['text'],
-                confidence_score=ocr_result['confidence'],
-                words_count=ocr_result['words_count'],
-                raw_json=ocr_result.get('raw_json'),
-                processing_time_ms=ocr_result['processing_time_ms'],
-                status='success'
-            )
-            self.db.add(ocr_record)
-            await self.db.flush()  # 获取 ocr_record.id
+        problems = []
+        for question in questions:
+            problem = by_index[question['question_index']]
+            problems.append(PaperQuestionSchema(
+                problem_id=problem.problem_id,
+                question_index=question['question_index'],
+                question_number=question.get('question_number'),
+                question_type=question.get('question_type'),
+                score=question.get('score'),
+                content=problem.content,
+                quality_grade=problem.quality_score,
+                qus_location=question.get('qus_location')
+            ))
+
+        return PaperOCRResponseSchema(
+            success=True,
+            ocr_record_id=ocr_record.id,
+            total_questions=len(problems),
+            problems=problems,
+            confidence_score=ocr_record.confidence_score,
+            processing_time_ms=ocr_record.processing_time_ms,
+            cache_hit=cache_hit
+        )
+
+    @staticmethod
+    def _paper_confidence(questions: List[Dict[str, Any]]) -> float:
+        """整页平均置信度"""
+        if not questions:
+            return 0.0
+        return round(sum(q['confidence'] for q in questions) / len(questions), 4)
+
+    def _ocr_params(self) -> str:
+        """当前 OCR 参数集指纹（启用预处理时包含预处理参数）"""
+        if self.preprocessor is None:
+            return ocr_params_fingerprint()
+        return ocr_params_fingerprint({**OCR_OPTIONS, **self.preprocessor.fingerprint})
+
+    async def _recognize_bytes(self, image_bytes: bytes) -> Dict[str, Any]:
+        """预处理（如启用）后识别内存中的图片"""
+        stats = None
+        if self.preprocessor is not None:
+            image_bytes, stats = await self.preprocessor.process_bytes(image_bytes)
+
+        result = await self.ocr_client.recognize_paper_cut_edu(image_bytes)
+        result['preprocess'] = stats
+        return result
+
+    async def _recognize_path(self, image_path: str) -> Dict[str, Any]:
+        """
+        预处理（如启用）后识别磁盘上的图片
 
-            # 6. 创建题目记录,直接关联 ocr_record_id
-            problem = Problem(
-                problem_id=problem_id,
-                content=ocr_result['text'],
-                question_type=ocr_result.get('question_type'),
-                source='OCR识别',
-                status='pending',
-                quality_score=quality_assessment['grade'],
-                question_number=ocr_result.get('question_number'),
-                score=ocr_result.get('score'),
-                parsed_data=json.dumps(ocr_result.get('parsed_data', {}), ensure_ascii=False),
-                ocr_record_id=ocr_record.id  # 直接设置外键
-            )
-            self.db.add(problem)
+        预处理结果写入临时文件，识别后删除；原图保持不变，供重新识别使用
+        """
+        if self.preprocessor is None:
+            result = await self.ocr_client.recognize_paper_cut_edu_file(image_path)
+            result['preprocess'] = None
+            return result
 
-            # 7. 提交事务
-            await self.db.commit()
-            await self.db.refresh(problem)
-            await self.db.refresh(ocr_record)
+        processed_path = new_spool_path(".jpg")
+        try:
+            stats = await self.preprocessor.process_file(image_path, processed_path)
+            result = await self.ocr_client.recognize_paper_cut_edu_file(processed_path)
+        finally:
+            if os.path.exists(processed_path):
+                os.remove(processed_path)
+
+        result['preprocess'] = stats
+        return result
+
+    def _build_problem(self, problem_id: str, question: Dict[str, Any], ocr_record_id: Optional[int]) -> Problem:
+        """
+        根据单道题目的解析结果构建 Problem
+
+        Args:
+            problem_id: 题目 ID
+            question: _parse_question 的解析结果
+            ocr_record_id: 关联的 OCR 记录 ID（为空时由调用方通过关系关联）
+        """
+        return Problem(
+            problem_id=problem_id,
+            content=question['text'],
+            question_type=question.get('question_type'),
+            source='OCR识别',
+            status='pending',
+            quality_score=self.ocr_client.assess_quality(question['confidence'])['grade'],
+            question_number=question.get('question_number'),
+            score=question.get('score'),
+            parsed_data=json.dumps(question.get('parsed_data', {}), ensure_ascii=False, separators=(',', ':')),
+            question_index=question.get('question_index', 0),
+            qus_location=self._dump_location(question),
+            ocr_record_id=ocr_record_id  # 直接设置外键
+        )
+
+    @staticmethod
+    def _dump_location(question: Dict[str, Any]) -> Optional[str]:
+        """序列化题目区域坐标"""
+        location = question.get('qus_location')
+        if location is None:
+            return None
+        return json.dumps(location, ensure_ascii=False)
+
+    @staticmethod
+    def _dump_preprocess_stats(ocr_result: Dict[str, Any]) -> Optional[str]:
+        """序列化预处理统计"""
+        stats = ocr_result.get('preprocess')
+        if stats is None:
+            return None
+        return json.dumps(stats, ensure_ascii=False)
+
+    async def _recognize_and_save(
+        self,
+        filename: str,
+        content_hash: str,
+        recognize: Callable[[], Awaitable[Dict[str, Any]]],
+        persist: Callable[[], Awaitable[str]],
+        owns_image: bool = True,
+        persist_first: bool = False
+    ) -> OCRResponseSchema:
+        """
+        识别并入库的公共流程（分阶段，远程调用期间不占用数据库连接）
+
+        1. 查询识别结果缓存（短读事务，未命中后立即结束事务归还连接）
+        2. 调用 OCR，同时保存图片（均不持有数据库连接）
+        3. 一个短写事务中插入 OCR 记录和题目
+
+        Args:
+            filename: 文件名
+            content_hash: 图片 SHA-256
+            recognize: 调用 OCR 的函数
+            persist: 保存图片并返回相对路径的函数（缓存命中时不调用）
+            owns_image: 图片是否由本流程保存；识别失败时删除本流程保存的图片
+            persist_first: 识别读取保存后的图片时为 True，保存完成后才开始识别（否则两者并行）
+
+        Returns:
+            OCRResponseSchema
+        """
+        file_path: Optional[str] = None
+        try:
+            # 1. 查询识别结果缓存（同一图片 + 同一参数集）
+            ocr_params = self._ocr_params()
+            async with self._db_lock:
+                cached_record = await self.cache.lookup(self.db, content_hash, ocr_params)
+                if cached_record is not None:
+                    return await self._build_cached_response(cached_record)
+                await self._release_connection()
+
+            # 2. 保存图片与 OCR 并行；识别依赖保存结果时先等保存完成（保存失败直接进入异常处理）
+            persist_task = asyncio.ensure_future(persist())
+            if persist_first:
+                await persist_task
+            recognize_task = asyncio.ensure_future(recognize())
+            try:
+                ocr_result = await recognize_task
+            except CircuitOpenError as e:
+                file_path = await persist_task
+                response = await self._handle_circuit_open(e, filename, file_path, content_hash, ocr_params)
+                if not response.success and owns_image:
+                    self._remove_image(file_path)
+                return response
+            except BaseException:
+                file_path = await self._settle_persist(persist_task)
+                raise
+            file_path = await persist_task
+
+            quality_assessment = self.ocr_client.assess_quality(ocr_result['confidence'])
+
+            # 3. 分配题目 ID（计数器使用独立连接），再在一个短事务中写入记录和题目
+            problem_id = (await self._allocate_problem_ids())[0]
+
+            async def write(session: AsyncSession) -> Tuple[Problem, OCRRecord]:
+                ocr_record = OCRRecord(
+                    filename=filename,
+                    file_path=file_path,
+                    recognized_text=ocr_result['text'],
+                    confidence_score=ocr_result['confidence'],
+                    words_count=ocr_result['words_count'],
+                    raw_json=ocr_result.get('raw_json'),
+                    processing_time_ms=ocr_result['processing_time_ms'],
+                    status='success',
+                    content_hash=content_hash,
+                    ocr_params=ocr_params,
+                    preprocess_stats=self._dump_preprocess_stats(ocr_result)
+                )
+                problem = self._build_problem(problem_id, ocr_result, None)
+                # 通过关系关联，一次 flush 按依赖顺序插入两行
+                problem.ocr_record = ocr_record
+                session.add(problem)
+                return problem, ocr_record
+
+            problem, ocr_record = await self._write(write)
+            self.cache.store(content_hash, ocr_params, ocr_record.id)
 
-            # 8. 返回结果
             return OCRResponseSchema(
                 success=True,
                 problem_id=problem.problem_id,
@@ -95,61 +439,407 @@ class OCRService:
             )
 
         except Exception as e:
-            await self.db.rollback()
-            import traceback
-            error_trace = traceback.format_exc()
-            print(f"ERROR in recognize_and_save: {error_trace}")
+            async with self._db_lock:
+                await self.db.rollback()
+            if owns_image and file_path is not None:
+                self._remove_image(file_path)
+            logger.exception(f"识别入库失败: {filename}, 错误: {str(e)}")
             return OCRResponseSchema(
                 success=False,
                 error=str(e),
-                error_code="ERR_OCR_FAILED"
+                error_code="ERR_OCR_FAILED",
+                retryable=not isinstance(e, BaiduOCRError) or e.retryable
             )
 
-    async def _save_image(self, filename: str, image_bytes: bytes) -> str:
+    async def _write(self, op: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
         """
-        保存图片到本地
+        执行写操作并提交
+
+        启用合并提交时交给进程内的写入任务与其他请求的写入一起提交，
+        否则在本会话中提交
+        """
+        from app.core.config import get_settings
+
+        if get_settings().group_commit_enabled:
+            return await get_group_commit_writer().submit(op)
+
+        async with self._db_lock:
+            result = await op(self.db)
+            await self.db.commit()
+        return result
+
+    async def _release_connection(self) -> None:
+        """结束当前事务，把连接归还连接池（远程调用前调用）"""
+        if self.db.in_transaction():
+            await self.db.commit()
+
+    @staticmethod
+    async def _settle_persist(persist_task: "asyncio.Future[str]") -> Optional[str]:
+        """识别失败时等待图片保存结束，返回已保存的路径（保存也失败时为 None）"""
+        try:
+            return await persist_task
+        except Exception:
+            return None
+
+    @staticmethod
+    def _remove_image(file_path: str) -> None:
+        """删除识别失败、未入库的图片"""
+        try:
+            os.remove(resolve_image_path(file_path))
+        except FileNotFoundError:
+            pass
+
+    async def recognize_batch(
+        self,
+        entries: AsyncIterator[BatchEntry],
+        concurrency: int = 4,
+        max_items: int = 200
+    ) -> BatchOCRResponseSchema:
+        """
+        批量 OCR 识别并保存到题库
+
+        条目按需读取：只有拿到并发名额后才读入下一张图片，
+        因此同时驻留内存的图片数不超过 concurrency。
 
         Args:
-            filename: 原始文件名
+            entries: (文件名, 读取函数) 异步迭代器
+            concurrency: 最大并发识别数
+            max_items: 单批最多处理的条目数
+
+        Returns:
+            BatchOCRResponseSchema
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        items: List[BatchOCRItemSchema] = []
+        tasks = []
+
+        async def process(item: BatchOCRItemSchema, image_bytes: bytes) -> None:
+            try:
+                result = await self.recognize_and_save(item.filename, image_bytes)
+            finally:
+                semaphore.release()
+
+            item.success = result.success
+            item.problem_id = result.problem_id
+            item.ocr_record_id = result.ocr_record_id
+            item.quality_grade = (result.quality_assessment or {}).get('grade')
+            item.cache_hit = result.cache_hit
+            item.error = result.error
+
+        async for filename, load in entries:
+            item = BatchOCRItemSchema(index=len(items), filename=filename, success=False)
+            items.append(item)
+
+            if item.index >= max_items:
+                item.error = f"超过单批上限 {max_items} 张"
+                continue
+
+            await semaphore.acquire()
+            try:
+                image_bytes = await load()
+                validate_image_bytes(image_bytes)
+            except Exception as e:
+                semaphore.release()
+                item.error = getattr(e, 'message', str(e))
+                continue
+
+            tasks.append(asyncio.create_task(process(item, image_bytes)))
+
+        await asyncio.gather(*tasks)
+        succeeded = sum(1 for item in items if item.success)
+        logger.info(f"批量识别: 共 {len(items)} 张, 成功 {succeeded} 张")
+
+        return BatchOCRResponseSchema(
+            total=len(items),
+            succeeded=succeeded,
+            failed=len(items) - succeeded,
+            items=items
+        )
+
+    async def _handle_circuit_open(
+        self,
+        error: CircuitOpenError,
+        filename: str,
+        file_path: str,
+        content_hash: str,
+        ocr_params: str
+    ) -> OCRResponseSchema:
+        """
+        OCR 熔断时的降级处理
+
+        - fail_fast: 直接返回失败
+        - park: 保留图片并创建 pending_ocr 题目，熔断恢复后由后台任务补识别
+        """
+        from app.core.config import get_settings
+        settings = get_settings()
+
+        if settings.ocr_degraded_mode != 'park':
+            return OCRResponseSchema(success=False, error=str(error), error_code="ERR_OCR_UNAVAILABLE")
+
+        async with self._db_lock:
+            problem_id = (await self._allocate_problem_ids())[0]
+            ocr_record = OCRRecord(
+                filename=filename,
+                file_path=file_path,
+                recognized_text='',
+                confidence_score=0.0,
+                status='pending',
+                error_message=str(error),
+                content_hash=content_hash,
+                ocr_params=ocr_params
+            )
+            self.db.add(ocr_record)
+            await self.db.flush()
+
+            problem = Problem(
+                problem_id=problem_id,
+                content='',
+                source='OCR识别',
+                status='pending_ocr',
+                ocr_record_id=ocr_record.id
+            )
+            self.db.add(problem)
+            await self.db.commit()
+
+        logger.warning(f"OCR 熔断中，题目已暂存待识别: {problem_id}")
+        return OCRResponseSchema(
+            success=True,
+            problem_id=problem_id,
+            content='',
+            ocr_record_id=ocr_record.id,
+            ocr_pending=True
+        )
+
+    async def drain_pending(self, limit: int = 20) -> int:
+        """
+        补识别熔断期间暂存的 pending_ocr 题目
+
+        每条记录先以条件更新领取（多进程不会重复识别），失败按指数退避推迟下次领取，
+        图片丢失或达到最大尝试次数时题目标记为 ocr_failed，不再阻塞后续题目。
+        熔断器再次打开时立即停止，剩余题目留待下次处理。
+
+        Args:
+            limit: 本次最多处理的题目数
+
+        Returns:
+            完成识别的题目数
+        """
+        from app.core.config import get_settings
+        settings = get_settings()
+
+        repo = OCRRecordRepository(self.db)
+        problems = await repo.get_due_pending_problems(limit)
+
+        drained = 0
+        for problem in problems:
+            if self.ocr_client.circuit_breaker.state == OPEN:
+                break
+
+            claimed = await repo.claim_pending(problem.ocr_record_id, settings.ocr_pending_lease_seconds)
+            await self.db.commit()
+            if not claimed:
+                continue
+            ocr_record = await repo.get_by_id(problem.ocr_record_id)
+            await self.db.refresh(ocr_record)
+
+            image_path = resolve_image_path(ocr_record.file_path)
+            if not os.path.isfile(image_path):
+                await self._fail_pending(problem, ocr_record, f"读取图片失败: {ocr_record.file_path}", permanent=True)
+                continue
+
+            # 识别期间不占用连接（已加载的对象在提交后仍可使用）
+            await self._release_connection()
+
+            try:
+                ocr_result = await self._recognize_path(image_path)
+            except CircuitOpenError:
+                await repo.release_pending(ocr_record.id)
+                await self.db.commit()
+                break
+            except Exception as e:
+                # 不可重试的 OCR 错误（如图片格式不支持）直接标记失败
+                permanent = isinstance(e, BaiduOCRError) and not e.retryable
+                await self._fail_pending(problem, ocr_record, str(e), permanent=permanent)
+                continue
+
+            quality_assessment = self.ocr_client.assess_quality(ocr_result['confidence'])
+
+            ocr_record.recognized_text = ocr_result['text']
+            ocr_record.confidence_score = ocr_result['confidence']
+            ocr_record.words_count = ocr_result['words_count']
+            ocr_record.raw_json = ocr_result.get('raw_json')
+            ocr_record.preprocess_stats = self._dump_preprocess_stats(ocr_result)
+            ocr_record.processing_time_ms = ocr_result['processing_time_ms']
+            ocr_record.status = 'success'
+            ocr_record.error_message = None
+            ocr_record.next_retry_at = None
+
+            problem.content = ocr_result['text']
+            problem.question_type = ocr_result.get('question_type')
+            problem.status = 'pending'
+            problem.quality_score = quality_assessment['grade']
+            problem.question_number = ocr_result.get('question_number')
+            problem.score = ocr_result.get('score')
+            problem.parsed_data = json.dumps(
+                ocr_result.get('parsed_data', {}), ensure_ascii=False, separators=(',', ':')
+            )
+            problem.question_index = ocr_result.get('question_index')
+            problem.qus_location = self._dump_location(ocr_result)
+
+            await self.db.commit()
+            self.cache.store(ocr_record.content_hash, ocr_record.ocr_params, ocr_record.id)
+            drained += 1
+
+        if drained:
+            logger.info(f"补识别完成: {drained} 道题目")
+        return drained
+
+    async def _fail_pending(self, problem: Problem, ocr_record: OCRRecord, error: str, permanent: bool) -> None:
+        """记录一次补识别失败：未达最大次数时退避后重试，否则题目标记为 ocr_failed"""
+        from app.core.config import get_settings
+        settings = get_settings()
+
+        ocr_record.error_message = error
+        if permanent or ocr_record.attempts >= settings.ocr_pending_max_attempts:
+            ocr_record.status = 'failed'
+            ocr_record.next_retry_at = None
+            problem.status = 'ocr_failed'
+            logger.error(f"补识别放弃: {problem.problem_id}, 第 {ocr_record.attempts} 次, 错误: {error}")
+        else:
+            delay = backoff_delay(
+                ocr_record.attempts, settings.ocr_pending_retry_base_delay, settings.ocr_pending_retry_max_delay
+            )
+            ocr_record.next_retry_at = datetime.utcnow() + timedelta(seconds=delay)
+            logger.warning(
+                f"补识别失败: {problem.problem_id}, 第 {ocr_record.attempts} 次, {delay:.0f}s 后重试, 错误: {error}"
+            )
+        await self.db.commit()
+
+    async def enqueue_job(self, filename: str, image_bytes: bytes) -> OCRJob:
+        """
+        持久化图片并创建异步识别任务
+
+        Args:
+            filename: 文件名
             image_bytes: 图片二进制数据
 
         Returns:
-            保存后的文件路径
+            排队中的 OCRJob
         """
+        file_path = await self._save_image(filename, image_bytes)
+        return await self._enqueue(filename, file_path, compute_content_hash(image_bytes))
+
+    async def enqueue_upload(self, upload: SpooledImage) -> OCRJob:
+        """
+        把流式落盘的上传图片移动到正式目录并创建异步识别任务
+
+        Args:
+            upload: spool_upload 返回的临时图片
+
+        Returns:
+            排队中的 OCRJob
+        """
+        return await self._enqueue(upload.filename, upload.persist(), upload.content_hash)
+
+    async def _enqueue(self, filename: str, file_path: str, content_hash: str) -> OCRJob:
+        """创建异步识别任务；入队失败时删除已保存的图片，避免留下无任务引用的文件"""
         from app.core.config import get_settings
         settings = get_settings()
 
-        # 创建目录结构: uploads/ocr/YYYY/MM/DD/
-        now = datetime.now()
-        date_dir = now.strftime("%Y/%m/%d")
-        save_dir = os.path.join(settings.upload_path, "ocr", date_dir)
+        try:
+            job = await OCRJobRepository(self.db).enqueue(
+                filename=filename,
+                file_path=file_path,
+                content_hash=content_hash,
+                max_attempts=settings.ocr_job_max_attempts
+            )
+            await self.db.commit()
+        except BaseException:
+            await self.db.rollback()
+            self._remove_image(file_path)
+            raise
 
-        os.makedirs(save_dir, exist_ok=True)
+        logger.info(f"OCR 任务已排队: job_id={job.job_id}, file={filename}")
+        return job
 
-        # 生成唯一文件名
-        ext = os.path.splitext(filename)[1]
-        unique_filename = f"{now.timestamp()}_{uuid.uuid4().hex[:8]}{ext}"
-        file_path = os.path.join(save_dir, unique_filename)
+    async def get_job(self, job_id: str) -> Optional[OCRJob]:
+        """
+        获取异步识别任务
 
-        # 保存文件
-        with open(file_path, 'wb') as f:
-            f.write(image_bytes)
+        Args:
+            job_id: 任务 ID
 
-        # 返回相对路径
-        return os.path.join("uploads", "ocr", date_dir, unique_filename).replace("\\", "/")
+        Returns:
+            OCRJob 对象
+        """
+        return await OCRJobRepository(self.db).get_by_job_id(job_id)
 
-    def _generate_problem_id(self) -> str:
+    async def _build_cached_response(self, ocr_record: OCRRecord) -> OCRResponseSchema:
         """
-        生成题目 ID
+        根据缓存命中的 OCR 记录构建响应
 
-        格式: P_MATH_YYYY_XXX
+        关联题目仍存在时直接返回；题目已被删除时，
+        用记录中的原始 JSON 重新解析出题目（不再调用百度 OCR）。
         """
-        from asyncio import run
-        import random
+        ocr_repo = OCRRecordRepository(self.db)
+        problem = await ocr_repo.get_first_problem(ocr_record.id)
+
+        if problem is None:
+            raw_json = await ocr_repo.get_raw_json(ocr_record.id)
+            parsed = self.ocr_client._parse_ocr_response(json.loads(raw_json or '{}'))
+            problem_id = (await self._allocate_problem_ids())[0]
+            problem = self._build_problem(problem_id, parsed, ocr_record.id)
+            self.db.add(problem)
+            await self.db.commit()
+            await self.db.refresh(problem)
 
-        year = datetime.now().year
-        random_num = random.randint(1, 999)
-        return f"P_MATH_{year}_{random_num:03d}"
+        return OCRResponseSchema(
+            success=True,
+            problem_id=problem.problem_id,
+            content=problem.content,
+            confidence_score=ocr_record.confidence_score,
+            processing_time_ms=ocr_record.processing_time_ms,
+            words_count=ocr_record.words_count,
+            quality_assessment=self.ocr_client.assess_quality(ocr_record.confidence_score),
+            ocr_record_id=ocr_record.id,
+            cache_hit=True
+        )
+
+    async def _save_image(self, filename: str, image_bytes: bytes) -> str:
+        """
+        保存图片到本地
+
+        Args:
+            filename: 原始文件名
+            image_bytes: 图片二进制数据
+
+        Returns:
+            保存后的文件路径
+        """
+        abs_path, file_path = allocate_image_path(filename)
+
+        def write() -> None:
+            with open(abs_path, 'wb') as f:
+                f.write(image_bytes)
+
+        # 在线程中写入，与 OCR 调用并行
+        await asyncio.to_thread(write)
+        return file_path
+
+    async def _allocate_problem_ids(self, count: int = 1) -> List[str]:
+        """
+        分配题目 ID
+
+        格式: P_MATH_YYYY_NNNNNN
+
+        预留号段时分配器另借一个写连接：先结束本会话的读事务归还连接，
+        避免并发请求各自占着连接再等第二个连接（SQLite 单写连接池会等到超时）。
+        调用前本会话只能有读操作，待写入的对象在分配之后再加入会话。
+        """
+        if count <= 0:
+            return []
+        await self._release_connection()
+        return await get_problem_id_allocator().allocate(self.db.bind, count)
 
     async def get_ocr_record(self, ocr_record_id: int) -> Optional[OCRRecord]:
         """
@@ -169,55 +859,83 @@ class OCRService:
         """
         重新识别（使用原始图片）
 
+        分阶段执行，OCR 调用期间不占用数据库连接。
+        题目按 question_index 对应到新的识别结果：单题记录只有第 0 题，
+        整页试卷记录按整页拆分结果逐题更新，新拆出的题目补建（同 _save_paper_problems）。
+
         Args:
             ocr_record_id: OCR 记录 ID
 
         Returns:
             新旧识别结果对比
         """
-        # 1. 查询原 OCR 记录
-        old_ocr_record = await self.get_ocr_record(ocr_record_id)
-        if not old_ocr_record:
+        # 1. 查询原 OCR 记录，读取后结束事务归还连接
+        ocr_record = await self.get_ocr_record(ocr_record_id)
+        if not ocr_record:
             raise ValueError("OCR 记录不存在")
+        old_content = ocr_record.recognized_text
+        old_confidence = ocr_record.confidence_score
+        file_path = resolve_image_path(ocr_record.file_path)
+        await self._release_connection()
 
-        # 2. 读取原始图片
-        file_path = old_ocr_record.file_path
         if not os.path.exists(file_path):
             raise FileNotFoundError("原始图片文件不存在")
 
-        with open(file_path, 'rb') as f:
-            image_bytes = f.read()
-
-        # 3. 重新调用 OCR
-        new_ocr_result = self.ocr_client.recognize_paper_cut_edu(image_bytes)
-
-        # 4. 更新 OCR 记录
-        old_ocr_record.recognized_text = new_ocr_result['text']
-        old_ocr_record.confidence_score = new_ocr_result['confidence']
-        old_ocr_record.words_count = new_ocr_result['words_count']
-        old_ocr_record.raw_json = new_ocr_result.get('raw_json')
-        old_ocr_record.processing_time_ms = new_ocr_result['processing_time_ms']
-
-        # 5. 更新关联的题目 - 通过反向关系查找
-        stmt = select(Problem).where(Problem.ocr_record_id == ocr_record_id)
-        result = await self.db.execute(stmt)
-        problem = result.scalar_one_or_none()
-        if problem:
-            problem.content = new_ocr_result['text']
-            quality_assessment = self.ocr_client.assess_quality(new_ocr_result['confidence'])
-            problem.quality_score = quality_assessment['grade']
+        # 2. 重新调用 OCR（请求体从文件流式编码，不持有数据库连接）
+        new_ocr_result = await self._recognize_path(file_path)
+        questions = new_ocr_result['questions'] or [new_ocr_result]
+
+        # 3. 一个短事务中更新记录和题目
+        problems = await OCRRecordRepository(self.db).get_problems(ocr_record_id)
+        # 单题模式创建的旧题目没有序号，视为第 0 题
+        by_index = {p.question_index or 0: p for p in problems}
+        paper_mode = len(problems) > 1 or any(index > 0 for index in by_index)
+
+        if paper_mode:
+            new_content = '\n'.join(q['text'] for q in questions)
+            new_confidence = self._paper_confidence(questions)
+            words_count = sum(q['words_count'] for q in questions)
+        else:
+            questions = questions[:1]
+            new_content = new_ocr_result['text']
+            new_confidence = new_ocr_result['confidence']
+            words_count = new_ocr_result['words_count']
+
+        # 新拆出的题目（分配题目 ID 会结束本会话的读事务，须在修改对象之前）
+        missing = [q for q in questions if paper_mode and q['question_index'] not in by_index]
+        problem_ids = await self._allocate_problem_ids(len(missing))
+
+        ocr_record.recognized_text = new_content
+        ocr_record.confidence_score = new_confidence
+        ocr_record.words_count = words_count
+        ocr_record.raw_json = new_ocr_result.get('raw_json')
+        ocr_record.preprocess_stats = self._dump_preprocess_stats(new_ocr_result)
+        ocr_record.processing_time_ms = new_ocr_result['processing_time_ms']
+
+        for question in questions:
+            problem = by_index.get(question.get('question_index', 0))
+            if problem is None:
+                continue
+            problem.content = question['text']
+            problem.quality_score = self.ocr_client.assess_quality(question['confidence'])['grade']
+            if paper_mode:
+                problem.qus_location = self._dump_location(question)
+
+        self.db.add_all([
+            self._build_problem(problem_id, question, ocr_record_id)
+            for problem_id, question in zip(problem_ids, missing)
+        ])
 
         await self.db.commit()
 
-        # 6. 返回对比结果
-        improvement = new_ocr_result['confidence'] - old_ocr_record.confidence_score
-
+        # 4. 返回对比结果
         return {
             "success": True,
             "ocr_record_id": ocr_record_id,
-            "old_content": old_ocr_record.recognized_text,
-            "new_content": new_ocr_result['text'],
-            "old_confidence": old_ocr_record.confidence_score,
-            "new_confidence": new_ocr_result['confidence'],
-            "improvement": improvement
+            "old_content": old_content,
+            "new_content": new_content,
+            "old_confidence": old_confidence,
+            "new_confidence": new_confidence,
+            "improvement": new_confidence - old_confidence,
+            "total_questions": len(problems) + len(missing)
         }
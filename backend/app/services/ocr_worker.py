@@ -0,0 +1,178 @@
+"""
+OCR 异步任务 worker
+
+worker 从 ocr_jobs 表领取任务（带租约），调用 OCRService 完成识别入库：
+- 失败按指数退避（带抖动）重新排队，超过最大次数标记为 failed
+- 定期回收租约过期的任务（worker 崩溃或被杀）
+- 既可随 API 进程启动（OCRWorkerPool），也可独立运行（scripts/run_ocr_worker.py）
+
+PendingOCRDrainer 负责在熔断恢复后补识别降级期间暂存的 pending_ocr 题目。
+"""
+import asyncio
+import os
+import socket
+import uuid
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.core.logger import logger
+from app.models.ocr_job import OCRJob
+from app.repositories.ocr_job_repository import OCRJobRepository
+from app.services.ocr_service import OCRService, resolve_image_path
+from app.utils.rate_limiter import backoff_delay
+from app.utils.circuit_breaker import OPEN
+
+settings = get_settings()
+
+# 回收过期租约的间隔（秒）
+LEASE_RECOVERY_INTERVAL = 30
+
+
+def retry_delay(attempts: int) -> float:
+    """第 attempts 次失败后的退避时间（指数退避 + 抖动）"""
+    return backoff_delay(attempts, settings.ocr_job_retry_base_delay, settings.ocr_job_retry_max_delay)
+
+
+class OCRJobWorker:
+    """单个 OCR 任务 worker"""
+
+    def __init__(self, session_factory=async_session_maker, worker_id: Optional[str] = None):
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._last_recovery = 0.0
+
+    async def run_once(self) -> bool:
+        """
+        领取并处理一个任务
+
+        Returns:
+            是否处理了任务
+        """
+        async with self.session_factory() as session:
+            await self._recover_leases(session)
+
+            job = await OCRJobRepository(session).claim_next(
+                self.worker_id, settings.ocr_job_lease_seconds
+            )
+            if job is None:
+                return False
+
+            await self._process(session, job)
+            return True
+
+    async def run_forever(self) -> None:
+        """持续消费队列，队列为空时按轮询间隔休眠"""
+        logger.info(f"OCR worker 已启动: {self.worker_id}")
+        while True:
+            try:
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"OCR worker 异常: {self.worker_id}, 错误: {str(e)}")
+                processed = False
+
+            if not processed:
+                await asyncio.sleep(settings.ocr_job_poll_interval)
+
+    async def _recover_leases(self, session: AsyncSession) -> None:
+        """定期回收过期租约"""
+        loop_time = asyncio.get_running_loop().time()
+        if loop_time - self._last_recovery < LEASE_RECOVERY_INTERVAL:
+            return
+        self._last_recovery = loop_time
+
+        await OCRJobRepository(session).recover_expired_leases()
+        await session.commit()
+
+    async def _process(self, session: AsyncSession, job: OCRJob) -> None:
+        """执行识别并回写任务状态"""
+        # 识别失败时会话会回滚，先取出需要的字段
+        job_pk, job_id = job.id, job.job_id
+        filename, file_path, content_hash = job.filename, job.file_path, job.content_hash
+        attempts, exhausted = job.attempts, job.attempts >= job.max_attempts
+
+        logger.info(f"处理 OCR 任务: job_id={job_id}, 第 {attempts} 次")
+        repo = OCRJobRepository(session)
+
+        if not os.path.isfile(resolve_image_path(file_path)):
+            # 图片丢失无法重试，直接标记失败
+            await repo.mark_failed(job_pk, self.worker_id, f"读取图片失败: {file_path}", 0, exhausted=True)
+            await session.commit()
+            return
+
+        result = await OCRService(session).recognize_file(filename, file_path, content_hash)
+
+        if result.success:
+            # 熔断时题目暂存为 pending_ocr，由补识别任务稍后识别
+            updated = await repo.mark_succeeded(
+                job_pk, self.worker_id, result.problem_id, result.ocr_record_id, parked=result.ocr_pending
+            )
+        else:
+            # 不可重试的错误（如图片格式不支持、参数错误）不再排队
+            delay = retry_delay(attempts)
+            updated = await repo.mark_failed(
+                job_pk, self.worker_id, result.error or "OCR 识别失败", delay,
+                exhausted=exhausted or not result.retryable
+            )
+            logger.warning(f"OCR 任务失败: job_id={job_id}, 第 {attempts} 次, 错误: {result.error}")
+
+        if not updated:
+            logger.warning(f"OCR 任务租约已失效，结果未回写: job_id={job_id}")
+        await session.commit()
+
+
+class PendingOCRDrainer:
+    """熔断恢复后补识别 pending_ocr 题目的后台任务"""
+
+    def __init__(self, session_factory=async_session_maker):
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.ocr_pending_drain_interval)
+            try:
+                async with self.session_factory() as session:
+                    service = OCRService(session)
+                    if service.ocr_client.circuit_breaker.state != OPEN:
+                        await service.drain_pending(settings.ocr_pending_drain_batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"补识别任务异常: {str(e)}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class OCRWorkerPool:
+    """进程内 worker 池（随 API 启停）"""
+
+    def __init__(self, size: int, session_factory=async_session_maker):
+        self.size = size
+        self.session_factory = session_factory
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """启动 worker"""
+        for _ in range(self.size):
+            worker = OCRJobWorker(self.session_factory)
+            self._tasks.append(asyncio.create_task(worker.run_forever()))
+        logger.info(f"OCR worker 池已启动: {self.size} 个")
+
+    async def stop(self) -> None:
+        """停止 worker（未完成的任务由租约过期后回收）"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,52 @@
+"""
+题目计数对账任务
+
+启动时执行一次（为已有数据库补建计数），之后按间隔定期执行，
+修正绕过 ORM 的批量 SQL 等造成的计数偏差。
+"""
+import asyncio
+from typing import Dict, Optional
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.core.logger import logger
+from app.repositories.problem_counter_repository import ProblemCounterRepository
+
+settings = get_settings()
+
+
+class ProblemCounterReconciler:
+    """题目计数定期对账后台任务"""
+
+    def __init__(self, interval: Optional[float] = None, session_factory=async_session_maker):
+        self.interval = settings.problem_counter_reconcile_interval if interval is None else interval
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> Dict[str, int]:
+        """执行一次对账"""
+        async with self.session_factory() as session:
+            result = await ProblemCounterRepository(session).reconcile()
+            await session.commit()
+        logger.info(f"题目计数对账完成: {result}")
+        return result
+
+    async def run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"题目计数对账异常: {str(e)}")
+
+    def start(self) -> None:
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
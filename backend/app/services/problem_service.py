@@ -3,16 +3,23 @@
 
 使用 Repository 模式进行数据访问
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
 
 from app.repositories.problem_repository import ProblemRepository
+from app.repositories.group_commit import get_group_commit_writer
 from app.models.problem import Problem
 from app.schemas.problem import ProblemUpdate
+from app.services.id_allocator import get_problem_id_allocator
+from app.services.knowledge_service import KnowledgeService
+from app.core.config import get_settings
 from app.core.exceptions import NotFoundException
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.utils.text_search import highlight_snippet
 from app.core.logger import logger
 
+settings = get_settings()
+
 
 class ProblemService:
     """题目业务逻辑服务"""
@@ -25,7 +32,9 @@ class ProblemService:
         self,
         page: int = 1,
         size: int = 20,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        question_type: Optional[str] = None,
+        knowledge_node: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         获取题目列表(分页)
@@ -34,12 +43,128 @@ class ProblemService:
             page: 页码
             size: 每页数量
             status: 状态筛选
+            question_type: 题型筛选
+            knowledge_node: 知识体系节点编号，筛选其下所有题目
 
         Returns:
             分页结果
+
+        Raises:
+            NotFoundException: 知识体系节点不存在
+        """
+        knowledge_path = await self._resolve_knowledge_path(knowledge_node)
+        logger.info(
+            f"查询题目列表: page={page}, size={size}, status={status}, "
+            f"question_type={question_type}, knowledge_node={knowledge_node}"
+        )
+        return await self.problem_repo.get_with_pagination(page, size, status, question_type, knowledge_path)
+
+    async def get_problems_by_cursor(
+        self,
+        size: int = 20,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        question_type: Optional[str] = None,
+        with_total: Optional[bool] = None,
+        knowledge_node: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        获取题目列表(游标分页)
+
+        Args:
+            size: 每页数量
+            cursor: 上一页返回的 next_cursor，不传表示第一页
+            status: 状态筛选
+            question_type: 题型筛选
+            with_total: 是否返回总数；不传时只在第一页返回
+            knowledge_node: 知识体系节点编号（课程 C1、模块、专题或知识点），筛选其下所有题目
+
+        Returns:
+            items、size、next_cursor、has_more、total（未统计时为 None）
+
+        Raises:
+            ValidationException: 游标无效
+            NotFoundException: 知识体系节点不存在
         """
-        logger.info(f"查询题目列表: page={page}, size={size}, status={status}")
-        return await self.problem_repo.get_with_pagination(page, size, status)
+        after = decode_cursor(cursor) if cursor else None
+        if with_total is None:
+            with_total = after is None
+
+        knowledge_path = await self._resolve_knowledge_path(knowledge_node)
+
+        logger.info(
+            f"游标查询题目列表: size={size}, status={status}, question_type={question_type}, "
+            f"knowledge_node={knowledge_node}, cursor={cursor}"
+        )
+        result = await self.problem_repo.get_page_by_cursor(
+            size, after, status, question_type, with_total, knowledge_path
+        )
+
+        last = result["last"]
+        return {
+            "items": result["items"],
+            "size": size,
+            "next_cursor": encode_cursor(*last) if last else None,
+            "has_more": result["has_more"],
+            "total": result["total"]
+        }
+
+    async def _resolve_knowledge_path(self, knowledge_node: Optional[str]) -> Optional[str]:
+        """知识体系节点编号 -> 路径（未传时为 None）"""
+        if not knowledge_node:
+            return None
+        hierarchy = await KnowledgeService(self.db).get_hierarchy()
+        knowledge_path = hierarchy.path_of(knowledge_node)
+        if knowledge_path is None:
+            raise NotFoundException("知识体系节点", knowledge_node)
+        return knowledge_path
+
+    async def search_problems(
+        self,
+        keyword: str,
+        status: Optional[str] = None,
+        question_type: Optional[str] = None,
+        kp_id: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        全文检索题目（数据库内按相关度排序后分页）
+
+        Args:
+            keyword: 搜索关键词
+            status: 状态筛选
+            question_type: 题型筛选
+            kp_id: 知识点筛选
+            limit: 最大返回数量
+            offset: 跳过数量
+
+        Returns:
+            {items: [{problem, score, snippet}], has_more}，
+            items 按相关度排序，snippet 为高亮摘要 HTML
+        """
+        logger.info(f"检索题目: keyword={keyword}, status={status}, question_type={question_type}, kp_id={kp_id}")
+        hits, has_more = await self.problem_repo.search_page(keyword, status, question_type, kp_id, limit, offset)
+        return {
+            "items": [
+                {
+                    "problem": problem,
+                    "score": score,
+                    "snippet": highlight_snippet(problem.content, keyword)
+                }
+                for problem, score in hits
+            ],
+            "has_more": has_more
+        }
+
+    async def get_problem_stats(self) -> Dict[str, Any]:
+        """
+        题目统计（总数及按状态、题型、质量等级分布，读取计数表）
+
+        Returns:
+            total、by_status、by_question_type、by_quality_score
+        """
+        return await self.problem_repo.counters.breakdown()
 
     async def get_problem_by_id(self, problem_id: str) -> Problem:
         """
@@ -61,12 +186,15 @@ class ProblemService:
 
         return problem
 
-    async def get_problem_with_ocr(self, problem_id: str) -> Dict[str, Any]:
+    async def get_problem_with_ocr(self, problem_id: str, include_raw: bool = False) -> Dict[str, Any]:
         """
         获取题目详情(包含 OCR 信息)
 
+        parsed_data 和 OCR 原始 JSON 为延迟加载的压缩大字段，只在 include_raw 时读取
+
         Args:
             problem_id: 题目 ID
+            include_raw: 是否返回 parsed_data 和 OCR 原始 JSON
 
         Returns:
             题目详情字典
@@ -74,7 +202,7 @@ class ProblemService:
         Raises:
             NotFoundException: 题目不存在
         """
-        result = await self.problem_repo.get_with_ocr(problem_id)
+        result = await self.problem_repo.get_with_ocr(problem_id, include_raw=include_raw)
         if not result:
             raise NotFoundException("题目", problem_id)
 
@@ -95,7 +223,7 @@ class ProblemService:
             "ocr_record_id": problem.ocr_record_id,
             "question_number": problem.question_number,
             "score": problem.score,
-            "parsed_data": problem.parsed_data,
+            "parsed_data": problem.parsed_data if include_raw else None,
             "created_at": problem.created_at.isoformat() if problem.created_at else None,
             "updated_at": problem.updated_at.isoformat() if problem.updated_at else None,
         }
@@ -107,7 +235,7 @@ class ProblemService:
                 "confidence_score": ocr_record.confidence_score,
                 "words_count": ocr_record.words_count,
                 "processing_time_ms": ocr_record.processing_time_ms,
-                "raw_json": ocr_record.raw_json,
+                "raw_json": ocr_record.raw_json if include_raw else None,
             }
 
         return response
@@ -130,12 +258,29 @@ class ProblemService:
         Raises:
             NotFoundException: 题目不存在
         """
+        update_data = problem_update.model_dump(exclude_unset=True)
+        if settings.group_commit_enabled:
+            # 不存在的题目直接返回 404，不进入写入队列
+            if not await self.problem_repo.get_by_problem_id(problem_id):
+                raise NotFoundException("题目", problem_id)
+
+            # 合并提交：与其他请求的写入在同一事务中提交；写入时再次检查，题目可能已被并发删除
+            async def write(session: AsyncSession) -> Problem:
+                repo = ProblemRepository(session)
+                target = await repo.get_by_problem_id(problem_id)
+                if not target:
+                    raise NotFoundException("题目", problem_id)
+                return await repo.update(target, **update_data)
+
+            problem = await get_group_commit_writer().submit(write)
+            logger.info(f"更新题目成功: {problem_id}")
+            return problem
+
         problem = await self.problem_repo.get_by_problem_id(problem_id)
         if not problem:
             raise NotFoundException("题目", problem_id)
 
         # 更新字段
-        update_data = problem_update.model_dump(exclude_unset=True)
         await self.problem_repo.update(problem, **update_data)
 
         await self.db.commit()
@@ -186,8 +331,9 @@ class ProblemService:
         Returns:
             创建的题目对象
         """
+        problem_id = (await get_problem_id_allocator().allocate(self.db.bind))[0]
         problem = await self.problem_repo.create(
-            problem_id=self._generate_problem_id(),
+            problem_id=problem_id,
             content=content,
             question_type=question_type,
             difficulty=difficulty,
@@ -201,14 +347,3 @@ class ProblemService:
 
         logger.info(f"创建题目成功: {problem.problem_id}")
         return problem
-
-    def _generate_problem_id(self) -> str:
-        """
-        生成题目 ID
-
-        格式: P_MATH_YYYY_XXX
-        """
-        import random
-        year = datetime.now().year
-        random_num = random.randint(1, 999)
-        return f"P_MATH_{year}_{random_num:03d}"
@@ -0,0 +1,53 @@
+"""
+百度 OCR 错误类型与错误码
+
+客户端（baidu_ocr）与 token 管理器（baidu_token）共用
+"""
+from typing import Any, Dict, Optional
+
+# 百度错误码
+# 可重试：1 未知错误、2 服务暂不可用、4 集群超限、18 QPS 超限、282000 服务内部错误
+RETRYABLE_ERROR_CODES = {1, 2, 4, 18, 282000}
+# 配额/过载信号：触发并发上限乘性下降
+OVERLOAD_ERROR_CODES = {4, 18}
+# Access Token 无效或过期：强制刷新后重试
+TOKEN_ERROR_CODES = {110, 111}
+
+
+class BaiduOCRError(Exception):
+    """百度 OCR 调用错误"""
+
+    def __init__(
+        self,
+        message: str,
+        error_code: Optional[int] = None,
+        retryable: bool = False,
+        overload: bool = False
+    ):
+        super().__init__(message)
+        self.error_code = error_code
+        self.retryable = retryable
+        self.overload = overload
+
+    @property
+    def token_invalid(self) -> bool:
+        return self.error_code in TOKEN_ERROR_CODES
+
+    def with_prefix(self, prefix: str) -> "BaiduOCRError":
+        """加上消息前缀，保留 error_code、retryable 等属性"""
+        return BaiduOCRError(f"{prefix}{self}", self.error_code, self.retryable, self.overload)
+
+    @classmethod
+    def from_response(cls, result: Dict[str, Any]) -> "BaiduOCRError":
+        """根据接口返回的 error_code 构建错误"""
+        try:
+            code = int(result['error_code'])
+        except (TypeError, ValueError):
+            code = None
+        error_msg = result.get('error_msg', 'Unknown error')
+        return cls(
+            f"百度 OCR API 错误: {error_msg} (code: {result['error_code']})",
+            error_code=code,
+            retryable=code in RETRYABLE_ERROR_CODES or code in TOKEN_ERROR_CODES,
+            overload=code in OVERLOAD_ERROR_CODES
+        )
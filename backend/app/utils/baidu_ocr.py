@@ -1,141 +1,110 @@
 """
 百度 OCR 客户端
+
+- BaiduOCRClient: 同步客户端（基于 requests），供脚本直接调用
+- AsyncBaiduOCRClient: 异步客户端（基于 httpx），共享连接池，供 API 服务使用
 """
 import requests
+import httpx
+import asyncio
 import base64
+import os
+import hashlib
 import time
 import json
 import re
-from typing import Dict, Any, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+from urllib.parse import quote, urlencode
 from app.core.config import get_settings
+from app.core.logger import logger
+from app.utils.baidu_errors import BaiduOCRError
+from app.utils.baidu_token import BaiduTokenManager, read_token_cache, write_token_cache
+from app.utils.rate_limiter import TokenBucket, AIMDConcurrencyLimiter, backoff_delay
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.utils.upload_spool import new_spool_path
 
 settings = get_settings()
 
+# 接口路径（域名由 settings.baidu_ocr_base_url 配置）
+TOKEN_PATH = "/oauth/2.0/token"
+PAPER_CUT_EDU_PATH = "/rest/2.0/ocr/v1/paper_cut_edu"
 
-class BaiduOCRClient:
-    """百度 OCR API 客户端"""
+# 接口未返回 expires_in 时使用的默认有效期（30 天）
+TOKEN_TTL_SECONDS = 30 * 24 * 3600
 
-    def __init__(self):
-        self.api_key = settings.baidu_ocr_api_key
-        self.secret_key = settings.baidu_ocr_secret_key
-        self._access_token = None
-        self._token_expiry = None
+# 教育场景识别接口参数（图片除外）
+OCR_OPTIONS = {
+    'language_type': 'CHN_ENG',
+    'detect_direction': 'false',
+    'words_type': 'handprint_mix',
+    'splice_text': 'false',
+    'enhance': 'false'
+}
 
-    def get_access_token(self) -> str:
-        """
-        获取 Access Token（带缓存）
+# 流式编码请求体时每次读取的字节数（3 的倍数，分块 base64 可直接拼接）
+FORM_STREAM_CHUNK_SIZE = 3 * 16 * 1024
 
-        使用 AK，SK 生成鉴权签名
-        """
-        # 检查 token 是否有效
-        if self._access_token and self._token_expiry:
-            if time.time() < self._token_expiry:
-                return self._access_token
 
-        # 获取新 token
-        url = "https://aip.baidubce.com/oauth/2.0/token"
-        params = {
-            "grant_type": "client_credentials",
-            "client_id": self.api_key,
-            "client_secret": self.secret_key
-        }
+def ocr_params_fingerprint(options: Optional[Dict[str, str]] = None) -> str:
+    """
+    OCR 参数集指纹（用于结果缓存键）
 
-        try:
-            response = requests.post(url, params=params, timeout=10)
-            response.raise_for_status()
-            result = response.json()
+    参数变化后旧的缓存结果不再命中
+    """
+    options = options if options is not None else OCR_OPTIONS
+    canonical = json.dumps(
+        {"api": "paper_cut_edu", **options}, sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
 
-            access_token = result.get("access_token")
-            if not access_token:
-                raise ValueError("Failed to get access token")
 
-            # 缓存 token（有效期 30 天，提前 1 天刷新）
-            self._access_token = access_token
-            self._token_expiry = time.time() + (29 * 24 * 3600)
+class BaiduOCRBase:
+    """同步/异步客户端共用的请求构造与响应解析逻辑"""
 
-            return access_token
+    @property
+    def token_url(self) -> str:
+        return settings.baidu_ocr_base_url.rstrip('/') + TOKEN_PATH
 
-        except Exception as e:
-            raise Exception(f"获取 Access Token 失败: {str(e)}")
+    @property
+    def paper_cut_edu_url(self) -> str:
+        return settings.baidu_ocr_base_url.rstrip('/') + PAPER_CUT_EDU_PATH
 
-    def recognize_paper_cut_edu(self, image_bytes: bytes) -> Dict[str, Any]:
+    def _token_params(self) -> Dict[str, str]:
+        """获取 Access Token 的请求参数"""
+        return {
+            "grant_type": "client_credentials",
+            "client_id": self.api_key,
+            "client_secret": self.secret_key
+        }
+
+    def _build_payload(self, image_bytes: bytes) -> Dict[str, str]:
+        """构建教育场景识别接口的表单参数"""
+        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        return {'image': image_base64, **OCR_OPTIONS}
+
+    def _build_result(self, result: Dict[str, Any], processing_time: int) -> Dict[str, Any]:
         """
-        使用教育场景识别接口识别图片
+        检查 API 错误并解析识别结果
 
         Args:
-            image_bytes: 图片二进制数据
+            result: API 返回的 JSON 数据
+            processing_time: 接口耗时（毫秒）
 
         Returns:
-            识别结果字典
+            解析后的结果（含 processing_time_ms 和 raw_json）
         """
-        # 获取 access token
-        access_token = self.get_access_token()
+        # 检查 API 错误
+        if 'error_code' in result:
+            raise BaiduOCRError.from_response(result)
 
-        # 构建 URL
-        url = f"https://aip.baidubce.com/rest/2.0/ocr/v1/paper_cut_edu?access_token={access_token}"
+        # 解析识别结果
+        parsed_result = self._parse_ocr_response(result)
 
-        # 编码图片
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        # 添加处理时长和原始 JSON（紧凑格式，入库时再压缩）
+        parsed_result['processing_time_ms'] = processing_time
+        parsed_result['raw_json'] = json.dumps(result, ensure_ascii=False, separators=(',', ':'))
 
-        # 请求参数
-        payload = {
-            'image': image_base64,
-            'language_type': 'CHN_ENG',
-            'detect_direction': 'false',
-            'words_type': 'handprint_mix',
-            'splice_text': 'false',
-            'enhance': 'false'
-        }
-
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Accept': 'application/json'
-        }
-
-        try:
-            start_time = time.time()
-            response = requests.post(
-                url,
-                data=payload,
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-
-            processing_time = int((time.time() - start_time) * 1000)
-            result = response.json()
-
-            # DEBUG: Save API response to file for inspection
-            import json
-            with open('debug_ocr_api_response.json', 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
-            print(f"DEBUG: OCR API response saved to debug_ocr_api_response.json")
-            print(f"DEBUG: Response keys: {list(result.keys())}")
-            print(f"DEBUG: Has qus_result: {'qus_result' in result}")
-            if 'qus_result' in result:
-                print(f"DEBUG: qus_result length: {len(result.get('qus_result', []))}")
-
-            # 检查 API 错误
-            if 'error_code' in result:
-                error_msg = result.get('error_msg', 'Unknown error')
-                raise Exception(f"百度 OCR API 错误: {error_msg} (code: {result['error_code']})")
-
-            # 解析识别结果
-            parsed_result = self._parse_ocr_response(result)
-
-            # 添加处理时长和原始 JSON（保存为格式化的 JSON 字符串）
-            parsed_result['processing_time_ms'] = processing_time
-            import json
-            parsed_result['raw_json'] = json.dumps(result, ensure_ascii=False, indent=2)
-
-            return parsed_result
-
-        except requests.exceptions.Timeout:
-            raise Exception("OCR 识别超时，请稍后重试")
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"网络请求失败: {str(e)}")
-        except Exception as e:
-            raise Exception(f"OCR 识别失败: {str(e)}")
+        return parsed_result
 
     def _parse_ocr_response(self, response_json: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -177,7 +146,8 @@ class BaiduOCRClient:
                 'score': '分值',
                 'parsed_data': {...},
                 'words_count': 156,
-                'confidence': 0.92
+                'confidence': 0.92,
+                'questions': [...]  # 整页所有题目的解析结果
             }
         """
         # 从根级别获取题目结果
@@ -190,7 +160,7 @@ class BaiduOCRClient:
 
         # 如果没有题目结果，返回空数据
         if not qus_result:
-            print("WARNING: No qus_result found in OCR response")
+            logger.warning("OCR 响应中没有 qus_result")
             return {
                 'text': '',
                 'question_type': 'unknown',
@@ -198,14 +168,30 @@ class BaiduOCRClient:
                 'score': None,
                 'parsed_data': {},
                 'words_count': 0,
-                'confidence': 0.0
+                'confidence': 0.0,
+                'questions': []
             }
 
-        # 取第一个题目
-        first_qus = qus_result[0]
-        qus_elements = first_qus.get('qus_element', [])
-        qus_type = first_qus.get('qus_type', 'unknown')
-        qus_probability = first_qus.get('qus_probability', 0.0)
+        # 逐题解析；顶层字段取第一题（单题模式），questions 保留整页所有题目（试卷模式）
+        questions = [self._parse_question(qus, index) for index, qus in enumerate(qus_result)]
+        result = dict(questions[0])
+        result['questions'] = questions
+        return result
+
+    def _parse_question(self, qus: Dict[str, Any], index: int = 0) -> Dict[str, Any]:
+        """
+        解析 qus_result 中的单道题目
+
+        Args:
+            qus: qus_result 中的一项
+            index: 该题在整页中的序号（从 0 开始）
+
+        Returns:
+            解析结果（字段同 _parse_ocr_response，另含 question_index 和 qus_location）
+        """
+        qus_elements = qus.get('qus_element', [])
+        qus_type = qus.get('qus_type', 'unknown')
+        qus_probability = qus.get('qus_probability', 0.0)
 
         # 题目类型映射（百度OCR官方文档）
         # 0：选择题；1：判断题；2：填空题；3：问答题；4：其他
@@ -311,7 +297,9 @@ class BaiduOCRClient:
             'parsed_data': parsed_data,
             'full_text': full_text,
             'words_count': words_count,
-            'confidence': round(avg_confidence, 4)
+            'confidence': round(avg_confidence, 4),
+            'question_index': index,
+            'qus_location': qus.get('qus_location')
         }
 
     def assess_quality(self, confidence: float) -> Dict[str, Any]:
@@ -350,3 +338,397 @@ class BaiduOCRClient:
                 'label': '✗ 低质量',
                 'color': 'red'
             }
+
+
+class BaiduOCRClient(BaiduOCRBase):
+    """百度 OCR API 客户端（同步）"""
+
+    def __init__(self):
+        self.api_key = settings.baidu_ocr_api_key
+        self.secret_key = settings.baidu_ocr_secret_key
+        self._access_token = None
+        self._token_expiry = None
+
+    def get_access_token(self) -> str:
+        """
+        获取 Access Token（带缓存）
+
+        使用 AK，SK 生成鉴权签名
+        """
+        # 检查 token 是否有效
+        if self._access_token and self._token_expiry:
+            if time.time() < self._token_expiry:
+                return self._access_token
+
+        # 复用 API 服务持久化的 token
+        cached = read_token_cache(settings.baidu_token_cache_path, self.api_key)
+        if cached and time.time() < cached["expires_at"] - settings.baidu_token_refresh_margin:
+            self._access_token = cached["access_token"]
+            self._token_expiry = cached["expires_at"] - settings.baidu_token_refresh_margin
+            return self._access_token
+
+        try:
+            response = requests.post(self.token_url, params=self._token_params(), timeout=10)
+            response.raise_for_status()
+            result = response.json()
+
+            access_token = result.get("access_token")
+            if not access_token:
+                raise BaiduOCRError("获取 Access Token 失败: 响应中没有 access_token", retryable=True)
+
+            expires_at = time.time() + int(result.get("expires_in") or TOKEN_TTL_SECONDS)
+            write_token_cache(settings.baidu_token_cache_path, self.api_key, access_token, expires_at)
+
+            self._access_token = access_token
+            self._token_expiry = expires_at - settings.baidu_token_refresh_margin
+
+            return access_token
+
+        except BaiduOCRError:
+            raise
+        except Exception as e:
+            # 鉴权失败多为网络抖动或百度侧故障，允许调用方重试
+            raise BaiduOCRError(f"获取 Access Token 失败: {str(e)}", retryable=True) from e
+
+    def recognize_paper_cut_edu(self, image_bytes: bytes) -> Dict[str, Any]:
+        """
+        使用教育场景识别接口识别图片
+
+        Args:
+            image_bytes: 图片二进制数据
+
+        Returns:
+            识别结果字典
+        """
+        # 获取 access token
+        access_token = self.get_access_token()
+
+        url = f"{self.paper_cut_edu_url}?access_token={access_token}"
+        payload = self._build_payload(image_bytes)
+
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': 'application/json'
+        }
+
+        try:
+            start_time = time.time()
+            response = requests.post(
+                url,
+                data=payload,
+                headers=headers,
+                timeout=30
+            )
+            response.raise_for_status()
+
+            processing_time = int((time.time() - start_time) * 1000)
+            try:
+                result = response.json()
+            except ValueError as e:
+                raise BaiduOCRError(f"百度 OCR 响应解析失败: {str(e)}", retryable=True)
+
+            # 调试：按配置保存原始响应
+            if settings.ocr_debug_dump_path:
+                with open(settings.ocr_debug_dump_path, 'w', encoding='utf-8') as f:
+                    json.dump(result, f, ensure_ascii=False, indent=2)
+                logger.debug(
+                    f"OCR 原始响应已保存到 {settings.ocr_debug_dump_path}, "
+                    f"qus_result: {len(result.get('qus_result', []))}"
+                )
+
+            return self._build_result(result, processing_time)
+
+        except requests.exceptions.Timeout as e:
+            raise BaiduOCRError("OCR 识别超时，请稍后重试", retryable=True, overload=True) from e
+        except requests.exceptions.RequestException as e:
+            raise BaiduOCRError(f"网络请求失败: {str(e)}", retryable=True) from e
+        except BaiduOCRError as e:
+            raise e.with_prefix("OCR 识别失败: ") from e
+        except Exception as e:
+            raise BaiduOCRError(f"OCR 识别失败: {str(e)}") from e
+
+
+class AsyncBaiduOCRClient(BaiduOCRBase):
+    """
+    百度 OCR API 客户端（异步）
+
+    基于 httpx.AsyncClient，所有请求复用同一个 keep-alive 连接池，
+    不会阻塞事件循环。应用内通过 get_async_ocr_client() 获取共享实例。
+    """
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        token_manager: Optional[BaiduTokenManager] = None
+    ):
+        self.api_key = settings.baidu_ocr_api_key
+        self.secret_key = settings.baidu_ocr_secret_key
+        self._http = http_client or create_http_client()
+        self.token_manager = token_manager or BaiduTokenManager(self._fetch_token)
+
+        # QPS 配额限流 + 自适应并发
+        self.rate_limiter = TokenBucket(settings.baidu_ocr_qps, settings.baidu_ocr_burst)
+        self.concurrency_limiter = AIMDConcurrencyLimiter(
+            initial=settings.baidu_ocr_max_concurrency,
+            min_limit=settings.baidu_ocr_min_concurrency,
+            max_limit=settings.baidu_ocr_max_concurrency
+        )
+
+        # 熔断器：百度故障或持续超时时快速失败
+        self.circuit_breaker = CircuitBreaker(
+            "百度 OCR",
+            window_size=settings.ocr_breaker_window,
+            min_calls=settings.ocr_breaker_min_calls,
+            failure_rate_threshold=settings.ocr_breaker_failure_rate,
+            slow_call_ms=settings.ocr_breaker_slow_call_ms,
+            slow_call_rate_threshold=settings.ocr_breaker_slow_call_rate,
+            open_seconds=settings.ocr_breaker_open_seconds,
+            half_open_max_calls=settings.ocr_breaker_half_open_calls
+        )
+
+    async def aclose(self) -> None:
+        """停止 token 刷新并关闭连接池"""
+        await self.token_manager.stop()
+        await self._http.aclose()
+
+    async def _fetch_token(self) -> Dict[str, Any]:
+        """调用鉴权接口（由 BaiduTokenManager 单飞调用）"""
+        try:
+            response = await self._http.post(self.token_url, params=self._token_params())
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            # 网络错误、超时、5xx 及响应解析失败都按可重试处理
+            raise BaiduOCRError(f"获取 Access Token 失败: {str(e)}", retryable=True) from e
+
+    async def get_access_token(self) -> str:
+        """
+        获取 Access Token（由进程级 token 管理器缓存并预刷新）
+
+        失败时抛出可重试的 BaiduOCRError
+        """
+        return await self.token_manager.get_token()
+
+    async def recognize_paper_cut_edu(self, image_bytes: bytes) -> Dict[str, Any]:
+        """
+        使用教育场景识别接口识别图片
+
+        请求先经过令牌桶（QPS 配额）和自适应并发限制排队；
+        遇到可重试的错误码、5xx 或超时时按带抖动的指数退避重试。
+        熔断器打开时抛出 CircuitOpenError（不包装），由调用方决定降级方式。
+
+        Args:
+            image_bytes: 图片二进制数据
+
+        Returns:
+            识别结果字典（结构同 BaiduOCRClient.recognize_paper_cut_edu）
+        """
+        payload = self._build_payload(image_bytes)
+        return await self._recognize_with_retry(lambda: {'data': payload})
+
+    async def recognize_paper_cut_edu_file(self, image_path: str) -> Dict[str, Any]:
+        """
+        识别磁盘上的图片（请求体从文件流式编码）
+
+        在线程中按块完成 base64 与表单编码，写入临时文件（只编码一次，文件大小即 Content-Length）；
+        发送时在线程中分块读取，不把整张图片及其编码结果读入内存，也不阻塞事件循环。
+        重试复用同一个请求体文件，识别结束后删除。
+
+        Args:
+            image_path: 图片绝对路径
+
+        Returns:
+            识别结果字典（同 recognize_paper_cut_edu）
+        """
+        body_path = new_spool_path(".form")
+        try:
+            try:
+                content_length = await asyncio.to_thread(_write_form_body, image_path, body_path)
+            except FileNotFoundError as e:
+                raise BaiduOCRError(f"OCR 识别失败: 图片文件不存在: {str(e)}") from e
+            except OSError as e:
+                raise BaiduOCRError(f"OCR 识别失败: 读取图片失败: {str(e)}", retryable=True) from e
+
+            def build_request() -> Dict[str, Any]:
+                return {
+                    'content': _aiter_file(body_path),
+                    'headers': {
+                        'Content-Type': 'application/x-www-form-urlencoded',
+                        'Content-Length': str(content_length)
+                    }
+                }
+
+            return await self._recognize_with_retry(build_request)
+        finally:
+            if os.path.exists(body_path):
+                os.remove(body_path)
+
+    async def _recognize_with_retry(self, build_request: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        带熔断、限流和退避重试的识别调用
+
+        Args:
+            build_request: 每次尝试时生成请求参数（data 或 content + headers）
+        """
+        attempt = 0
+
+        while True:
+            attempt += 1
+            # 熔断打开时不再等待超时，直接抛出 CircuitOpenError
+            self.circuit_breaker.check()
+            try:
+                result = await self._recognize_once(build_request())
+            except asyncio.CancelledError:
+                self.circuit_breaker.release()
+                raise
+            except Exception as exc:
+                # 未预期的异常同样走退避重试，重试耗尽后由调用方（任务队列 / 补识别）退避
+                if isinstance(exc, BaiduOCRError):
+                    e = exc
+                else:
+                    logger.exception(f"OCR 调用出现未预期的异常: {exc}")
+                    e = BaiduOCRError(str(exc) or type(exc).__name__, retryable=True)
+
+                # 只有可重试的错误（超时、5xx、限流等）才说明依赖不健康
+                if e.retryable:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+
+                if not e.retryable or attempt > settings.baidu_ocr_max_retries:
+                    raise e.with_prefix("OCR 识别失败: ") from exc
+
+                if e.token_invalid:
+                    try:
+                        await self.token_manager.refresh(force=True)
+                    except BaiduOCRError as refresh_error:
+                        # 刷新失败不中断重试，下一次尝试会再次获取 token
+                        logger.warning(str(refresh_error))
+
+                delay = backoff_delay(
+                    attempt, settings.baidu_ocr_retry_base_delay, settings.baidu_ocr_retry_max_delay
+                )
+                logger.warning(f"OCR 调用失败，{delay:.2f}s 后第 {attempt} 次重试: {str(e)}")
+                await asyncio.sleep(delay)
+            else:
+                self.circuit_breaker.record_success(result['processing_time_ms'])
+                return result
+
+    async def _recognize_once(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """发送一次识别请求（限流后执行），失败时抛出 BaiduOCRError"""
+        headers = {'Accept': 'application/json', **request.pop('headers', {})}
+        await self.rate_limiter.acquire()
+
+        async with self.concurrency_limiter:
+            access_token = await self.get_access_token()
+
+            try:
+                start_time = time.time()
+                response = await self._http.post(
+                    self.paper_cut_edu_url,
+                    params={'access_token': access_token},
+                    headers=headers,
+                    **request
+                )
+            except httpx.TimeoutException:
+                self.concurrency_limiter.on_overload()
+                raise BaiduOCRError("OCR 识别超时，请稍后重试", retryable=True, overload=True)
+            except httpx.HTTPError as e:
+                raise BaiduOCRError(f"网络请求失败: {str(e)}", retryable=True)
+            except FileNotFoundError as e:
+                raise BaiduOCRError(f"图片文件不存在: {str(e)}")
+            except OSError as e:
+                raise BaiduOCRError(f"读取图片失败: {str(e)}", retryable=True)
+
+            if response.status_code >= 500 or response.status_code == 429:
+                self.concurrency_limiter.on_overload()
+                raise BaiduOCRError(
+                    f"百度 OCR 服务异常: HTTP {response.status_code}", retryable=True, overload=True
+                )
+            if response.is_error:
+                raise BaiduOCRError(f"网络请求失败: HTTP {response.status_code}")
+
+            processing_time = int((time.time() - start_time) * 1000)
+            try:
+                result = response.json()
+            except ValueError as e:
+                raise BaiduOCRError(f"百度 OCR 响应解析失败: {str(e)}", retryable=True)
+
+            if 'error_code' in result:
+                error = BaiduOCRError.from_response(result)
+                if error.overload:
+                    self.concurrency_limiter.on_overload()
+                raise error
+
+            self.concurrency_limiter.on_success()
+            return self._build_result(result, processing_time)
+
+
+def _iter_form_body(image_path: str) -> Iterator[bytes]:
+    """逐块生成 x-www-form-urlencoded 请求体（图片参数放在最后）"""
+    yield (urlencode(OCR_OPTIONS) + '&image=').encode('ascii')
+    with open(image_path, 'rb') as f:
+        while True:
+            chunk = f.read(FORM_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield quote(base64.b64encode(chunk), safe='').encode('ascii')
+
+
+def _write_form_body(image_path: str, body_path: str) -> int:
+    """把表单请求体编码写入 body_path，返回字节数（用于 Content-Length，避免分块传输编码）"""
+    with open(body_path, 'wb') as out:
+        for chunk in _iter_form_body(image_path):
+            out.write(chunk)
+        return out.tell()
+
+
+async def _aiter_file(path: str) -> AsyncIterator[bytes]:
+    """在线程中分块读取文件，生成 httpx 需要的异步迭代器"""
+    f = await asyncio.to_thread(open, path, 'rb')
+    try:
+        while True:
+            chunk = await asyncio.to_thread(f.read, FORM_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    创建 OCR 专用的 httpx 连接池
+
+    连接数、keep-alive 数量及连接/读取超时均来自配置
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.ocr_http_max_connections,
+            max_keepalive_connections=settings.ocr_http_max_keepalive,
+            keepalive_expiry=settings.ocr_http_keepalive_expiry
+        ),
+        timeout=httpx.Timeout(
+            settings.ocr_read_timeout,
+            connect=settings.ocr_connect_timeout
+        )
+    )
+
+
+_async_client: Optional[AsyncBaiduOCRClient] = None
+
+
+def get_async_ocr_client() -> AsyncBaiduOCRClient:
+    """获取进程内共享的异步 OCR 客户端"""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncBaiduOCRClient()
+    return _async_client
+
+
+async def close_async_ocr_client() -> None:
+    """关闭共享的异步 OCR 客户端（应用关闭时调用）"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
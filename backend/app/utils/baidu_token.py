@@ -0,0 +1,197 @@
+"""
+百度 Access Token 管理器
+
+- 进程内共享：所有请求复用同一个 token
+- 单飞刷新：并发刷新合并为一次 /oauth/2.0/token 调用
+- 后台预刷新：在过期前主动刷新，请求路径上不再等待鉴权
+- 持久化：token 写入本地缓存文件，重启或新 worker 直接复用
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import get_settings
+from app.core.logger import logger
+from app.utils.baidu_errors import BaiduOCRError
+
+settings = get_settings()
+
+# 缺少 expires_in 时的默认有效期（30 天）
+DEFAULT_EXPIRES_IN = 30 * 24 * 3600
+
+# 后台刷新失败后的重试间隔（秒）
+REFRESH_RETRY_SECONDS = 60
+
+
+def _key_fingerprint(api_key: str) -> str:
+    """API Key 指纹，避免不同应用的 token 互相覆盖"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def read_token_cache(path: str, api_key: str) -> Optional[Dict[str, Any]]:
+    """
+    读取持久化的 token
+
+    Returns:
+        {'access_token': ..., 'expires_at': ...}，不存在或不匹配返回 None
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if data.get("key") != _key_fingerprint(api_key):
+        return None
+    if not data.get("access_token") or not data.get("expires_at"):
+        return None
+    return data
+
+
+def write_token_cache(path: str, api_key: str, access_token: str, expires_at: float) -> None:
+    """原子写入 token 缓存文件（先写临时文件再 rename）"""
+    if not path:
+        return
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "key": _key_fingerprint(api_key),
+                "access_token": access_token,
+                "expires_at": expires_at
+            }, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"写入 Access Token 缓存失败: {e}")
+
+
+class BaiduTokenManager:
+    """百度 Access Token 管理器（应用级单例）"""
+
+    def __init__(
+        self,
+        fetch_token: Callable[[], Awaitable[Dict[str, Any]]],
+        api_key: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        refresh_margin: Optional[int] = None
+    ):
+        """
+        Args:
+            fetch_token: 调用 /oauth/2.0/token 的协程函数，返回接口 JSON
+            api_key: 百度 API Key（用于缓存文件校验）
+            cache_path: 持久化文件路径，为空则不持久化
+            refresh_margin: 提前刷新的秒数
+        """
+        self._fetch_token = fetch_token
+        self.api_key = api_key if api_key is not None else settings.baidu_ocr_api_key
+        self.cache_path = cache_path if cache_path is not None else settings.baidu_token_cache_path
+        self.refresh_margin = (
+            refresh_margin if refresh_margin is not None else settings.baidu_token_refresh_margin
+        )
+
+        self._access_token: Optional[str] = None
+        self._expires_at: float = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def refresh_at(self) -> float:
+        """计划刷新时间点"""
+        return self._expires_at - self.refresh_margin
+
+    def _is_fresh(self) -> bool:
+        return bool(self._access_token) and time.time() < self.refresh_at
+
+    def _load_from_cache(self) -> bool:
+        """从持久化文件加载，加载到未到刷新期的 token 返回 True"""
+        data = read_token_cache(self.cache_path, self.api_key)
+        if data and data["expires_at"] > self._expires_at:
+            self._access_token = data["access_token"]
+            self._expires_at = float(data["expires_at"])
+        return self._is_fresh()
+
+    async def get_token(self) -> str:
+        """获取可用的 token（热路径无锁、无网络请求）"""
+        if self._is_fresh():
+            return self._access_token
+        return await self.refresh()
+
+    async def refresh(self, force: bool = False) -> str:
+        """
+        刷新 token
+
+        并发调用共享同一次刷新：后到的协程拿到锁后发现 token 已更新，直接返回。
+
+        Args:
+            force: 是否忽略当前 token 强制刷新（后台预刷新使用）
+        """
+        stale_token = self._access_token
+        async with self._lock:
+            # 等锁期间已被其他协程刷新
+            if self._access_token != stale_token and self._is_fresh():
+                return self._access_token
+            if not force and self._is_fresh():
+                return self._access_token
+
+            # 其他 worker 可能已刷新并写入缓存文件
+            if self._load_from_cache() and self._access_token != stale_token:
+                logger.debug("复用持久化的 Access Token")
+                return self._access_token
+
+            try:
+                result = await self._fetch_token()
+            except BaiduOCRError:
+                raise
+            except Exception as e:
+                # 鉴权失败多为网络抖动或百度侧故障，标记为可重试，避免任务被判为永久失败
+                raise BaiduOCRError(f"获取 Access Token 失败: {str(e)}", retryable=True) from e
+            access_token = result.get("access_token")
+            if not access_token:
+                raise BaiduOCRError("获取 Access Token 失败: 响应中没有 access_token", retryable=True)
+
+            expires_in = int(result.get("expires_in") or DEFAULT_EXPIRES_IN)
+            self._access_token = access_token
+            self._expires_at = time.time() + expires_in
+            write_token_cache(self.cache_path, self.api_key, access_token, self._expires_at)
+
+            logger.info(f"百度 Access Token 已刷新，有效期 {expires_in // 3600} 小时")
+            return access_token
+
+    async def start(self) -> None:
+        """加载持久化 token 并启动后台预刷新任务"""
+        self._load_from_cache()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """停止后台刷新任务"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        """在 token 进入刷新窗口前主动刷新"""
+        while True:
+            delay = self.refresh_at - time.time() if self._access_token else 0
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.refresh(force=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"后台刷新 Access Token 失败，{REFRESH_RETRY_SECONDS}s 后重试: {e}")
+                await asyncio.sleep(REFRESH_RETRY_SECONDS)
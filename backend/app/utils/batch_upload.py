@@ -0,0 +1,107 @@
+"""
+批量上传拆包
+
+把多个上传文件（图片或 ZIP 压缩包）展开为逐个读取的条目。
+ZIP 条目按需解压，任意时刻只有正在处理的条目驻留内存。
+"""
+import asyncio
+import os
+import zipfile
+from typing import AsyncIterator, Awaitable, Callable, List, Tuple
+from fastapi import UploadFile
+
+from app.core.exceptions import ValidationException
+from app.utils.image_validation import max_upload_size
+
+ZIP_HEADER = b'PK\x03\x04'
+
+# (文件名, 读取函数)
+BatchEntry = Tuple[str, Callable[[], Awaitable[bytes]]]
+
+
+async def _is_zip_upload(file: UploadFile) -> bool:
+    """根据文件名、类型和文件头判断是否为 ZIP"""
+    filename = (file.filename or "").lower()
+    if filename.endswith(".zip") or (file.content_type or "") in ("application/zip", "application/x-zip-compressed"):
+        return True
+    header = await file.read(4)
+    await file.seek(0)
+    return header == ZIP_HEADER
+
+
+def _is_image_entry(info: zipfile.ZipInfo) -> bool:
+    """跳过目录、隐藏文件和 macOS 元数据"""
+    if info.is_dir():
+        return False
+    name = info.filename
+    basename = os.path.basename(name)
+    return not (name.startswith("__MACOSX/") or basename.startswith("."))
+
+
+def _zip_entry_loader(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> Callable[[], Awaitable[bytes]]:
+    """单个 ZIP 条目的读取函数（在线程中解压，限制读取字节数防止压缩炸弹）"""
+    max_size = max_upload_size()
+
+    def _read() -> bytes:
+        if info.file_size > max_size:
+            raise _size_error(max_size)
+        with archive.open(info) as f:
+            data = f.read(max_size + 1)
+        if len(data) > max_size:
+            raise _size_error(max_size)
+        return data
+
+    async def load() -> bytes:
+        return await asyncio.to_thread(_read)
+
+    return load
+
+
+def _size_error(max_size: int) -> ValidationException:
+    return ValidationException(f"文件大小超过限制 (最大 {max_size // 1024 // 1024}MB)")
+
+
+def _upload_loader(file: UploadFile) -> Callable[[], Awaitable[bytes]]:
+    """普通上传文件的读取函数（与 ZIP 条目相同，最多读取 max_size + 1 字节）"""
+    max_size = max_upload_size()
+
+    async def load() -> bytes:
+        data = await file.read(max_size + 1)
+        if len(data) > max_size:
+            raise _size_error(max_size)
+        return data
+
+    return load
+
+
+def _error_loader(message: str) -> Callable[[], Awaitable[bytes]]:
+    async def load() -> bytes:
+        raise ValidationException(message)
+    return load
+
+
+async def iter_upload_entries(files: List[UploadFile]) -> AsyncIterator[BatchEntry]:
+    """
+    展开上传文件列表
+
+    Args:
+        files: 上传的文件（图片或 ZIP）
+
+    Yields:
+        (文件名, 读取函数)，读取函数在调用时才读入数据
+    """
+    for file in files:
+        if not await _is_zip_upload(file):
+            yield file.filename or "unnamed", _upload_loader(file)
+            continue
+
+        try:
+            archive = zipfile.ZipFile(file.file)
+        except zipfile.BadZipFile:
+            yield file.filename or "unnamed.zip", _error_loader("ZIP 文件已损坏")
+            continue
+
+        with archive:
+            for info in archive.infolist():
+                if _is_image_entry(info):
+                    yield info.filename, _zip_entry_loader(archive, info)
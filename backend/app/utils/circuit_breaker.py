@@ -0,0 +1,143 @@
+"""
+熔断器
+
+按最近 window_size 次调用的失败率和慢调用率决定状态：
+- closed: 正常放行，统计结果
+- open: 直接拒绝（快速失败），open_seconds 后进入 half_open
+- half_open: 放行少量探测请求，全部成功则关闭，任一失败重新打开
+"""
+import time
+from collections import deque
+from typing import Any, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开时拒绝调用"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} 暂不可用（熔断中），约 {int(retry_after) + 1}s 后重试")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """基于滑动窗口的熔断器（单进程、单事件循环内使用）"""
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        min_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        slow_call_ms: int = 10000,
+        slow_call_rate_threshold: float = 0.8,
+        open_seconds: float = 30,
+        half_open_max_calls: int = 2
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_ms = slow_call_ms
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._outcomes: deque = deque(maxlen=window_size)  # (failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self.open_count = 0
+
+    @property
+    def state(self) -> str:
+        """当前状态（open 超时后自动转为 half_open）"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+        return self._state
+
+    def retry_after(self) -> float:
+        """距离进入 half_open 的秒数"""
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def allow_request(self) -> bool:
+        """是否放行本次调用（half_open 时占用一个探测名额）"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+            self._half_open_in_flight += 1
+            return True
+        return False
+
+    def check(self) -> None:
+        """放行或抛出 CircuitOpenError"""
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+
+    def record_success(self, duration_ms: float = 0) -> None:
+        """记录一次成功调用（耗时超过阈值记为慢调用）"""
+        slow = duration_ms >= self.slow_call_ms
+        if self._state == HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if slow:
+                self._open()
+                return
+            self._half_open_successes += 1
+            if self._half_open_successes >= self.half_open_max_calls:
+                self._close()
+            return
+        self._record(False, slow)
+
+    def record_failure(self) -> None:
+        """记录一次失败调用"""
+        if self._state == HALF_OPEN:
+            self._open()
+            return
+        self._record(True, False)
+
+    def release(self) -> None:
+        """调用被取消时归还 half_open 探测名额"""
+        if self._state == HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        self._outcomes.append((failed, slow))
+        if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+
+        total = len(self._outcomes)
+        failure_rate = sum(1 for f, _ in self._outcomes if f) / total
+        slow_rate = sum(1 for _, s in self._outcomes if s) / total
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.open_count += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._outcomes.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前状态（供 /health 展示）"""
+        state = self.state
+        total = len(self._outcomes)
+        return {
+            "state": state,
+            "failure_rate": round(sum(1 for f, _ in self._outcomes if f) / total, 4) if total else 0.0,
+            "slow_call_rate": round(sum(1 for _, s in self._outcomes if s) / total, 4) if total else 0.0,
+            "window_calls": total,
+            "retry_after_seconds": round(self.retry_after(), 1),
+            "open_count": self.open_count
+        }
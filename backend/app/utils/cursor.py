@@ -0,0 +1,32 @@
+"""
+分页游标编解码
+
+游标对客户端不透明：base64url 编码的 [created_at, id]
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+from app.core.exceptions import ValidationException
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """把排序键编码为游标"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    解码游标
+
+    Raises:
+        ValidationException: 游标格式无效
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValidationException("无效的分页游标") from e
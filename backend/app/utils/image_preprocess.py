@@ -0,0 +1,237 @@
+"""
+OCR 前的图片预处理
+
+手机拍摄的试卷照片通常是 4–12 MP 的 JPEG，原样 base64 上传既慢又容易超过大小限制。
+预处理依次执行：
+- decode: 解码（JPEG 使用 draft 模式按目标尺寸直接缩小解码）
+- rotate: 按 EXIF Orientation 旋转
+- resize: 长边缩放到 OCR 合适的分辨率
+- grayscale: 转为灰度
+- encode: 重新压缩为 JPEG
+
+WebP / HEIC 在这里转码为 JPEG（HEIC 需要安装 pillow-heif）。
+预处理是 CPU 密集操作，在 ProcessPoolExecutor 中执行，不阻塞事件循环；
+子进程直接读写文件，主进程不持有图片数据。
+"""
+import asyncio
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.logger import logger
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow 未安装时禁用预处理
+    Image = None
+    ImageOps = None
+
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    HEIF_SUPPORTED = True
+except ImportError:
+    HEIF_SUPPORTED = False
+
+settings = get_settings()
+
+# 百度 OCR 直接支持的格式，其余格式必须转码
+OCR_NATIVE_FORMATS = {'JPEG', 'PNG'}
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def preprocess_image(
+    image_bytes: bytes,
+    max_side: int = 2048,
+    jpeg_quality: int = 85,
+    grayscale: bool = True
+) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    预处理图片（在子进程中执行）
+
+    Args:
+        image_bytes: 原始图片
+        max_side: 输出长边上限（像素）
+        jpeg_quality: JPEG 压缩质量
+        grayscale: 是否转为灰度
+
+    Returns:
+        (处理后的图片, 统计信息)。处理后比原图更大且无需旋转/缩放/转码时返回原图
+    """
+    if Image is None:
+        raise RuntimeError("图片预处理需要安装 Pillow")
+
+    timings: Dict[str, float] = {}
+    total_start = time.perf_counter()
+
+    # 1. 解码
+    start = time.perf_counter()
+    img = Image.open(io.BytesIO(image_bytes))
+    source_format = img.format
+    original_size = img.size
+    if source_format == 'JPEG' and max(img.size) > max_side:
+        ratio = max_side / max(img.size)
+        img.draft('L' if grayscale else 'RGB', (int(img.width * ratio) + 1, int(img.height * ratio) + 1))
+    img.load()
+    timings['decode'] = _elapsed_ms(start)
+
+    # 2. EXIF 旋转
+    start = time.perf_counter()
+    orientation = img.getexif().get(0x0112, 1)
+    if orientation != 1:
+        img = ImageOps.exif_transpose(img)
+    timings['rotate'] = _elapsed_ms(start)
+
+    # 3. 缩放
+    start = time.perf_counter()
+    if max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+    timings['resize'] = _elapsed_ms(start)
+
+    # 4. 灰度（透明背景先铺白底）
+    start = time.perf_counter()
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    img = img.convert('L' if grayscale else 'RGB')
+    timings['grayscale'] = _elapsed_ms(start)
+
+    # 5. 重新压缩
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=jpeg_quality, optimize=True)
+    output = buffer.getvalue()
+    timings['encode'] = _elapsed_ms(start)
+
+    kept_original = (
+        len(output) >= len(image_bytes)
+        and source_format in OCR_NATIVE_FORMATS
+        and orientation == 1
+        and img.size == original_size
+    )
+    if kept_original:
+        output = image_bytes
+
+    timings['total'] = _elapsed_ms(total_start)
+    stats = {
+        'source_format': source_format,
+        'original_bytes': len(image_bytes),
+        'output_bytes': len(output),
+        'saved_bytes': len(image_bytes) - len(output),
+        'original_size': list(original_size),
+        'output_size': list(original_size if kept_original else img.size),
+        'exif_orientation': orientation,
+        'kept_original': kept_original,
+        'timings_ms': timings
+    }
+    return output, stats
+
+
+def preprocess_image_file(
+    src_path: str,
+    dst_path: str,
+    max_side: int = 2048,
+    jpeg_quality: int = 85,
+    grayscale: bool = True
+) -> Dict[str, Any]:
+    """
+    预处理磁盘上的图片并写入 dst_path（在子进程中执行）
+
+    Returns:
+        统计信息（同 preprocess_image）
+    """
+    with open(src_path, 'rb') as f:
+        image_bytes = f.read()
+
+    output, stats = preprocess_image(image_bytes, max_side, jpeg_quality, grayscale)
+
+    with open(dst_path, 'wb') as f:
+        f.write(output)
+    return stats
+
+
+class ImagePreprocessor:
+    """基于进程池的图片预处理器（进程级单例）"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_side: Optional[int] = None,
+        jpeg_quality: Optional[int] = None,
+        grayscale: Optional[bool] = None
+    ):
+        self.workers = workers or settings.ocr_preprocess_workers
+        self.max_side = max_side or settings.ocr_preprocess_max_side
+        self.jpeg_quality = jpeg_quality or settings.ocr_preprocess_jpeg_quality
+        self.grayscale = settings.ocr_preprocess_grayscale if grayscale is None else grayscale
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def fingerprint(self) -> Dict[str, str]:
+        """预处理参数（并入 OCR 参数集指纹，参数变化后缓存不再命中）"""
+        return {
+            'preprocess': f"{self.max_side}/{self.jpeg_quality}/{'L' if self.grayscale else 'RGB'}"
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            logger.info(f"图片预处理进程池已启动: workers={self.workers}")
+        return self._executor
+
+    async def process_bytes(self, image_bytes: bytes) -> Tuple[bytes, Dict[str, Any]]:
+        """预处理内存中的图片"""
+        start = time.perf_counter()
+        output, stats = await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), preprocess_image,
+            image_bytes, self.max_side, self.jpeg_quality, self.grayscale
+        )
+        stats['timings_ms']['wall'] = _elapsed_ms(start)
+        return output, stats
+
+    async def process_file(self, src_path: str, dst_path: str) -> Dict[str, Any]:
+        """预处理磁盘上的图片，结果写入 dst_path"""
+        start = time.perf_counter()
+        stats = await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), preprocess_image_file,
+            src_path, dst_path, self.max_side, self.jpeg_quality, self.grayscale
+        )
+        stats['timings_ms']['wall'] = _elapsed_ms(start)
+        return stats
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_preprocessor: Optional[ImagePreprocessor] = None
+
+
+def get_image_preprocessor() -> Optional[ImagePreprocessor]:
+    """获取图片预处理器；未启用或未安装 Pillow 时返回 None"""
+    global _preprocessor
+    if not settings.ocr_preprocess_enabled:
+        return None
+    if Image is None:
+        logger.warning("已启用图片预处理，但未安装 Pillow，跳过预处理")
+        return None
+    if _preprocessor is None:
+        _preprocessor = ImagePreprocessor()
+    return _preprocessor
+
+
+def shutdown_image_preprocessor() -> None:
+    """关闭共享的预处理进程池（应用关闭时调用）"""
+    global _preprocessor
+    if _preprocessor is not None:
+        _preprocessor.shutdown()
+        _preprocessor = None
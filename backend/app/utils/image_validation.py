@@ -0,0 +1,83 @@
+"""
+上传图片校验
+"""
+from app.core.config import get_settings
+from app.core.exceptions import ValidationException
+
+# 文件头（magic bytes）
+JPEG_HEADER = b'\xff\xd8\xff'
+PNG_HEADER = b'\x89\x50\x4e\x47'
+WEBP_HEADER = (b'RIFF', b'WEBP')  # RIFF....WEBP
+HEIC_BRANDS = (b'heic', b'heix', b'hevc', b'hevx', b'mif1', b'msf1')  # ....ftyp<brand>
+
+# 判断格式至少需要的字节数
+MIN_IMAGE_SIZE = 8
+# 识别格式时读取的文件头长度
+HEADER_PROBE_SIZE = 12
+
+
+def max_upload_size() -> int:
+    """上传大小上限（启用预处理时允许更大的原图，缩放后再识别）"""
+    settings = get_settings()
+    if settings.ocr_preprocess_enabled:
+        return max(settings.max_file_size, settings.ocr_preprocess_max_file_size)
+    return settings.max_file_size
+
+
+def validate_image_size(size: int) -> None:
+    """
+    校验图片大小上限（流式上传时每收到一块调用一次）
+
+    Raises:
+        ValidationException: 文件过大
+    """
+    limit = max_upload_size()
+    if size > limit:
+        raise ValidationException(
+            f"文件大小超过限制 (最大 {limit // 1024 // 1024}MB)"
+        )
+
+
+def _is_transcodable(header: bytes) -> bool:
+    """WebP / HEIC（需要预处理转码后才能识别）"""
+    if header[:4] == WEBP_HEADER[0] and header[8:12] == WEBP_HEADER[1]:
+        return True
+    return header[4:8] == b'ftyp' and header[8:12] in HEIC_BRANDS
+
+
+def validate_image_header(header: bytes) -> None:
+    """
+    根据文件头校验图片格式
+
+    Args:
+        header: 文件开头的若干字节（至少 8 字节，识别 WebP/HEIC 需要 12 字节）
+
+    Raises:
+        ValidationException: 文件过小或格式不支持
+    """
+    if len(header) < MIN_IMAGE_SIZE:
+        raise ValidationException("图片文件无效")
+
+    if header.startswith(JPEG_HEADER) or header.startswith(PNG_HEADER):
+        return
+
+    if get_settings().ocr_preprocess_enabled:
+        if _is_transcodable(header):
+            return
+        raise ValidationException("不支持的图片格式，仅支持 JPG、PNG、WebP 和 HEIC")
+
+    raise ValidationException("不支持的图片格式，仅支持 JPG 和 PNG")
+
+
+def validate_image_bytes(image_bytes: bytes) -> None:
+    """
+    校验图片大小与文件头
+
+    Args:
+        image_bytes: 图片二进制数据
+
+    Raises:
+        ValidationException: 文件过大、过小或格式不支持
+    """
+    validate_image_size(len(image_bytes))
+    validate_image_header(image_bytes[:HEADER_PROBE_SIZE])
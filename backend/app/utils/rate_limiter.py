@@ -0,0 +1,100 @@
+"""
+限流与退避工具
+
+- TokenBucket: 令牌桶，按购买的 QPS 平滑请求
+- AIMDConcurrencyLimiter: 加性增、乘性减的自适应并发上限
+- backoff_delay: 带抖动的指数退避
+"""
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    第 attempt 次重试前的等待时间（指数退避 + 抖动）
+
+    取值范围为 [上限/2, 上限]，上限 = min(cap, base * 2^(attempt-1))
+    """
+    ceiling = min(cap, base * (2 ** max(0, attempt - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class TokenBucket:
+    """
+    异步令牌桶
+
+    rate 为每秒补充的令牌数（QPS），capacity 为允许的突发量；rate <= 0 表示不限流。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """获取一个令牌，不足时排队等待（先到先得）"""
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AIMDConcurrencyLimiter:
+    """
+    自适应并发限制器（AIMD）
+
+    - 请求成功：上限每轮增加约 1（每次 +1/limit）
+    - 遇到限流或服务端错误：上限乘以 decrease_factor
+    超出上限的请求排队等待，而不是直接失败。
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        decrease_factor: float = 0.5
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self) -> "AIMDConcurrencyLimiter":
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        """加性增"""
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_overload(self) -> None:
+        """乘性减"""
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前状态"""
+        return {"limit": round(self.limit, 2), "in_flight": self.in_flight}
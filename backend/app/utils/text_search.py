@@ -0,0 +1,178 @@
+"""
+中文数学题全文检索的分词与摘要
+
+SQLite FTS5 自带的 unicode61 分词器把连续汉字视为一个词，无法检索子串。
+这里在写入索引前把文本切成「字符二元组」（bigram）并以空格分隔，
+FTS5 只需按空格切分；查询词用同样方式切分后组成短语查询，
+相邻 bigram 必须连续出现，等价于子串匹配。
+PostgreSQL 下同一索引文本用 'simple' 配置生成 tsvector，查询转换为等价的 tsquery。
+
+- 汉字串: 相邻两字组成 bigram，串尾单字额外保留（支持单字前缀查询）
+- 英文/数字: 整词小写，查询时按前缀匹配（便于边输入边搜索）
+- 其他符号不入索引
+
+相关度在数据库中计算（SQLite FTS5 bm25()、PostgreSQL ts_rank，见 app.models.problem_search），
+bm25_scores 只在没有全文索引的数据库上使用。
+"""
+import html
+import math
+import re
+from typing import List, Optional, Tuple
+
+_CJK = r'\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_RE = re.compile(f'([{_CJK}]+)|([A-Za-z0-9]+)')
+
+
+def _cjk_bigrams(run: str) -> List[str]:
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize_for_index(text: Optional[str]) -> str:
+    """
+    把原文转换为写入 FTS5 的索引文本（空格分隔的 token）
+
+    Args:
+        text: 题目原文
+
+    Returns:
+        索引文本
+    """
+    tokens: List[str] = []
+    for cjk, word in _TOKEN_RE.findall(text or ''):
+        if cjk:
+            tokens.extend(_cjk_bigrams(cjk))
+            if len(cjk) > 1:
+                tokens.append(cjk[-1])
+        else:
+            tokens.append(word.lower())
+    return ' '.join(tokens)
+
+
+def search_terms(keyword: str) -> List[str]:
+    """查询关键词中参与匹配的片段（汉字串或英文/数字词）"""
+    return [cjk or word for cjk, word in _TOKEN_RE.findall(keyword or '')]
+
+
+def build_match_query(keyword: str) -> Optional[str]:
+    """
+    把用户输入转换为 FTS5 MATCH 表达式（各片段之间为 AND）
+
+    Args:
+        keyword: 用户输入
+
+    Returns:
+        MATCH 表达式；没有可检索的片段时返回 None
+    """
+    parts = []
+    for term in search_terms(keyword):
+        if _TOKEN_RE.fullmatch(term).group(1):
+            if len(term) == 1:
+                # 单字：匹配以该字开头的 bigram 或串尾单字
+                parts.append(f'"{term}"*')
+            else:
+                parts.append('"' + ' '.join(_cjk_bigrams(term)) + '"')
+        else:
+            parts.append(f'"{term.lower()}"*')
+    return ' AND '.join(parts) if parts else None
+
+
+def build_tsquery(keyword: str) -> Optional[str]:
+    """
+    把用户输入转换为 PostgreSQL tsquery 表达式（与 build_match_query 语义相同）
+
+    短语用 <-> 连接相邻 bigram，前缀匹配用 :*，片段之间为 &
+
+    Args:
+        keyword: 用户输入
+
+    Returns:
+        tsquery 表达式；没有可检索的片段时返回 None
+    """
+    parts = []
+    for term in search_terms(keyword):
+        if _TOKEN_RE.fullmatch(term).group(1):
+            if len(term) == 1:
+                parts.append(f"'{term}':*")
+            else:
+                parts.append('(' + ' <-> '.join(f"'{bigram}'" for bigram in _cjk_bigrams(term)) + ')')
+        else:
+            parts.append(f"'{term.lower()}':*")
+    return ' & '.join(parts) if parts else None
+
+
+def bm25_scores(documents: List[str], keyword: str, k1: float = 1.2, b: float = 0.75) -> List[float]:
+    """
+    在候选集合内计算 BM25 分数（越大越相关，没有全文索引时使用）
+
+    词频按原文子串出现次数统计，文档频率和平均长度取自候选集合本身
+
+    Args:
+        documents: 候选文本
+        keyword: 用户输入
+        k1: 词频饱和参数
+        b: 长度归一化参数
+
+    Returns:
+        与 documents 一一对应的分数
+    """
+    terms = [t.lower() for t in search_terms(keyword)]
+    if not documents or not terms:
+        return [0.0] * len(documents)
+
+    lowered = [d.lower() for d in documents]
+    avg_length = sum(len(d) for d in lowered) / len(lowered) or 1.0
+    n = len(lowered)
+
+    frequencies = [[d.count(t) for t in terms] for d in lowered]
+    idf = []
+    for i in range(len(terms)):
+        df = sum(1 for f in frequencies if f[i])
+        idf.append(math.log((n - df + 0.5) / (df + 0.5) + 1))
+
+    scores = []
+    for d, freqs in zip(lowered, frequencies):
+        norm = k1 * (1 - b + b * len(d) / avg_length)
+        scores.append(sum(w * tf * (k1 + 1) / (tf + norm) for w, tf in zip(idf, freqs) if tf))
+    return scores
+
+
+def highlight_snippet(
+    text: str,
+    keyword: str,
+    width: int = 80,
+    marks: Tuple[str, str] = ('<mark>', '</mark>')
+) -> str:
+    """
+    生成带高亮的摘要（HTML 转义后用 marks 包裹命中片段）
+
+    Args:
+        text: 题目原文
+        keyword: 用户输入
+        width: 摘要长度（字符）
+        marks: 高亮起止标签
+
+    Returns:
+        摘要 HTML
+    """
+    terms = sorted({t for t in search_terms(keyword)}, key=len, reverse=True)
+    if not terms:
+        return html.escape(text[:width])
+
+    pattern = re.compile('|'.join(re.escape(t) for t in terms), re.IGNORECASE)
+    first = pattern.search(text)
+    start = 0
+    if first and first.start() > width // 3:
+        start = first.start() - width // 3
+    end = min(len(text), start + width)
+
+    pieces = []
+    cursor = start
+    for match in pattern.finditer(text, start, end):
+        pieces.append(html.escape(text[cursor:match.start()]))
+        pieces.append(marks[0] + html.escape(match.group()) + marks[1])
+        cursor = match.end()
+    pieces.append(html.escape(text[cursor:end]))
+
+    return ('…' if start > 0 else '') + ''.join(pieces) + ('…' if end < len(text) else '')
@@ -0,0 +1,147 @@
+"""
+流式上传落盘
+
+上传文件按块读取并写入上传目录下的临时文件：
+- 每收到一块就检查大小上限，超限立即中止
+- 第一块到达时校验文件头（magic bytes）
+- 边写边计算 SHA-256，不再对整张图片做第二次遍历
+
+识别成功后临时文件通过 os.replace 原子地移动到 uploads/ocr/YYYY/MM/DD/，
+不再重新写一遍图片；单次上传的内存占用与图片大小无关。
+"""
+import hashlib
+import os
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import UploadFile
+
+from app.core.config import get_settings
+from app.utils.image_validation import HEADER_PROBE_SIZE, validate_image_header, validate_image_size
+
+# 单次读取的块大小
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# 临时文件目录（与正式目录位于同一文件系统，保证 os.replace 原子）
+SPOOL_DIR_NAME = ".spool"
+
+
+def allocate_image_path(filename: str) -> Tuple[str, str]:
+    """
+    为新图片分配保存路径: uploads/ocr/YYYY/MM/DD/<时间戳>_<随机串><扩展名>
+
+    Args:
+        filename: 原始文件名（只取扩展名）
+
+    Returns:
+        (绝对路径, 入库用的相对路径)
+    """
+    settings = get_settings()
+
+    now = datetime.now()
+    date_dir = now.strftime("%Y/%m/%d")
+    save_dir = os.path.join(settings.upload_path, "ocr", date_dir)
+    os.makedirs(save_dir, exist_ok=True)
+
+    ext = os.path.splitext(filename or "")[1]
+    unique_filename = f"{now.timestamp()}_{uuid.uuid4().hex[:8]}{ext}"
+
+    abs_path = os.path.join(save_dir, unique_filename)
+    rel_path = os.path.join("uploads", "ocr", date_dir, unique_filename).replace("\\", "/")
+    return abs_path, rel_path
+
+
+def new_spool_path(suffix: str = ".part") -> str:
+    """在临时目录中分配一个新文件路径"""
+    spool_dir = os.path.join(get_settings().upload_path, SPOOL_DIR_NAME)
+    os.makedirs(spool_dir, exist_ok=True)
+    return os.path.join(spool_dir, f"{uuid.uuid4().hex}{suffix}")
+
+
+class SpooledImage:
+    """已落盘到临时文件的上传图片"""
+
+    def __init__(self, filename: str, temp_path: str, size: int, content_hash: str):
+        self.filename = filename
+        self.temp_path = temp_path
+        self.size = size
+        self.content_hash = content_hash
+        # 持久化后的相对路径 / 绝对路径
+        self.file_path: Optional[str] = None
+        self._abs_path: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        """当前图片所在的绝对路径（持久化前为临时文件）"""
+        return self._abs_path or self.temp_path
+
+    def persist(self) -> str:
+        """
+        把临时文件原子地移动到正式目录（重复调用返回同一路径）
+
+        Returns:
+            入库用的相对路径
+        """
+        if self.file_path is None:
+            abs_path, rel_path = allocate_image_path(self.filename)
+            os.replace(self.temp_path, abs_path)
+            self._abs_path = abs_path
+            self.file_path = rel_path
+        return self.file_path
+
+    def discard(self) -> None:
+        """删除未持久化的临时文件（已持久化时不做任何事）"""
+        if self.file_path is None:
+            try:
+                os.remove(self.temp_path)
+            except FileNotFoundError:
+                pass
+
+
+async def spool_upload(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> SpooledImage:
+    """
+    把上传文件流式写入临时文件，同时校验并计算哈希
+
+    Args:
+        file: 上传文件
+        chunk_size: 单次读取的字节数
+
+    Returns:
+        SpooledImage（调用方负责 persist 或 discard）
+
+    Raises:
+        ValidationException: 文件过大、过小或格式不支持（临时文件会被删除）
+    """
+    temp_path = new_spool_path()
+    digest = hashlib.sha256()
+    size = 0
+    header = b''
+
+    try:
+        with open(temp_path, 'wb') as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                validate_image_size(size)
+
+                if len(header) < HEADER_PROBE_SIZE:
+                    header += chunk[:HEADER_PROBE_SIZE - len(header)]
+                    if len(header) >= HEADER_PROBE_SIZE:
+                        validate_image_header(header)
+
+                digest.update(chunk)
+                out.write(chunk)
+
+        # 文件不足 12 字节时在这里校验
+        validate_image_header(header)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return SpooledImage(file.filename or "", temp_path, size, digest.hexdigest())
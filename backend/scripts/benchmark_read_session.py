@@ -0,0 +1,133 @@
+"""
+只读会话对比压测
+
+在同一数据库上分别用写会话（与 get_db 相同：查询后 commit）和只读会话
+（get_read_db：AUTOCOMMIT，不 flush、不提交）执行 GET 接口对应的查询，
+输出每次请求的平均延迟、分位数和连接占用时间，量化只读会话的节省。
+
+用法:
+    python scripts/benchmark_read_session.py [--database-url URL] [--requests 2000] [--concurrency 1]
+
+默认使用配置中的 DATABASE_URL；数据库需已有题目（可先运行 scripts/benchmark_backends.py 写入合成题库）。
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import get_settings
+from app.core.database import (
+    ConnectionHoldStats, apply_sqlite_profile, create_read_engine, engine_options, is_file_sqlite,
+    make_read_session_maker
+)
+from app.services.problem_service import ProblemService
+from ocr_load_test import percentile
+
+# (名称, 查询)：与 GET /problems、GET /problems/stats、GET /problems/{id} 的服务调用一致
+QUERIES: Dict[str, Callable[[AsyncSession], Awaitable]] = {
+    "problems": lambda db: ProblemService(db).get_problems_by_cursor(size=20),
+    "stats": lambda db: ProblemService(db).get_problem_stats(),
+}
+
+
+async def with_write_session(session_maker, query) -> None:
+    """与 get_db 相同的会话用法"""
+    async with session_maker() as session:
+        try:
+            await query(session)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def with_read_session(session_maker, query) -> None:
+    """与 get_read_db 相同的会话用法"""
+    async with session_maker() as session:
+        await query(session)
+
+
+async def measure(run_one, requests: int, concurrency: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await run_one(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": requests / elapsed,
+        "mean": sum(latencies) / len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+    }
+
+
+async def run(args) -> None:
+    # 与应用相同的引擎配置：文件型 SQLite 在 production 配置下读写分池
+    engine = create_async_engine(args.database_url, **engine_options(args.database_url))
+    read_engine = engine
+    if is_file_sqlite(args.database_url) and get_settings().sqlite_profile == "production":
+        apply_sqlite_profile(engine.sync_engine)
+        read_engine = create_read_engine(args.database_url)
+
+    hold_stats = ConnectionHoldStats().attach(engine.sync_engine)
+    if read_engine is not engine:
+        hold_stats.attach(read_engine.sync_engine)
+    modes = {
+        "write": (with_write_session, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)),
+        "read": (with_read_session, make_read_session_maker(read_engine)),
+    }
+
+    print(f"数据库: {engine.url.render_as_string(hide_password=True)}, "
+          f"请求数: {args.requests}, 并发: {args.concurrency}\n")
+    print(f"{'查询':<10}{'会话':<8}{'req/s':>10}{'mean(ms)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'占用连接(ms)':>14}")
+    try:
+        for name, query in QUERIES.items():
+            results = {}
+            for mode, (use_session, session_maker) in modes.items():
+                async def run_one(i: int) -> None:
+                    await use_session(session_maker, query)
+
+                # 预热连接池和语句缓存
+                await measure(run_one, min(50, args.requests), args.concurrency)
+                hold_stats.checkouts, hold_stats.total_ms = 0, 0.0
+                stats = await measure(run_one, args.requests, args.concurrency)
+                stats["hold"] = hold_stats.snapshot()["avg_hold_ms"]
+                results[mode] = stats
+                print(
+                    f"{name:<10}{mode:<8}{stats['rps']:>10.0f}{stats['mean']:>10.3f}"
+                    f"{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['hold']:>14.3f}"
+                )
+
+            saved = results["write"]["mean"] - results["read"]["mean"]
+            print(f"{'':<10}只读会话每次请求节省 {saved:.3f}ms ({saved / results['write']['mean'] * 100:.1f}%)\n")
+    finally:
+        if read_engine is not engine:
+            await read_engine.dispose()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="写会话 / 只读会话对比压测")
+    parser.add_argument("--database-url", default=get_settings().database_url)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
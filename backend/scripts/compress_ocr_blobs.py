@@ -0,0 +1,117 @@
+"""
+OCR 大字段压缩迁移脚本
+
+把 ocr_records.raw_json 和 problems.parsed_data 中迁移前的明文 JSON（带缩进）
+转换为紧凑 JSON + zlib 压缩格式。
+
+按主键分批流式处理，每批一个事务，可随时中断后重新执行（已压缩的行自动跳过）。
+SQLite 下可加 --vacuum 回收空间。
+
+用法:
+    python scripts/compress_ocr_blobs.py [--batch-size 500] [--vacuum]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from typing import Dict
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.database import engine, init_db
+from app.core.logger import logger
+from app.models.types import compact_json, encode_json_blob
+
+# (表名, 列名)
+BLOB_COLUMNS = [
+    ("ocr_records", "raw_json"),
+    ("problems", "parsed_data"),
+]
+
+
+async def compress_column(db_engine: AsyncEngine, table: str, column: str, batch_size: int = 500) -> Dict[str, int]:
+    """
+    分批压缩一列中的明文 JSON
+
+    Args:
+        db_engine: 数据库引擎
+        table: 表名
+        column: 列名
+        batch_size: 每批行数
+
+    Returns:
+        统计: rows（转换行数）、before/after（转换前后字节数）、invalid（无法解析的行）
+    """
+    stats = {"rows": 0, "before": 0, "after": 0, "invalid": 0}
+    last_id = 0
+
+    while True:
+        async with db_engine.begin() as conn:
+            rows = (await conn.execute(
+                text(
+                    f"SELECT id, {column} FROM {table} "
+                    f"WHERE id > :last_id AND {column} IS NOT NULL ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": batch_size}
+            )).all()
+            if not rows:
+                break
+
+            updates = []
+            for row_id, value in rows:
+                # 已压缩的行为二进制，跳过
+                if not isinstance(value, str):
+                    continue
+                try:
+                    blob = encode_json_blob(compact_json(value))
+                except ValueError:
+                    stats["invalid"] += 1
+                    blob = encode_json_blob(value)
+                stats["before"] += len(value.encode("utf-8"))
+                stats["after"] += len(blob)
+                updates.append({"id": row_id, "value": blob})
+
+            if updates:
+                await conn.execute(
+                    text(f"UPDATE {table} SET {column} = :value WHERE id = :id"), updates
+                )
+            stats["rows"] += len(updates)
+            last_id = rows[-1][0]
+
+        logger.info(f"{table}.{column}: 已处理到 id={last_id}, 累计转换 {stats['rows']} 行")
+
+    return stats
+
+
+async def main(batch_size: int, vacuum: bool) -> None:
+    await init_db()
+
+    for table, column in BLOB_COLUMNS:
+        stats = await compress_column(engine, table, column, batch_size)
+        saved = stats["before"] - stats["after"]
+        print(
+            f"{table}.{column}: 转换 {stats['rows']} 行, "
+            f"{stats['before']} -> {stats['after']} bytes (节省 {saved} bytes), "
+            f"无法解析 {stats['invalid']} 行"
+        )
+
+    if vacuum and engine.dialect.name == "sqlite":
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM"))
+        print("VACUUM 完成")
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="压缩 OCR 原始 JSON 与题目解析数据")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--vacuum", action="store_true", help="SQLite 下迁移后执行 VACUUM 回收空间")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.batch_size, args.vacuum))
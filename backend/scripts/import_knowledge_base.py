@@ -0,0 +1,49 @@
+"""
+导入知识体系课程文件
+
+读取 knowledge_base/*.json（或指定的目录 / 文件），与数据库现状比对后
+只写入新增、变化和删除的节点，每份课程一个事务。内容未变时不写库，可重复执行。
+
+注意：运行中的服务进程有自己的快照缓存和补全索引，
+脚本导入后需重启服务，或改用 POST /api/v1/knowledge/import 在服务内导入。
+
+用法:
+    python scripts/import_knowledge_base.py [路径] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker, engine, init_db
+from app.services.knowledge_importer import KnowledgeImporter
+
+
+async def main(path: str, dry_run: bool) -> None:
+    await init_db()
+
+    async with async_session_maker() as session:
+        reports = await KnowledgeImporter(session).import_path(path, dry_run=dry_run)
+
+    for report in reports:
+        print(f"[{report.source}] {report.summary()}")
+        for title, changes in (("新增", report.created), ("更新", report.updated), ("删除", report.deleted)):
+            for level, codes in changes.items():
+                if codes:
+                    print(f"  {title} {level}: {', '.join(codes)}")
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="导入知识体系课程文件")
+    parser.add_argument("path", nargs="?", default=get_settings().knowledge_base_dir,
+                        help="课程文件目录或单个 JSON 文件")
+    parser.add_argument("--dry-run", action="store_true", help="只比对并报告变化，不写入")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.path, args.dry_run))
@@ -0,0 +1,207 @@
+"""
+本地 mock 百度 OCR 服务
+
+用于离线压测与 CI：实现鉴权接口和教育场景识别接口，回放语料库中录制的真实响应，
+可配置延迟分布、错误率和 QPS 配额拒绝率。
+
+- 回放：同一张图片（按 SHA-256）总是得到同一条语料，log_id 每次重新生成
+- 延迟：fixed:<ms> | uniform:<min_ms>,<max_ms> | normal:<mean_ms>,<std_ms> | lognormal:<median_ms>,<sigma>
+- 故障：--error-rate 按比例返回 HTTP 500 / 错误码 282000；--quota-rate 按比例返回错误码 18
+- 录制：--record 时把请求原样转发到 --upstream（真实百度），并把成功响应写入语料库
+
+用法:
+    python scripts/mock_ocr_server.py --port 8900 --latency lognormal:800,0.4 --error-rate 0.02 --quota-rate 0.05
+    python scripts/mock_ocr_server.py --record --port 8900
+
+后端 .env 中设置 BAIDU_OCR_BASE_URL=http://127.0.0.1:8900 即可使用（API Key 可任意填写）。
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import random
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.utils.baidu_ocr import TOKEN_PATH, PAPER_CUT_EDU_PATH
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_corpus")
+DEFAULT_UPSTREAM = "https://aip.baidubce.com"
+
+
+class LatencyModel:
+    """响应延迟分布"""
+
+    def __init__(self, kind: str = "fixed", params: Optional[List[float]] = None):
+        self.kind = kind
+        self.params = params or [0.0]
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """
+        解析延迟配置
+
+        Args:
+            spec: 如 fixed:200、uniform:100,500、normal:600,150、lognormal:800,0.4（单位毫秒）
+        """
+        kind, _, raw = spec.partition(":")
+        params = [float(p) for p in raw.split(",") if p.strip()]
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"无效的延迟配置: {spec}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        """采样一次延迟（秒）"""
+        if self.kind == "uniform":
+            ms = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            ms = rng.gauss(*self.params)
+        elif self.kind == "lognormal":
+            median, sigma = self.params
+            ms = median * rng.lognormvariate(0.0, sigma)
+        else:
+            ms = self.params[0]
+        return max(0.0, ms) / 1000
+
+
+@dataclass
+class MockOCRConfig:
+    """mock 服务配置"""
+    corpus_dir: str = DEFAULT_CORPUS_DIR
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0
+    quota_rate: float = 0.0
+    seed: Optional[int] = None
+    record: bool = False
+    upstream: str = DEFAULT_UPSTREAM
+
+
+def load_corpus(corpus_dir: str) -> List[Dict[str, Any]]:
+    """按文件名顺序加载语料库中的响应（只保留包含 qus_result 的成功响应）"""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if "qus_result" in data and "error_code" not in data:
+            corpus.append(data)
+    return corpus
+
+
+def create_app(config: MockOCRConfig) -> FastAPI:
+    """创建 mock OCR 服务"""
+    app = FastAPI(title="Mock Baidu OCR")
+    rng = random.Random(config.seed)
+    corpus = load_corpus(config.corpus_dir)
+    stats = {"token": 0, "requests": 0, "ok": 0, "errors": 0, "quota": 0, "recorded": 0}
+    upstream = httpx.AsyncClient(base_url=config.upstream, timeout=60) if config.record else None
+
+    if not corpus and not config.record:
+        raise ValueError(f"语料库为空: {config.corpus_dir}")
+
+    @app.on_event("shutdown")
+    async def close_upstream():
+        if upstream is not None:
+            await upstream.aclose()
+
+    @app.post(TOKEN_PATH)
+    async def token(request: Request):
+        stats["token"] += 1
+        if upstream is not None:
+            response = await upstream.post(TOKEN_PATH, params=dict(request.query_params))
+            return JSONResponse(response.json(), status_code=response.status_code)
+        return {"access_token": "mock-access-token", "expires_in": 2592000}
+
+    @app.post(PAPER_CUT_EDU_PATH)
+    async def paper_cut_edu(request: Request):
+        stats["requests"] += 1
+        body = await request.body()
+        form = await request.form()
+        image = form.get("image")
+        if not image:
+            return {"error_code": 216101, "error_msg": "param image not exist"}
+        image_hash = hashlib.sha256(image.encode("ascii")).hexdigest()
+
+        if upstream is not None:
+            return await _record(request, body, image_hash)
+
+        await asyncio.sleep(config.latency.sample(rng))
+
+        roll = rng.random()
+        if roll < config.quota_rate:
+            stats["quota"] += 1
+            return {"error_code": 18, "error_msg": "Open api qps request limit reached"}
+        if roll < config.quota_rate + config.error_rate:
+            stats["errors"] += 1
+            if rng.random() < 0.5:
+                return JSONResponse({"error": "internal server error"}, status_code=500)
+            return {"error_code": 282000, "error_msg": "internal error"}
+
+        stats["ok"] += 1
+        response = dict(corpus[int(image_hash, 16) % len(corpus)])
+        response["log_id"] = rng.getrandbits(63)
+        return response
+
+    async def _record(request: Request, body: bytes, image_hash: str):
+        """转发到真实接口并把成功响应写入语料库"""
+        response = await upstream.post(
+            PAPER_CUT_EDU_PATH,
+            params=dict(request.query_params),
+            content=body,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        data = response.json()
+        if response.status_code == 200 and "qus_result" in data and "error_code" not in data:
+            os.makedirs(config.corpus_dir, exist_ok=True)
+            path = os.path.join(config.corpus_dir, f"recorded_{image_hash[:16]}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            stats["recorded"] += 1
+        return JSONResponse(data, status_code=response.status_code)
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, "corpus_size": len(corpus)}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 mock 百度 OCR 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="语料库目录（*.json 原始响应）")
+    parser.add_argument("--latency", default="lognormal:800,0.4", help="延迟分布，单位毫秒")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="服务端错误比例")
+    parser.add_argument("--quota-rate", type=float, default=0.0, help="QPS 配额拒绝比例")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子（复现同一故障序列）")
+    parser.add_argument("--record", action="store_true", help="转发到真实接口并录制响应")
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM)
+    args = parser.parse_args()
+
+    config = MockOCRConfig(
+        corpus_dir=args.corpus,
+        latency=LatencyModel.parse(args.latency),
+        error_rate=args.error_rate,
+        quota_rate=args.quota_rate,
+        seed=args.seed,
+        record=args.record,
+        upstream=args.upstream
+    )
+
+    import uvicorn
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == '__main__':
+    main()
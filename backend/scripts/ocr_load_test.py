@@ -0,0 +1,147 @@
+"""
+OCR 上传链路压测
+
+向运行中的后端并发上传图片，统计吞吐量、成功率和延迟分位数。
+配合 scripts/mock_ocr_server.py 可在无网络环境下压测整条链路
+（上传落盘 -> 预处理 -> 限流/熔断 -> OCR -> 入库）。
+
+默认生成互不相同的 PNG 图片，避免命中识别结果缓存；--images 可指定真实图片目录。
+
+用法:
+    python scripts/mock_ocr_server.py --latency lognormal:800,0.4 --quota-rate 0.05 &
+    BAIDU_OCR_BASE_URL=http://127.0.0.1:8900 BAIDU_OCR_API_KEY=x BAIDU_OCR_SECRET_KEY=x python run.py &
+    python scripts/ocr_load_test.py --requests 200 --concurrency 16
+    python scripts/ocr_load_test.py --mode jobs --requests 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import glob
+import os
+import random
+import struct
+import time
+import zlib
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import httpx
+
+
+def make_png(width: int = 64, height: int = 64, seed: int = 0) -> bytes:
+    """生成一张内容随 seed 变化的灰度 PNG"""
+    rng = random.Random(seed)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    rows = b"".join(b"\x00" + bytes(rng.getrandbits(8) for _ in range(width)) for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def load_images(images_dir: Optional[str]) -> List[Tuple[str, bytes]]:
+    """读取图片目录（jpg/png）"""
+    images = []
+    for pattern in ("*.jpg", "*.jpeg", "*.png"):
+        for path in sorted(glob.glob(os.path.join(images_dir, pattern))):
+            with open(path, "rb") as f:
+                images.append((os.path.basename(path), f.read()))
+    if not images:
+        raise SystemExit(f"目录中没有图片: {images_dir}")
+    return images
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def upload_single(client: httpx.AsyncClient, name: str, data: bytes) -> str:
+    """同步识别接口，返回结果分类"""
+    response = await client.post("/api/v1/ocr/recognize-and-save", files={"file": (name, data, "image/png")})
+    if response.status_code != 200:
+        return f"http_{response.status_code}"
+    body = response.json()
+    if body.get("ocr_pending"):
+        return "parked"
+    if body.get("cache_hit"):
+        return "cache_hit"
+    return "ok" if body.get("success") else body.get("error_code") or "failed"
+
+
+async def upload_job(client: httpx.AsyncClient, name: str, data: bytes, poll_interval: float) -> str:
+    """异步任务接口：提交后轮询到终态，计入端到端耗时"""
+    response = await client.post("/api/v1/ocr/jobs", files={"file": (name, data, "image/png")})
+    if response.status_code != 202:
+        return f"http_{response.status_code}"
+    job_id = response.json()["job_id"]
+
+    while True:
+        await asyncio.sleep(poll_interval)
+        status = (await client.get(f"/api/v1/ocr/jobs/{job_id}")).json()["status"]
+        if status == "succeeded":
+            return "ok"
+        if status == "failed":
+            return "job_failed"
+
+
+async def run(args) -> None:
+    if args.images:
+        images = load_images(args.images)
+    else:
+        images = [(f"load_{i}.png", make_png(seed=i)) for i in range(args.requests)]
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        async def one(i: int) -> None:
+            name, data = images[i % len(images)]
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    if args.mode == "jobs":
+                        outcome = await upload_job(client, name, data, args.poll_interval)
+                    else:
+                        outcome = await upload_single(client, name, data)
+                except httpx.HTTPError as e:
+                    outcome = type(e).__name__
+                latencies.append((time.perf_counter() - start) * 1000)
+                outcomes[outcome] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    print(f"模式: {args.mode}, 请求数: {args.requests}, 并发: {args.concurrency}")
+    print(f"总耗时: {elapsed:.2f}s, 吞吐量: {args.requests / elapsed:.2f} req/s")
+    print("结果: " + ", ".join(f"{k}={v}" for k, v in outcomes.most_common()))
+    print(
+        "延迟(ms): "
+        + ", ".join(f"p{p}={percentile(latencies, p):.0f}" for p in (50, 90, 95, 99))
+        + f", max={max(latencies, default=0):.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 上传链路压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mode", choices=["single", "jobs"], default="single")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--images", default=None, help="图片目录，不指定则生成互不相同的 PNG")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
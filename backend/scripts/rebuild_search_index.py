@@ -0,0 +1,45 @@
+"""
+重建题目全文检索索引
+
+清空 problems_fts 后按 problems 分批重新分词写入，最后执行 FTS5 optimize
+（PostgreSQL 下为 ANALYZE）。
+绕过 ORM 批量修改题目内容、或调整分词规则后执行。
+
+用法:
+    python scripts/rebuild_search_index.py [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import engine, init_db
+from app.models.problem_search import rebuild_search_index
+
+
+async def main(batch_size: int) -> None:
+    await init_db()
+
+    if engine.dialect.name not in ("sqlite", "postgresql"):
+        print(f"当前数据库 ({engine.dialect.name}) 没有全文索引，无需重建")
+        await engine.dispose()
+        return
+
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        indexed = await conn.run_sync(rebuild_search_index, batch_size)
+    print(f"已重建题目全文索引: {indexed} 道题目, 耗时 {time.perf_counter() - start:.2f}s")
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="重建题目全文检索索引")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.batch_size))
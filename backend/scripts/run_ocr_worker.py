@@ -0,0 +1,48 @@
+"""
+独立的 OCR 任务 worker 进程
+
+与 API 共享同一个数据库即可消费同一个 ocr_jobs 队列，可在多台机器上同时运行。
+
+用法:
+    python scripts/run_ocr_worker.py [worker 数量]
+"""
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import init_db
+from app.core.logger import logger
+from app.services.ocr_worker import OCRWorkerPool, PendingOCRDrainer
+from app.utils.baidu_ocr import get_async_ocr_client, close_async_ocr_client
+from app.utils.image_preprocess import shutdown_image_preprocessor
+
+
+async def main(size: int):
+    """启动 worker 池直到进程被中断"""
+    await init_db()
+    await get_async_ocr_client().token_manager.start()
+
+    pool = OCRWorkerPool(size)
+    pool.start()
+    drainer = PendingOCRDrainer()
+    drainer.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+        await drainer.stop()
+        await close_async_ocr_client()
+        shutdown_image_preprocessor()
+        logger.info("OCR worker 进程已退出")
+
+
+if __name__ == '__main__':
+    worker_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+
+    try:
+        asyncio.run(main(worker_count))
+    except KeyboardInterrupt:
+        pass
@@ -3,13 +3,28 @@ pytest 配置文件
 
 提供测试固件 (fixtures)
 """
+import atexit
+import os
+import shutil
+import tempfile
+
 import pytest
 import asyncio
 from typing import AsyncGenerator, Generator
+
+# 应用模块导入时按配置创建数据库引擎和日志文件：先指向临时目录，
+# TestClient 启动流程（init_db、知识体系预热）不会修改仓库中的数据库和日志，后台任务不启动
+_TEST_DIR = tempfile.mkdtemp(prefix="mathtutor-test-")
+atexit.register(shutil.rmtree, _TEST_DIR, True)
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_TEST_DIR, 'mathtutor.db')}"
+os.environ["LOG_DIR"] = os.path.join(_TEST_DIR, "logs")
+os.environ["UPLOAD_PATH"] = os.path.join(_TEST_DIR, "uploads")
+os.environ["BAIDU_TOKEN_CACHE_PATH"] = os.path.join(_TEST_DIR, "baidu_token.json")
+os.environ["BACKGROUND_TASKS_ENABLED"] = "false"
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_read_db
 from app.main import app
 
 
@@ -68,8 +83,73 @@ async def client(db_session: AsyncSession):
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
 
     app.dependency_overrides.clear()
+
+
+# ============ OCR 测试固件 ============
+
+def make_ocr_response(text: str = "24.（10分）已知多项式 f(x)=x^2+1", qus_type: str = "3") -> dict:
+    """构造一个最小的百度教育场景识别响应"""
+    return {
+        "log_id": 1,
+        "qus_result_num": 1,
+        "qus_result": [{
+            "qus_type": qus_type,
+            "qus_probability": 0.95,
+            "qus_location": {"points": [{"x": 0, "y": 0}, {"x": 100, "y": 0},
+                                        {"x": 100, "y": 50}, {"x": 0, "y": 50}]},
+            "qus_element": [{
+                "elem_type": "0",
+                "elem_probability": 0.95,
+                "elem_word": [{"word": text, "word_type": "print"}]
+            }]
+        }]
+    }
+
+
+def make_paper_response(texts: list) -> dict:
+    """构造一个包含多道题目的整页识别响应"""
+    questions = []
+    for index, text in enumerate(texts):
+        question = make_ocr_response(text)["qus_result"][0]
+        question["qus_location"] = {"points": [{"x": 0, "y": index * 100}, {"x": 900, "y": index * 100},
+                                               {"x": 900, "y": index * 100 + 90}, {"x": 0, "y": index * 100 + 90}]}
+        questions.append(question)
+    return {"log_id": 2, "qus_result_num": len(questions), "qus_result": questions}
+
+
+@pytest.fixture(scope="function")
+def ocr_calls() -> list:
+    """记录 mock OCR 服务收到的请求路径"""
+    return []
+
+
+@pytest.fixture(scope="function")
+async def mock_ocr_client(ocr_calls, tmp_path, monkeypatch):
+    """
+    使用 httpx.MockTransport 的异步 OCR 客户端
+
+    不访问网络，token 与识别接口均返回固定结果
+    """
+    import httpx
+    from app.core.config import get_settings
+    from app.utils.baidu_ocr import AsyncBaiduOCRClient
+
+    monkeypatch.setattr(get_settings(), "baidu_token_cache_path", str(tmp_path / "token.json"))
+    monkeypatch.setattr(get_settings(), "baidu_ocr_qps", 0)
+    monkeypatch.setattr(get_settings(), "baidu_ocr_retry_base_delay", 0.001)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        ocr_calls.append(request.url.path)
+        if request.url.path.endswith("/oauth/2.0/token"):
+            return httpx.Response(200, json={"access_token": "test-token", "expires_in": 2592000})
+        return httpx.Response(200, json=make_ocr_response())
+
+    client = AsyncBaiduOCRClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield client
+    await client.aclose()
@@ -31,6 +31,33 @@ def test_get_problems_empty(client: TestClient):
     assert data["items"] == []
 
 
+def test_get_problems_cursor(client: TestClient):
+    """测试题目列表游标分页参数"""
+    response = client.get("/api/v1/problems/", params={"size": 10, "question_type": "计算"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["next_cursor"] is None
+    assert data["has_more"] is False
+
+    # 页码分页同样按知识体系节点筛选（不存在的节点不再被忽略）
+    response = client.get("/api/v1/problems/", params={"page": 1, "knowledge_node": "M99"})
+    assert response.status_code == 404
+
+    # 无效游标
+    response = client.get("/api/v1/problems/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["error_code"] == "VALIDATION_ERROR"
+
+
+def test_get_problem_stats(client: TestClient):
+    """测试题目统计接口"""
+    response = client.get("/api/v1/problems/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 0
+    assert data["by_status"] == {}
+
+
 def test_get_problem_not_found(client: TestClient):
     """测试获取不存在的题目"""
     response = client.get("/api/v1/problems/NON_EXISTENT")
@@ -64,9 +91,128 @@ def test_get_curriculums(client: TestClient):
     assert isinstance(data, list)
 
 
+def test_get_curriculums_etag(client: TestClient, monkeypatch):
+    """测试课程树快照的 ETag / 304"""
+    from app.services import knowledge_snapshot
+
+    monkeypatch.setattr(knowledge_snapshot, "_cache", None)
+
+    response = client.get("/api/v1/knowledge/curriculums")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    cached = client.get("/api/v1/knowledge/curriculums", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+
 def test_get_nonexistent_curriculum(client: TestClient):
     """测试获取不存在的课程"""
     response = client.get("/api/v1/knowledge/curriculums/99999")
     assert response.status_code == 404
     data = response.json()
     assert data["success"] is False
+
+
+def test_recognize_batch_zip(client: TestClient, mock_ocr_client, tmp_path, monkeypatch):
+    """测试批量识别：ZIP 包内逐条识别，非法条目单独报错"""
+    import io
+    import zipfile
+    import app.services.ocr_service as ocr_service_module
+    from app.core.config import get_settings
+    from app.services.ocr_cache import OCRResultCache
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    monkeypatch.setattr(ocr_service_module, "get_async_ocr_client", lambda: mock_ocr_client)
+    monkeypatch.setattr(ocr_service_module, "get_ocr_cache", lambda: OCRResultCache(enabled=False))
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("p1.png", b"\x89PNG\r\n\x1a\n page one")
+        zf.writestr("p2.jpg", b"\xff\xd8\xff\xe0 page two")
+        zf.writestr("notes.txt", b"not an image")
+        zf.writestr("__MACOSX/._p1.png", b"metadata")
+
+    response = client.post(
+        "/api/v1/ocr/recognize-batch",
+        files=[
+            ("files", ("packet.zip", buffer.getvalue(), "application/zip")),
+            ("files", ("p3.png", b"\x89PNG\r\n\x1a\n page three", "image/png")),
+        ]
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 4
+    assert data["succeeded"] == 3
+    assert data["failed"] == 1
+
+    by_name = {item["filename"]: item for item in data["items"]}
+    assert by_name["p1.png"]["quality_grade"] == "A"
+    assert by_name["p3.png"]["problem_id"].startswith("P_MATH_")
+    assert by_name["notes.txt"]["success"] is False
+    assert by_name["notes.txt"]["error"]
+
+    # 普通文件同样只读到上限 + 1 字节，超出时该条目报错
+    monkeypatch.setattr(get_settings(), "max_file_size", 64)
+    response = client.post(
+        "/api/v1/ocr/recognize-batch",
+        files=[
+            ("files", ("big.png", b"\x89PNG\r\n\x1a\n" + b"0" * 1024, "image/png")),
+            ("files", ("small.png", b"\x89PNG\r\n\x1a\n small", "image/png")),
+        ]
+    )
+    by_name = {item["filename"]: item for item in response.json()["items"]}
+    assert by_name["big.png"]["success"] is False
+    assert "文件大小超过限制" in by_name["big.png"]["error"]
+    assert by_name["small.png"]["success"] is True
+
+
+def test_create_ocr_job(client: TestClient, tmp_path, monkeypatch):
+    """测试异步识别：上传返回 202 并可查询任务状态"""
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+
+    response = client.post(
+        "/api/v1/ocr/jobs",
+        files={"file": ("a.png", b"\x89PNG\r\n\x1a\n async upload", "image/png")}
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    status_response = client.get(f"/api/v1/ocr/jobs/{job_id}")
+    assert status_response.status_code == 200
+    assert status_response.json()["status"] in ("queued", "running", "succeeded")
+
+    assert client.get("/api/v1/ocr/jobs/unknown").status_code == 404
+
+
+def test_recognize_and_save_streams_upload(client: TestClient, mock_ocr_client, tmp_path, monkeypatch):
+    """测试单张识别：上传分块落盘后原子移动，超限上传不留临时文件"""
+    import os
+    import app.services.ocr_service as ocr_service_module
+    from app.core.config import get_settings
+    from app.services.ocr_cache import OCRResultCache
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "max_file_size", 1024)
+    monkeypatch.setattr(ocr_service_module, "get_async_ocr_client", lambda: mock_ocr_client)
+    monkeypatch.setattr(ocr_service_module, "get_ocr_cache", lambda: OCRResultCache(enabled=False))
+
+    image = b"\x89PNG\r\n\x1a\n" + b"x" * 500
+    response = client.post("/api/v1/ocr/recognize-and-save", files={"file": ("a.png", image, "image/png")})
+    assert response.status_code == 200
+    assert response.json()["success"] is True
+
+    record = client.get(f"/api/v1/ocr/records/{response.json()['ocr_record_id']}").json()
+    saved = os.path.join(str(tmp_path), record["file_path"][len("uploads/"):])
+    with open(saved, "rb") as f:
+        assert f.read() == image
+
+    too_large = client.post(
+        "/api/v1/ocr/recognize-and-save",
+        files={"file": ("big.png", b"\x89PNG\r\n\x1a\n" + b"x" * 2048, "image/png")}
+    )
+    assert too_large.status_code == 400
+    assert os.listdir(tmp_path / ".spool") == []
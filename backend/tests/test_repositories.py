@@ -5,7 +5,7 @@ import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repositories.problem_repository import ProblemRepository
-from app.models.problem import Problem
+from app.models.problem import Problem, ProblemKnowledgePoint
 
 
 @pytest.mark.asyncio
@@ -128,3 +128,396 @@ async def test_problem_repository_pagination(db_session: AsyncSession):
     assert len(result["items"]) == 10
     assert result["page"] == 1
     assert result["pages"] == 3
+
+
+@pytest.mark.asyncio
+async def test_problem_repository_cursor_pagination(db_session: AsyncSession):
+    """测试游标分页：同一时间戳的行不重不漏，筛选条件生效"""
+    from datetime import datetime, timedelta
+
+    repo = ProblemRepository(db_session)
+    base = datetime(2024, 1, 1)
+
+    # 每 3 条共用一个 created_at
+    for i in range(25):
+        await repo.create(
+            problem_id=f"TEST_CURSOR_{i:03d}",
+            content=f"题目 {i}",
+            question_type="选择" if i % 2 == 0 else "填空",
+            created_at=base + timedelta(minutes=i // 3)
+        )
+    await db_session.commit()
+
+    seen = []
+    after = None
+    while True:
+        page = await repo.get_page_by_cursor(size=10, after=after, with_total=after is None)
+        seen.extend(p.problem_id for p in page["items"])
+        if after is None:
+            assert page["total"] == 25
+        else:
+            assert page["total"] is None
+        if not page["has_more"]:
+            assert page["last"] is None
+            break
+        after = page["last"]
+
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    # 按 (created_at, id) 倒序
+    assert seen[0] == "TEST_CURSOR_024"
+    assert seen[-1] == "TEST_CURSOR_000"
+
+    filtered = await repo.get_page_by_cursor(size=20, question_type="填空", with_total=True)
+    assert filtered["total"] == 12
+    assert len(filtered["items"]) == 12
+    assert filtered["has_more"] is False
+
+
+@pytest.mark.asyncio
+async def test_problem_counters_maintained(db_session: AsyncSession):
+    """测试题目计数随增删改同步更新、回滚一并撤销、对账修正偏差"""
+    from sqlalchemy import text
+    from app.repositories.problem_counter_repository import ProblemCounterRepository
+
+    repo = ProblemRepository(db_session)
+    counters = ProblemCounterRepository(db_session)
+
+    problems = [
+        await repo.create(problem_id=f"TEST_CNT_{i}", content=f"题目 {i}", question_type="choice", quality_score="A")
+        for i in range(3)
+    ]
+    await repo.create(problem_id="TEST_CNT_X", content="无题型")
+    await db_session.commit()
+
+    assert await repo.count() == 4
+    assert await counters.total(status="pending", question_type="choice") == 3
+
+    # 修改维度字段：旧组合 -1，新组合 +1
+    await repo.update(problems[0], status="completed", quality_score="B")
+    await repo.delete(problems[1])
+    await db_session.commit()
+
+    stats = await counters.breakdown()
+    assert stats["total"] == 3
+    assert stats["by_status"] == {"pending": 2, "completed": 1}
+    assert stats["by_question_type"] == {"choice": 2, "unknown": 1}
+    assert stats["by_quality_score"] == {"A": 1, "B": 1, "unknown": 1}
+
+    # 回滚时计数一并回滚
+    await repo.create(problem_id="TEST_CNT_R", content="回滚")
+    await db_session.rollback()
+    assert await repo.count() == 3
+
+    # 绕过 ORM 的修改由对账修正
+    await db_session.execute(text("UPDATE problems SET question_type = 'essay' WHERE question_type IS NULL"))
+    assert await counters.total(question_type="essay") == 0
+    result = await counters.reconcile()
+    assert result["fixed"] == 2
+    assert await counters.total(question_type="essay") == 1
+    assert (await counters.reconcile())["fixed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_problem_counter_reconcile_blocks_concurrent_writes(tmp_path):
+    """测试对账持有计数表写锁：对账事务提交前，其他事务的题目写入（计数增量）不能提交"""
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from app.core.database import init_db
+    from app.repositories.problem_counter_repository import ProblemCounterRepository
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'reconcile.db'}"
+    engine = create_async_engine(url, connect_args={"timeout": 0.1})
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        await init_db(engine)
+        async with factory() as reconciling, factory() as writer:
+            await ProblemCounterRepository(reconciling).reconcile()
+
+            with pytest.raises(OperationalError):
+                await ProblemRepository(writer).create(problem_id="TEST_RECON_1", content="对账中写入")
+            await writer.rollback()
+
+            await reconciling.commit()
+            await ProblemRepository(writer).create(problem_id="TEST_RECON_1", content="对账后写入")
+            await writer.commit()
+
+            assert await ProblemCounterRepository(writer).total() == 1
+            assert (await ProblemCounterRepository(writer).reconcile())["fixed"] == 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_ocr_job_claim_retry_and_lease_recovery(db_session: AsyncSession):
+    """测试任务领取、失败退避重排和过期租约回收"""
+    from datetime import datetime, timedelta
+    from app.repositories.ocr_job_repository import OCRJobRepository
+
+    repo = OCRJobRepository(db_session)
+    job = await repo.enqueue("a.png", "uploads/ocr/a.png", max_attempts=2)
+    await db_session.commit()
+
+    # 领取后其他 worker 拿不到
+    claimed = await repo.claim_next("worker-1", lease_seconds=60)
+    assert claimed.job_id == job.job_id
+    assert claimed.status == "running"
+    assert claimed.attempts == 1
+    assert await repo.claim_next("worker-2", lease_seconds=60) is None
+
+    # 非租约持有者不能回写
+    assert await repo.mark_succeeded(claimed.id, "worker-2", "P", 1) is False
+
+    # 失败后按退避时间重新排队，未到时间不可领取
+    assert await repo.mark_failed(claimed.id, "worker-1", "boom", retry_delay=3600, exhausted=False)
+    await db_session.commit()
+    assert await repo.claim_next("worker-1", lease_seconds=60) is None
+
+    # 到期后可再次领取；租约过期被回收，且达到最大次数后标记为 failed
+    await db_session.refresh(claimed)
+    claimed.run_after = datetime.utcnow() - timedelta(seconds=1)
+    await db_session.commit()
+    again = await repo.claim_next("worker-2", lease_seconds=60)
+    assert again.attempts == 2
+
+    again.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    await db_session.commit()
+    assert await repo.recover_expired_leases() == 1
+    await db_session.commit()
+    await db_session.refresh(again)
+    assert again.status == "failed"
+
+
+@pytest.mark.asyncio
+async def test_compressed_json_columns(db_session: AsyncSession, test_engine):
+    """测试大字段压缩存储、延迟加载与明文旧数据迁移"""
+    import json
+    from sqlalchemy import text
+    from app.models.problem import OCRRecord
+    from app.repositories.ocr_repository import OCRRecordRepository
+    from scripts.compress_ocr_blobs import compress_column
+
+    raw = json.dumps({"qus_result": [{"qus_type": "3", "text": "题目" * 200}]}, ensure_ascii=False)
+    record = OCRRecord(filename="a.png", recognized_text="", confidence_score=0.9, raw_json=raw)
+    db_session.add(record)
+    await db_session.commit()
+
+    stored = (await db_session.execute(
+        text("SELECT raw_json FROM ocr_records WHERE id = :id"), {"id": record.id}
+    )).scalar_one()
+    assert isinstance(stored, bytes) and len(stored) < len(raw.encode("utf-8"))
+    assert await OCRRecordRepository(db_session).get_raw_json(record.id) == raw
+
+    # 迁移前写入的带缩进明文
+    legacy = json.dumps({"qus_result": [], "log_id": 1}, indent=2)
+    await db_session.execute(
+        text("INSERT INTO ocr_records (filename, recognized_text, confidence_score, raw_json) "
+             "VALUES ('old.png', '', 0.5, :raw)"),
+        {"raw": legacy}
+    )
+    await db_session.commit()
+    legacy_id = (await db_session.execute(text("SELECT max(id) FROM ocr_records"))).scalar_one()
+    assert await OCRRecordRepository(db_session).get_raw_json(legacy_id) == legacy
+
+    stats = await compress_column(test_engine, "ocr_records", "raw_json", batch_size=1)
+    assert stats["rows"] == 1
+    assert json.loads(await OCRRecordRepository(db_session).get_raw_json(legacy_id)) == json.loads(legacy)
+    assert (await compress_column(test_engine, "ocr_records", "raw_json"))["rows"] == 0
+
+
+@pytest.mark.asyncio
+async def test_problem_full_text_search(db_session: AsyncSession, monkeypatch):
+    """测试全文检索：子串匹配、BM25 排序、筛选、随增删改同步"""
+    repo = ProblemRepository(db_session)
+
+    p1 = await repo.create(problem_id="TEST_FTS_1", content="已知二次函数 y=x^2+2x 的图像经过点A，求二次函数的解析式", question_type="essay")
+    p2 = await repo.create(problem_id="TEST_FTS_2", content="一次函数的图像与坐标轴交于两点，求这两点之间的距离", question_type="choice")
+    p3 = await repo.create(problem_id="TEST_FTS_3", content="求圆的面积", question_type="fill_blank")
+    # 不相关的题目：FTS5 bm25() 的 IDF 在命中超过半数文档时接近 0
+    for n in range(3):
+        await repo.create(problem_id=f"TEST_FTS_X{n}", content=f"解方程 x+{n}=0", question_type="essay")
+    db_session.add(ProblemKnowledgePoint(problem_id=p2.id, kp_id="KP01"))
+    await db_session.commit()
+
+    # 汉字子串（非词首）也能命中；命中次数多的排在前面
+    hits = await repo.search("函数")
+    assert [p.problem_id for p, _ in hits] == ["TEST_FTS_1", "TEST_FTS_2"]
+    assert hits[0][1] > hits[1][1]
+
+    assert [p.problem_id for p, _ in await repo.search("次函数 解析")] == ["TEST_FTS_1"]
+    assert [p.problem_id for p, _ in await repo.search("圆")] == ["TEST_FTS_3"]
+    assert await repo.search("三角形") == []
+    assert await repo.search("!!") == []
+
+    # 筛选
+    assert [p.problem_id for p, _ in await repo.search("函数", question_type="choice")] == ["TEST_FTS_2"]
+    assert [p.problem_id for p, _ in await repo.search("函数", kp_id="KP01")] == ["TEST_FTS_2"]
+
+    # 全部命中参与排序后分页：最早的题目相关度最高，仍排在第一页
+    hits, has_more = await repo.search_page("函数", limit=1)
+    assert has_more and [p.problem_id for p, _ in hits] == ["TEST_FTS_1"]
+    hits, has_more = await repo.search_page("函数", limit=1, offset=1)
+    assert not has_more and [p.problem_id for p, _ in hits] == ["TEST_FTS_2"]
+
+    # 没有全文索引的数据库：LIKE 取命中，在 Python 中按 BM25 排序
+    import app.repositories.problem_repository as problem_repository_module
+    with monkeypatch.context() as m:
+        m.setattr(problem_repository_module, "search_index_supported", lambda connection: False)
+        hits, has_more = await repo.search_page("函数", limit=1)
+        assert has_more and [p.problem_id for p, _ in hits] == ["TEST_FTS_1"]
+        assert [p.problem_id for p, _ in await repo.search("函数", kp_id="KP01")] == ["TEST_FTS_2"]
+
+    # 修改和删除后索引同步
+    await repo.update(p3, content="求三角形的面积")
+    await repo.delete(p1)
+    await db_session.commit()
+    assert await repo.search("圆") == []
+    assert [p.problem_id for p, _ in await repo.search("三角形")] == ["TEST_FTS_3"]
+    assert [p.problem_id for p, _ in await repo.search("函数")] == ["TEST_FTS_2"]
+
+
+@pytest.mark.asyncio
+async def test_group_commit_writer(db_session: AsyncSession, test_engine, monkeypatch):
+    """测试合并提交：并发写入合为一个事务，失败的操作只回滚自己的保存点"""
+    import asyncio
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.core.config import get_settings
+    from app.core.exceptions import NotFoundException
+    from app.repositories import group_commit
+    from app.repositories.group_commit import GroupCommitWriter
+    from app.schemas.problem import ProblemUpdate
+    from app.services.problem_service import ProblemService
+
+    factory = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    writer = GroupCommitWriter(max_batch=50, max_delay_ms=50, session_factory=factory)
+
+    def insert(n):
+        async def op(session):
+            problem = Problem(problem_id=f"GC_{n:03d}", content=f"合并提交 {n}", source="测试", status="pending")
+            session.add(problem)
+            return problem
+        return op
+
+    async def failing(session):
+        session.add(Problem(problem_id="GC_000", content="重复的 problem_id", source="测试", status="pending"))
+        await session.flush()
+
+    results = await asyncio.gather(
+        *[writer.submit(insert(n)) for n in range(10)], writer.submit(failing), return_exceptions=True
+    )
+    assert [p.problem_id for p in results[:10]] == [f"GC_{n:03d}" for n in range(10)]
+    assert all(p.id is not None for p in results[:10])
+    assert isinstance(results[10], Exception)
+    assert writer.stats()["batches"] == 1
+    assert writer.stats()["retried_batches"] == 0
+    await writer.stop()
+
+    assert await ProblemRepository(db_session).count() == 10
+
+    # 写入任务意外退出后重新启动：旧队列中的操作直接失败，不会一直等待
+    writer.start()
+    writer._task.cancel()
+    await asyncio.gather(writer._task, return_exceptions=True)
+    orphan = asyncio.get_running_loop().create_future()
+    writer._queue.put_nowait((insert(99), orphan))
+    assert len(await asyncio.gather(writer.submit(insert(10)))) == 1
+    assert isinstance(orphan.exception(), RuntimeError)
+    await writer.stop()
+
+    # 服务层启用合并提交后，题目更新经由写入任务提交
+    monkeypatch.setattr(get_settings(), "group_commit_enabled", True)
+    monkeypatch.setattr(group_commit, "_writer", GroupCommitWriter(max_delay_ms=1, session_factory=factory))
+    service = ProblemService(db_session)
+    updated = await service.update_problem("GC_003", ProblemUpdate(status="reviewed", difficulty=4))
+    assert (updated.status, updated.difficulty) == ("reviewed", 4)
+    with pytest.raises(NotFoundException):
+        await service.update_problem("GC_404", ProblemUpdate(status="reviewed"))
+    # 不存在的题目在请求会话中即被拒绝，不进入写入队列
+    assert group_commit.get_group_commit_writer().stats()["operations"] == 1
+    await group_commit.get_group_commit_writer().stop()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_production_profile(tmp_path):
+    """测试 production 存储配置：写连接启用 WAL 等 PRAGMA，读连接只读"""
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+    from app.core.database import apply_sqlite_profile, is_file_sqlite
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}"
+    assert is_file_sqlite(url)
+    assert not is_file_sqlite("sqlite+aiosqlite:///:memory:")
+    assert not is_file_sqlite("postgresql+asyncpg://localhost/mathtutor")
+
+    writer = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0)
+    reader = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, pool_size=2, max_overflow=0)
+    apply_sqlite_profile(writer.sync_engine)
+    apply_sqlite_profile(reader.sync_engine, read_only=True)
+    try:
+        async with writer.begin() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+            assert (await conn.execute(text("PRAGMA temp_store"))).scalar() == 2  # MEMORY
+            await conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            await conn.execute(text("INSERT INTO t (id) VALUES (1)"))
+
+        async with reader.connect() as conn:
+            assert (await conn.execute(text("SELECT COUNT(*) FROM t"))).scalar() == 1
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO t (id) VALUES (2)"))
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+def test_postgresql_ddl_and_search_query():
+    """测试 PostgreSQL 下的路径列排序规则和全文检索条件"""
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateTable
+    from app.models.knowledge import Module
+    from app.models.problem_search import problems_fts, search_match_condition
+    from app.utils.text_search import build_tsquery
+
+    dialect = postgresql.dialect()
+    assert 'path VARCHAR(255) COLLATE "C"' in str(CreateTable(Module.__table__).compile(dialect=dialect))
+
+    assert build_tsquery("二次函数 x") == "('二次' <-> '次函' <-> '函数') & 'x':*"
+    assert build_tsquery("圆") == "'圆':*"
+    assert build_tsquery("，。") is None
+
+    stmt = select(problems_fts.c.rowid).where(search_match_condition("postgresql", "函数"))
+    assert "problems_fts.tsv @@ to_tsquery('simple'::regconfig" in str(stmt.compile(dialect=dialect))
+
+
+@pytest.mark.asyncio
+async def test_read_only_session(tmp_path):
+    """测试只读会话：可查询，不开启事务，拒绝写入"""
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.core.database import Base, create_read_engine, make_read_session_maker
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'read.db'}"
+    engine = create_async_engine(url)
+    read_engine = create_read_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(Problem.__table__.insert().values(problem_id="READ_001", content="只读测试"))
+
+        async with make_read_session_maker(read_engine)() as session:
+            problem = (await session.execute(select(Problem))).scalar_one()
+            assert problem.problem_id == "READ_001"
+            # AUTOCOMMIT：驱动层不再隐式 BEGIN
+            connection = await session.connection()
+            assert connection.sync_connection.connection.dbapi_connection.isolation_level is None
+
+            session.add(Problem(problem_id="READ_002", content="不应写入"))
+            with pytest.raises(RuntimeError):
+                await session.flush()
+    finally:
+        await read_engine.dispose()
+        await engine.dispose()
@@ -100,3 +100,932 @@ async def test_problem_service_pagination(db_session: AsyncSession):
     assert result["total"] == 15
     assert len(result["items"]) == 10
     assert result["page"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ocr_service_recognize_and_save(db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch):
+    """测试 OCR 识别并保存到题库（mock 百度接口）"""
+    from app.services.ocr_service import OCRService
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+
+    result = await service.recognize_and_save("page.png", b"\x89PNG\r\n\x1a\n fake image")
+
+    assert result.success is True
+    assert result.problem_id.startswith("P_MATH_")
+    assert result.quality_assessment["grade"] == "A"
+    assert result.ocr_record_id is not None
+
+
+@pytest.mark.asyncio
+async def test_ocr_service_releases_connection_during_ocr(db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch):
+    """测试识别入库分阶段：OCR 期间不占用连接，识别失败时删除已保存的图片"""
+    import os
+    from app.core.database import ConnectionHoldStats
+    from app.services.ocr_service import OCRService
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    stats = ConnectionHoldStats().attach(db_session.bind.sync_engine)
+
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+    recognize = service._recognize_bytes
+    held_during_ocr = []
+
+    async def observed(image_bytes):
+        held_during_ocr.append(stats.checked_out)
+        return await recognize(image_bytes)
+
+    monkeypatch.setattr(service, "_recognize_bytes", observed)
+    result = await service.recognize_and_save("page.png", b"\x89PNG\r\n\x1a\n two phase")
+    assert result.success is True
+    assert held_during_ocr == [0]
+    assert stats.checked_out == 0
+
+    async def failing(image_bytes):
+        raise RuntimeError("OCR 服务异常")
+
+    monkeypatch.setattr(service, "_recognize_bytes", failing)
+    result = await service.recognize_and_save("bad.png", b"\x89PNG\r\n\x1a\n broken")
+    assert result.success is False
+    saved = [name for _, _, files in os.walk(tmp_path / "ocr") for name in files]
+    assert len(saved) == 1
+
+
+@pytest.mark.asyncio
+async def test_ocr_service_recognize_upload_after_persist(db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch):
+    """测试识别依赖保存结果时先保存再识别：识别读取的是正式目录中的图片"""
+    import asyncio
+    import io
+    from fastapi import UploadFile
+    from app.services.ocr_service import OCRService, resolve_image_path
+    from app.services.ocr_cache import OCRResultCache
+    from app.utils.upload_spool import spool_upload
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+    service.cache = OCRResultCache(enabled=False)
+
+    upload = await spool_upload(UploadFile(io.BytesIO(b"\x89PNG\r\n\x1a\n ordered"), filename="a.png"))
+    recognize_path = service._recognize_path
+    recognized = []
+
+    async def observed(image_path):
+        recognized.append(image_path)
+        return await recognize_path(image_path)
+
+    monkeypatch.setattr(service, "_recognize_path", observed)
+    result = await service.recognize_upload(upload)
+    assert result.success is True
+    assert recognized == [resolve_image_path(upload.file_path)]
+
+    # 保存过程中有 await 时识别也不会提前开始
+    events = []
+
+    async def slow_persist():
+        await asyncio.sleep(0.01)
+        events.append("persist")
+        return "uploads/ocr/slow.png"
+
+    async def recognize():
+        events.append("recognize")
+        return await recognize_path(upload.path)
+
+    result = await service._recognize_and_save("slow.png", "slow-hash", recognize, slow_persist, persist_first=True)
+    assert result.success is True
+    assert events == ["persist", "recognize"]
+
+
+@pytest.mark.asyncio
+async def test_ocr_service_cache_hit(db_session: AsyncSession, mock_ocr_client, ocr_calls, tmp_path, monkeypatch):
+    """测试重复上传同一图片命中缓存，不再调用百度 OCR"""
+    from app.services.ocr_service import OCRService
+    from app.services.ocr_cache import OCRResultCache
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+    service.cache = OCRResultCache(max_entries=10, ttl=3600, enabled=True)
+
+    image = b"\x89PNG\r\n\x1a\n same scan"
+    first = await service.recognize_and_save("a.png", image)
+    second = await service.recognize_and_save("a.png", image)
+
+    assert first.cache_hit is False
+    assert second.cache_hit is True
+    assert second.problem_id == first.problem_id
+    assert second.ocr_record_id == first.ocr_record_id
+    assert sum(1 for p in ocr_calls if p.endswith("/paper_cut_edu")) == 1
+    assert service.cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ocr_worker_processes_job(test_engine, db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch):
+    """测试异步任务：排队 -> worker 领取识别 -> 状态为 succeeded；熔断暂存时为 parked"""
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    import app.services.ocr_service as ocr_service_module
+    from app.services.ocr_service import OCRService
+    from app.services.ocr_worker import OCRJobWorker
+    from app.services.ocr_cache import OCRResultCache
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    monkeypatch.setattr(ocr_service_module, "get_async_ocr_client", lambda: mock_ocr_client)
+    monkeypatch.setattr(ocr_service_module, "get_ocr_cache", lambda: OCRResultCache(enabled=False))
+
+    job = await OCRService(db_session).enqueue_job("job.png", b"\x89PNG\r\n\x1a\n queued")
+    assert job.status == "queued"
+
+    worker = OCRJobWorker(async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False))
+    assert await worker.run_once() is True
+    assert await worker.run_once() is False
+
+    await db_session.refresh(job)
+    assert job.status == "succeeded"
+    assert job.problem_id.startswith("P_MATH_")
+
+    # OCR 熔断时题目暂存为 pending_ocr，任务记为 parked 而不是 succeeded
+    monkeypatch.setattr(get_settings(), "ocr_degraded_mode", "park")
+    mock_ocr_client.circuit_breaker._open()
+    parked = await OCRService(db_session).enqueue_job("down.png", b"\x89PNG\r\n\x1a\n while down")
+    assert await worker.run_once() is True
+
+    await db_session.refresh(parked)
+    assert parked.status == "parked"
+    assert parked.problem_id.startswith("P_MATH_")
+
+
+@pytest.mark.asyncio
+async def test_ocr_enqueue_failure_removes_image(db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch):
+    """测试入队失败时删除已移动到正式目录的图片"""
+    import io
+    import os
+    from fastapi import UploadFile
+    from app.services.ocr_service import OCRService
+    from app.repositories.ocr_job_repository import OCRJobRepository
+    from app.utils.upload_spool import spool_upload
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+
+    async def failing_enqueue(self, **kwargs):
+        raise RuntimeError("数据库不可用")
+
+    monkeypatch.setattr(OCRJobRepository, "enqueue", failing_enqueue)
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+
+    upload = await spool_upload(UploadFile(io.BytesIO(b"\x89PNG\r\n\x1a\n orphan"), filename="a.png"))
+    with pytest.raises(RuntimeError):
+        await service.enqueue_upload(upload)
+    with pytest.raises(RuntimeError):
+        await service.enqueue_job("b.png", b"\x89PNG\r\n\x1a\n orphan bytes")
+
+    assert [name for _, _, files in os.walk(tmp_path / "ocr") for name in files] == []
+
+
+@pytest.mark.asyncio
+async def test_ocr_cache_hit_allocation_does_not_exhaust_writer_pool(mock_ocr_client, tmp_path, monkeypatch):
+    """测试缓存命中补建题目时先归还会话连接再预留题目 ID：并发请求数等于写连接数时不会等到超时"""
+    import asyncio
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+    import app.services.ocr_service as ocr_service_module
+    from app.core.database import init_db
+    from app.repositories.problem_repository import ProblemRepository
+    from app.services.id_allocator import ProblemIDAllocator
+    from app.services.ocr_service import OCRService
+    from app.services.ocr_cache import OCRResultCache
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    allocator = ProblemIDAllocator(block_size=1)
+    monkeypatch.setattr(ocr_service_module, "get_problem_id_allocator", lambda: allocator)
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=1, pool_timeout=2
+    )
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    cache = OCRResultCache(max_entries=10, ttl=3600, enabled=True)
+    image = b"\x89PNG\r\n\x1a\n pooled"
+
+    async def recognize():
+        async with factory() as session:
+            service = OCRService(session)
+            service.ocr_client = mock_ocr_client
+            service.cache = cache
+            return await service.recognize_and_save("pool.png", image)
+
+    try:
+        await init_db(engine)
+        first = await recognize()
+        async with factory() as session:
+            repo = ProblemRepository(session)
+            await repo.delete(await repo.get_by_problem_id(first.problem_id))
+            await session.commit()
+
+        # 两个请求同时命中缓存、各自补建题目，写连接池只有 2 个连接
+        results = await asyncio.wait_for(asyncio.gather(recognize(), recognize()), timeout=10)
+    finally:
+        await engine.dispose()
+
+    assert all(r.success and r.cache_hit for r in results)
+    assert all(r.ocr_record_id == first.ocr_record_id for r in results)
+    assert len({r.problem_id for r in results}) == 2
+
+
+@pytest.mark.asyncio
+async def test_ocr_worker_fails_non_retryable_error(
+    test_engine, db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch
+):
+    """测试不可重试的 OCR 错误（如配额用尽）直接标记任务失败，不再排队"""
+    import httpx
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    import app.services.ocr_service as ocr_service_module
+    from app.services.ocr_service import OCRService
+    from app.services.ocr_worker import OCRJobWorker
+    from app.services.ocr_cache import OCRResultCache
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    monkeypatch.setattr(ocr_service_module, "get_async_ocr_client", lambda: mock_ocr_client)
+    monkeypatch.setattr(ocr_service_module, "get_ocr_cache", lambda: OCRResultCache(enabled=False))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "t", "expires_in": 2592000})
+        return httpx.Response(200, json={"error_code": 17, "error_msg": "Open api daily request limit reached"})
+
+    await mock_ocr_client._http.aclose()
+    mock_ocr_client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    job = await OCRService(db_session).enqueue_job("job.png", b"\x89PNG\r\n\x1a\n quota")
+    worker = OCRJobWorker(async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False))
+    assert await worker.run_once() is True
+
+    await db_session.refresh(job)
+    assert job.status == "failed"
+    assert job.attempts == 1 < job.max_attempts
+    assert "code: 17" in job.error_message
+
+
+@pytest.mark.asyncio
+async def test_ocr_worker_requeues_on_token_failure(
+    test_engine, db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch
+):
+    """测试获取 Access Token 失败（网络错误）按可重试处理：任务重新排队而不是永久失败"""
+    import httpx
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    import app.services.ocr_service as ocr_service_module
+    from app.services.ocr_service import OCRService
+    from app.services.ocr_worker import OCRJobWorker
+    from app.services.ocr_cache import OCRResultCache
+    from app.core.config import get_settings
+    from tests.conftest import make_ocr_response
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "baidu_ocr_max_retries", 1)
+    monkeypatch.setattr(ocr_service_module, "get_async_ocr_client", lambda: mock_ocr_client)
+    monkeypatch.setattr(ocr_service_module, "get_ocr_cache", lambda: OCRResultCache(enabled=False))
+
+    token_calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            token_calls.append(request.url.path)
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json=make_ocr_response())
+
+    await mock_ocr_client._http.aclose()
+    mock_ocr_client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    job = await OCRService(db_session).enqueue_job("job.png", b"\x89PNG\r\n\x1a\n token")
+    worker = OCRJobWorker(async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False))
+    assert await worker.run_once() is True
+
+    await db_session.refresh(job)
+    assert job.status == "queued"
+    assert job.attempts == 1
+    # 客户端内部先按退避重试过一次
+    assert len(token_calls) == 2
+    assert job.error_message.count("OCR 识别失败: ") == 1
+    assert "获取 Access Token 失败" in job.error_message
+
+
+@pytest.mark.asyncio
+async def test_ocr_service_parks_when_circuit_open(db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch):
+    """测试熔断时题目暂存为 pending_ocr，恢复后补识别"""
+    from app.services.ocr_service import OCRService
+    from app.services.ocr_cache import OCRResultCache
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "ocr_degraded_mode", "park")
+
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+    service.cache = OCRResultCache(enabled=False)
+
+    mock_ocr_client.circuit_breaker._open()
+    parked = await service.recognize_and_save("p.png", b"\x89PNG\r\n\x1a\n while down")
+    assert parked.success is True
+    assert parked.ocr_pending is True
+
+    problem = await ProblemService(db_session).get_problem_by_id(parked.problem_id)
+    assert problem.status == "pending_ocr"
+    assert await service.drain_pending() == 0
+
+    mock_ocr_client.circuit_breaker._close()
+    assert await service.drain_pending() == 1
+    await db_session.refresh(problem)
+    assert problem.status == "pending"
+    assert problem.quality_score == "A"
+    assert problem.content
+
+
+@pytest.mark.asyncio
+async def test_drain_pending_backoff_and_terminal_failures(
+    db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch
+):
+    """测试补识别：失败退避、图片丢失或达到次数上限后标记 ocr_failed，领取不重复"""
+    import os
+    from app.services.ocr_service import OCRService, resolve_image_path
+    from app.services.ocr_cache import OCRResultCache
+    from app.repositories.ocr_repository import OCRRecordRepository
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "ocr_degraded_mode", "park")
+    monkeypatch.setattr(get_settings(), "ocr_pending_max_attempts", 2)
+
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+    service.cache = OCRResultCache(enabled=False)
+
+    mock_ocr_client.circuit_breaker._open()
+    missing = await service.recognize_and_save("a.png", b"\x89PNG\r\n\x1a\n missing")
+    flaky = await service.recognize_and_save("b.png", b"\x89PNG\r\n\x1a\n flaky")
+    good = await service.recognize_and_save("c.png", b"\x89PNG\r\n\x1a\n good")
+    mock_ocr_client.circuit_breaker._close()
+
+    problems = ProblemService(db_session)
+    missing_record = await OCRRecordRepository(db_session).get_by_id(missing.ocr_record_id)
+    os.remove(resolve_image_path(missing_record.file_path))
+
+    recognize = service._recognize_path
+
+    flaky_record = await OCRRecordRepository(db_session).get_by_id(flaky.ocr_record_id)
+    flaky_path = resolve_image_path(flaky_record.file_path)
+
+    async def fail_flaky(path):
+        if path == flaky_path:
+            raise RuntimeError("暂时失败")
+        return await recognize(path)
+
+    monkeypatch.setattr(service, "_recognize_path", fail_flaky)
+
+    # 一次处理全部：图片丢失的直接放弃，失败的退避，正常的完成
+    assert await service.drain_pending(limit=1) == 0
+    assert (await problems.get_problem_by_id(missing.problem_id)).status == "ocr_failed"
+    assert await service.drain_pending() == 1
+    assert (await problems.get_problem_by_id(good.problem_id)).status == "pending"
+
+    await db_session.refresh(flaky_record)
+    assert flaky_record.attempts == 1
+    assert flaky_record.next_retry_at is not None
+    # 退避期内不再领取
+    assert await service.drain_pending() == 0
+    await db_session.refresh(flaky_record)
+    assert flaky_record.attempts == 1
+
+    # 退避到期后再次失败，达到上限
+    flaky_record.next_retry_at = None
+    await db_session.commit()
+    assert await service.drain_pending() == 0
+    assert (await problems.get_problem_by_id(flaky.problem_id)).status == "ocr_failed"
+    await db_session.refresh(flaky_record)
+    assert flaky_record.status == "failed"
+    assert flaky_record.attempts == 2
+
+    # 条件领取：同一记录只能被领取一次
+    repo = OCRRecordRepository(db_session)
+    mock_ocr_client.circuit_breaker._open()
+    parked = await service.recognize_and_save("d.png", b"\x89PNG\r\n\x1a\n claim")
+    assert await repo.claim_pending(parked.ocr_record_id, 300) is True
+    assert await repo.claim_pending(parked.ocr_record_id, 300) is False
+
+
+@pytest.mark.asyncio
+async def test_ocr_service_preprocess(db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch):
+    """测试启用预处理后识别前缩放图片并记录统计"""
+    import io
+    import json
+    from PIL import Image
+    from app.services.ocr_service import OCRService
+    from app.services.ocr_cache import OCRResultCache
+    from app.utils.image_preprocess import ImagePreprocessor
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (3000, 2000), (250, 250, 250)).save(buffer, format="JPEG", quality=95)
+
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+    service.cache = OCRResultCache(enabled=False)
+    service.preprocessor = ImagePreprocessor(workers=1, max_side=1200)
+    try:
+        result = await service.recognize_and_save("photo.jpg", buffer.getvalue())
+    finally:
+        service.preprocessor.shutdown()
+
+    assert result.success is True
+    record = await service.get_ocr_record(result.ocr_record_id)
+    stats = json.loads(record.preprocess_stats)
+    assert stats["output_size"] == [1200, 800]
+    assert stats["output_bytes"] < stats["original_bytes"]
+    assert "wall" in stats["timings_ms"]
+
+
+@pytest.mark.asyncio
+async def test_ocr_service_recognize_paper(db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch):
+    """测试整页识别：一次 OCR 调用生成多道题目，重复上传命中缓存"""
+    import io
+    import json
+    import httpx
+    from fastapi import UploadFile
+    from app.services.ocr_service import OCRService
+    from app.services.ocr_cache import OCRResultCache
+    from app.repositories.ocr_repository import OCRRecordRepository
+    from app.utils.upload_spool import spool_upload
+    from app.core.config import get_settings
+    from tests.conftest import make_paper_response
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    ocr_requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/oauth/2.0/token"):
+            return httpx.Response(200, json={"access_token": "test-token", "expires_in": 2592000})
+        ocr_requests.append(request.url.path)
+        return httpx.Response(200, json=make_paper_response(["1.（5分）计算 1+1", "2.（5分）计算 2+2", "3.（10分）解方程"]))
+
+    await mock_ocr_client._http.aclose()
+    mock_ocr_client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+    service.cache = OCRResultCache(max_entries=10, ttl=3600, enabled=True)
+
+    image = b"\x89PNG\r\n\x1a\n whole exam page"
+    upload = await spool_upload(UploadFile(io.BytesIO(image), filename="page.png"))
+    result = await service.recognize_paper(upload)
+
+    assert result.success is True
+    assert result.total_questions == 3
+    assert [p.question_number for p in result.problems] == ["1", "2", "3"]
+    assert len({p.problem_id for p in result.problems}) == 3
+
+    problems = await OCRRecordRepository(db_session).get_problems(result.ocr_record_id)
+    assert [p.question_index for p in problems] == [0, 1, 2]
+    assert json.loads(problems[2].qus_location)["points"][0]["y"] == 200
+
+    again = await service.recognize_paper(await spool_upload(UploadFile(io.BytesIO(image), filename="page.png")))
+    assert again.cache_hit is True
+    assert [p.problem_id for p in again.problems] == [p.problem_id for p in result.problems]
+    assert len(ocr_requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_ocr_service_re_recognize_paper(db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch):
+    """测试整页试卷记录重新识别：按题目序号逐题更新，新拆出的题目补建"""
+    import io
+    import httpx
+    from fastapi import UploadFile
+    from app.services.ocr_service import OCRService
+    from app.services.ocr_cache import OCRResultCache
+    from app.repositories.ocr_repository import OCRRecordRepository
+    from app.utils.upload_spool import spool_upload
+    from app.core.config import get_settings
+    from tests.conftest import make_paper_response
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    pages = [
+        ["1.（5分）计算 1+1", "2.（5分）计算 2+2"],
+        ["1.（5分）计算 1+1=2", "2.（5分）计算 2+2=4", "3.（10分）解方程 x+1=0"],
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/oauth/2.0/token"):
+            return httpx.Response(200, json={"access_token": "test-token", "expires_in": 2592000})
+        return httpx.Response(200, json=make_paper_response(pages.pop(0)))
+
+    await mock_ocr_client._http.aclose()
+    mock_ocr_client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+    service.cache = OCRResultCache(enabled=False)
+
+    upload = await spool_upload(UploadFile(io.BytesIO(b"\x89PNG\r\n\x1a\n exam page"), filename="page.png"))
+    result = await service.recognize_paper(upload)
+    assert result.total_questions == 2
+
+    comparison = await service.re_recognize(result.ocr_record_id)
+    assert comparison["old_content"] == "1.（5分）计算 1+1\n2.（5分）计算 2+2"
+    assert comparison["new_content"].endswith("3.（10分）解方程 x+1=0")
+    assert comparison["total_questions"] == 3
+
+    problems = await OCRRecordRepository(db_session).get_problems(result.ocr_record_id)
+    assert [p.question_index for p in problems] == [0, 1, 2]
+    # 原有题目原地更新，题目 ID 不变
+    assert [p.problem_id for p in problems[:2]] == [p.problem_id for p in result.problems]
+    assert [p.content for p in problems] == ["1.（5分）计算 1+1=2", "2.（5分）计算 2+2=4", "3.（10分）解方程 x+1=0"]
+
+
+@pytest.mark.asyncio
+async def test_problem_detail_raw_fields_on_demand(db_session: AsyncSession, mock_ocr_client, tmp_path, monkeypatch):
+    """测试题目详情默认不加载 parsed_data 和 OCR 原始 JSON"""
+    import json
+    from app.services.ocr_service import OCRService
+    from app.services.ocr_cache import OCRResultCache
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    service = OCRService(db_session)
+    service.ocr_client = mock_ocr_client
+    service.cache = OCRResultCache(enabled=False)
+    result = await service.recognize_and_save("d.png", b"\x89PNG\r\n\x1a\n detail")
+    db_session.expunge_all()
+
+    problem_service = ProblemService(db_session)
+    detail = await problem_service.get_problem_with_ocr(result.problem_id)
+    assert detail["parsed_data"] is None
+    assert detail["ocr_info"]["raw_json"] is None
+
+    db_session.expunge_all()
+    full = await problem_service.get_problem_with_ocr(result.problem_id, include_raw=True)
+    assert json.loads(full["parsed_data"])["question_number"] == "24"
+    assert "qus_result" in json.loads(full["ocr_info"]["raw_json"])
+
+
+@pytest.mark.asyncio
+async def test_problem_id_allocator(db_session: AsyncSession, test_engine):
+    """测试题目 ID 分配：从已有最大序号续号，多进程分段互不重复"""
+    import asyncio
+    from datetime import datetime
+    from app.models.problem import Problem
+    from app.services.id_allocator import ProblemIDAllocator, format_problem_id
+
+    year = datetime.now().year
+    db_session.add(Problem(problem_id=f"P_MATH_{year}_777", content="旧格式题目"))
+    await db_session.commit()
+
+    worker_a = ProblemIDAllocator(block_size=3)
+    worker_b = ProblemIDAllocator(block_size=3)
+
+    first = await worker_a.allocate(test_engine, 2)
+    assert first == [format_problem_id(year, 778), format_problem_id(year, 779)]
+
+    # 另一个进程拿到下一段
+    assert await worker_b.allocate(test_engine) == [format_problem_id(year, 781)]
+    assert await worker_a.allocate(test_engine) == [format_problem_id(year, 780)]
+
+    results = await asyncio.gather(*(worker_a.allocate(test_engine) for _ in range(10)))
+    ids = [problem_id for batch in results for problem_id in batch]
+    assert len(set(ids)) == 10
+    assert all(problem_id > format_problem_id(year, 783) for problem_id in ids)
+
+
+@pytest.mark.asyncio
+async def test_knowledge_autocomplete_index(db_session: AsyncSession, monkeypatch):
+    """测试知识点补全：前缀、子串、拼音匹配及提交后增量更新"""
+    from app.models.knowledge import Module, Topic, KnowledgePoint
+    from app.services import knowledge_index
+    from app.services.knowledge_service import KnowledgeService
+
+    monkeypatch.setattr(knowledge_index, "_index", None)
+
+    module = Module(module_id="M01", module_name="数与式的深度运算", module_tag="代数思维篇")
+    db_session.add(module)
+    await db_session.flush()
+    topic = Topic(topic_id="T01_01", topic_name="绝对值化简", alias="专题1", module_id=module.id)
+    db_session.add(topic)
+    await db_session.flush()
+    db_session.add_all([
+        KnowledgePoint(kp_id="KP01_1", kp_name="零点分段法", topic_id=topic.id),
+        KnowledgePoint(kp_id="KP01_2", kp_name="绝对值的几何意义", topic_id=topic.id),
+    ])
+    await db_session.commit()
+
+    service = KnowledgeService(db_session)
+
+    def search(q, **kwargs):
+        return [(r["code"], r["matched_by"]) for r in knowledge_index.get_knowledge_index().search(q, **kwargs)]
+
+    result = await service.search_knowledge("ldfdf")
+    assert result[0]["name"] == "零点分段法"
+    assert result[0]["matched_by"] == "pinyin_initials"
+    assert result[0]["path"] == ["数与式的深度运算", "绝对值化简"]
+
+    assert search("零点") == [("KP01_1", "name")]
+    assert search("分段") == [("KP01_1", "substring")]
+    assert search("lingdian") == [("KP01_1", "pinyin")]
+    assert search("kp01")[:2] == [("KP01_1", "code"), ("KP01_2", "code")]
+    assert search("专题") == [("T01_01", "alias")]
+    # 名称前缀优先于子串，知识点优先于专题
+    assert search("绝对值") == [("KP01_2", "name"), ("T01_01", "name")]
+    assert search("绝对值", kinds=["topic"]) == [("T01_01", "name")]
+
+    # 提交后增量更新：新增、改名、删除
+    db_session.add(KnowledgePoint(kp_id="KP01_3", kp_name="分类讨论", topic_id=topic.id))
+    kp = await service.knowledge_repo.get_kp_by_id(1)
+    kp.kp_name = "零点分区法"
+    await db_session.commit()
+    assert search("fltl") == [("KP01_3", "pinyin_initials")]
+    assert search("ldfdf") == []
+    assert search("ldfqf") == [("KP01_1", "pinyin_initials")]
+
+    await db_session.delete(kp)
+    await db_session.commit()
+    assert search("零点") == []
+
+    # 回滚的修改不进入索引
+    db_session.add(KnowledgePoint(kp_id="KP01_9", kp_name="数轴", topic_id=topic.id))
+    await db_session.flush()
+    await db_session.rollback()
+    assert search("数轴") == []
+
+
+@pytest.mark.asyncio
+async def test_knowledge_snapshot_cache(test_engine, db_session: AsyncSession, monkeypatch):
+    """测试知识体系快照：预热、与 Schema 序列化一致、提交后失效、预压缩、跨进程失效"""
+    import gzip
+    import json
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.core.config import get_settings
+    from app.models.knowledge import Curriculum, Module, Topic, KnowledgePoint
+    from app.models.knowledge_version import bump_knowledge_version, read_knowledge_version
+    from app.services import knowledge_snapshot, knowledge_version_watcher
+    from app.services.knowledge_service import KnowledgeService
+    from app.schemas.knowledge import CurriculumSchema
+
+    monkeypatch.setattr(knowledge_snapshot, "_cache", None)
+
+    curriculum = Curriculum(name="七年级上册", grade="七年级", semester="上册")
+    db_session.add(curriculum)
+    await db_session.flush()
+    module = Module(module_id="M01", module_name="数与式", curriculum_id=curriculum.id)
+    db_session.add(module)
+    await db_session.flush()
+    topic = Topic(topic_id="T01_01", topic_name="绝对值化简", module_id=module.id)
+    db_session.add(topic)
+    await db_session.flush()
+    db_session.add(KnowledgePoint(kp_id="KP01_1", kp_name="零点分段法" * 20, topic_id=topic.id))
+    await db_session.commit()
+
+    service = KnowledgeService(db_session)
+    assert await service.warm_snapshots() == 4
+    cache = knowledge_snapshot.get_knowledge_snapshot_cache()
+
+    snapshot = await service.get_curriculum_snapshot(curriculum.id)
+    assert snapshot is cache.peek(f"curriculum:{curriculum.id}")
+    expected = CurriculumSchema.model_validate(await service.get_curriculum_by_id(curriculum.id)).model_dump()
+    assert json.loads(snapshot.body) == expected
+
+    body, encoding = snapshot.encode_for("gzip, deflate")
+    assert encoding == "gzip"
+    assert gzip.decompress(body) == snapshot.body
+    assert snapshot.encode_for("gzip;q=0") == (snapshot.body, None)
+
+    # 知识体系写入并提交后失效，重新加载得到新内容
+    version = cache.version
+    topic.topic_name = "绝对值"
+    await db_session.commit()
+    assert cache.version == version + 1
+    assert cache.peek(f"topic:{topic.id}") is None
+
+    refreshed = await service.get_topic_snapshot(topic.id)
+    assert json.loads(refreshed.body)["topic_name"] == "绝对值"
+    assert refreshed.etag != snapshot.etag
+
+    # 请求不存在的 id：加载失败后不留下锁
+    with pytest.raises(NotFoundException):
+        await service.get_topic_snapshot(topic.id + 1000)
+    assert cache._locks == {}
+
+    # 其他进程绕过本进程修改（只能通过共享版本号得知）：检查间隔到期后刷新
+    monkeypatch.setattr(get_settings(), "knowledge_version_check_interval", 0)
+    monkeypatch.setattr(knowledge_version_watcher, "_watcher", None)
+    assert await read_knowledge_version(db_session) >= 1  # ORM 提交时已递增
+    await service.get_topic_snapshot(topic.id)  # 记录当前版本号
+
+    await db_session.execute(text("UPDATE topics SET topic_name = '去绝对值' WHERE id = :id"), {"id": topic.id})
+    await db_session.run_sync(lambda session: bump_knowledge_version(session.connection()))
+    await db_session.commit()
+    assert cache.peek(f"topic:{topic.id}") is not None
+
+    version = cache.version
+    async with async_sessionmaker(test_engine, class_=AsyncSession)() as session:
+        remote = await KnowledgeService(session).get_topic_snapshot(topic.id)
+    assert cache.version == version + 1
+    assert json.loads(remote.body)["topic_name"] == "去绝对值"
+
+
+@pytest.mark.asyncio
+async def test_knowledge_hierarchy_paths(db_session: AsyncSession, monkeypatch):
+    """测试知识体系物化路径：祖先/后代查询、按模块查题目及移动、改名、删除后的增量维护"""
+    from app.models.knowledge import Curriculum, Module, Topic, KnowledgePoint
+    from app.models.problem import ProblemKnowledgePoint
+    from app.services import knowledge_hierarchy
+    from app.services.knowledge_service import KnowledgeService
+
+    monkeypatch.setattr(knowledge_hierarchy, "_hierarchy", None)
+
+    curriculum = Curriculum(name="七年级上册", grade="七年级", semester="上册")
+    db_session.add(curriculum)
+    await db_session.flush()
+    c1 = f"C{curriculum.id}"
+    m1 = Module(module_id="M01", module_name="数与式", curriculum_id=curriculum.id)
+    m2 = Module(module_id="M02", module_name="方程", curriculum_id=curriculum.id)
+    db_session.add_all([m1, m2])
+    await db_session.flush()
+    t1 = Topic(topic_id="T01_01", topic_name="绝对值化简", module_id=m1.id)
+    t2 = Topic(topic_id="T02_01", topic_name="一元一次方程", module_id=m2.id)
+    db_session.add_all([t1, t2])
+    await db_session.flush()
+    kp1 = KnowledgePoint(kp_id="KP01_1", kp_name="零点分段法", topic_id=t1.id)
+    kp2 = KnowledgePoint(kp_id="KP02_1", kp_name="移项", topic_id=t2.id)
+    db_session.add_all([kp1, kp2])
+    await db_session.commit()
+
+    assert kp1.path == f"{c1}/M01/T01_01/KP01_1"
+
+    knowledge = KnowledgeService(db_session)
+    problems = ProblemService(db_session)
+    p1 = await problems.create_problem(content="化简 |x-1|+|x+2|")
+    p2 = await problems.create_problem(content="解方程 2x+3=7")
+    db_session.add_all([
+        ProblemKnowledgePoint(problem_id=p1.id, kp_id="KP01_1"),
+        ProblemKnowledgePoint(problem_id=p2.id, kp_id="KP02_1"),
+    ])
+    await db_session.commit()
+
+    node = await knowledge.get_node("KP01_1")
+    assert node["kind"] == "knowledge_point"
+    assert node["ancestors"] == [c1, "M01", "T01_01"]
+    assert (await knowledge.get_node(c1))["descendant_kps"] == ["KP01_1", "KP02_1"]
+
+    async def problems_under(code):
+        page = await problems.get_problems_by_cursor(knowledge_node=code)
+        return [p.id for p in page["items"]], page["total"]
+
+    assert await problems_under("M01") == ([p1.id], 1)
+    assert await problems_under("M02") == ([p2.id], 1)
+    assert await problems_under(c1) == ([p2.id, p1.id], 2)
+    with pytest.raises(NotFoundException):
+        await problems_under("M99")
+
+    # 页码分页使用相同的筛选条件
+    page = await problems.get_problems(page=1, size=10, knowledge_node="M01")
+    assert ([p.id for p in page["items"]], page["total"]) == ([p1.id], 1)
+    page = await problems.get_problems(page=1, size=10, knowledge_node=c1, question_type="choice")
+    assert (page["items"], page["total"]) == ([], 0)
+    with pytest.raises(NotFoundException):
+        await problems.get_problems(page=1, knowledge_node="M99")
+
+    # 移动专题：子树路径及题目关联一并更新
+    t1.module_id = m2.id
+    await db_session.commit()
+    assert kp1.path == f"{c1}/M02/T01_01/KP01_1"
+    assert await problems_under("M01") == ([], 0)
+    assert await problems_under("M02") == ([p2.id, p1.id], 2)
+    assert (await knowledge.get_node("M01"))["descendant_kps"] == []
+
+    # 改名：旧编号失效，题目关联随新编号
+    kp2.kp_id = "KP02_9"
+    await db_session.commit()
+    with pytest.raises(NotFoundException):
+        await knowledge.get_node("KP02_1")
+    assert (await knowledge.get_node("T02_01"))["descendant_kps"] == ["KP02_9"]
+    assert await problems_under("T02_01") == ([], 0)
+
+    # 删除知识点
+    await db_session.delete(kp1)
+    await db_session.commit()
+    assert (await knowledge.get_node("M02"))["descendant_kps"] == ["KP02_9"]
+    assert await problems_under("M02") == ([], 0)
+
+    # 回滚的修改不进入层级映射
+    t2.module_id = m1.id
+    await db_session.flush()
+    await db_session.rollback()
+    assert (await knowledge.get_node("T02_01"))["ancestors"] == [c1, "M02"]
+
+
+@pytest.mark.asyncio
+async def test_knowledge_importer(db_session: AsyncSession, tmp_path, monkeypatch):
+    """测试课程文件导入：新建、重复导入无变化、更新/移动/删除及缓存刷新"""
+    import copy
+    import json
+    from sqlalchemy import event, select
+    from app.models.knowledge import Curriculum, Topic, KnowledgePoint
+    from app.services import knowledge_hierarchy, knowledge_snapshot
+    from app.services.knowledge_importer import KnowledgeImporter
+    from app.services.knowledge_service import KnowledgeService
+
+    monkeypatch.setattr(knowledge_hierarchy, "_hierarchy", None)
+    monkeypatch.setattr(knowledge_snapshot, "_cache", None)
+
+    document = {
+        "curriculum": "七年级上册压轴题",
+        "modules": [
+            {"module_id": "M01", "module_name": "数与式", "topics": [
+                {"topic_id": "T01", "topic_name": "绝对值化简", "knowledge_points": [
+                    {"kp_id": "KP01_1", "kp_name": "零点分段法"},
+                    {"kp_id": "KP01_2", "kp_name": "绝对值的几何意义"},
+                ]},
+            ]},
+            {"module_id": "M02", "module_name": "数轴与动点", "topics": [
+                {"topic_id": "T02", "topic_name": "数轴动点", "knowledge_points": [
+                    {"kp_id": "KP02_1", "kp_name": "路程与坐标互化"},
+                ]},
+            ]},
+        ],
+    }
+    path = tmp_path / "grade7_sem1_test.json"
+    path.write_text(json.dumps(document, ensure_ascii=False), encoding="utf-8")
+
+    importer = KnowledgeImporter(db_session)
+    [report] = await importer.import_path(tmp_path)
+    assert report.curriculum_created
+    assert report.created["knowledge_points"] == ["KP01_1", "KP01_2", "KP02_1"]
+    curriculum = (await db_session.execute(select(Curriculum))).scalar_one()
+    assert (curriculum.grade, curriculum.semester) == ("七年级", "上册")
+    c1 = f"C{curriculum.id}"
+
+    knowledge = KnowledgeService(db_session)
+    await knowledge.build_hierarchy()
+    cache = knowledge_snapshot.get_knowledge_snapshot_cache()
+    version = cache.version
+
+    # 重复导入：无变化、不写库、缓存不失效
+    [report] = await importer.import_path(path)
+    assert not report.changed
+    assert cache.version == version
+
+    # 改名、移动专题、删除知识点和整个模块
+    changed = copy.deepcopy(document)
+    m01, m02 = changed["modules"]
+    m01["topics"][0]["knowledge_points"][0]["kp_name"] = "零点分段"
+    del m01["topics"][0]["knowledge_points"][1]
+    m01["topics"].append(dict(m02["topics"][0], topic_name="数轴上的动点"))
+    del changed["modules"][1]
+
+    # 预览：报告与实际导入一致，不执行任何写语句
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    event.listen(db_session.bind.sync_engine, "before_cursor_execute", record)
+    try:
+        preview = await importer.import_curriculum(changed, source=path.name, dry_run=True)
+        new_preview = await importer.import_curriculum(
+            dict(changed, curriculum="七年级下册压轴题"), source=path.name, dry_run=True
+        )
+    finally:
+        event.remove(db_session.bind.sync_engine, "before_cursor_execute", record)
+    assert set(statements) == {"SELECT"}
+    assert preview.dry_run and preview.deleted["modules"] == ["M02"]
+    assert new_preview.curriculum_created and new_preview.created == {}
+    assert new_preview.updated["modules"] == ["M01"]  # 模块移入新课程
+    assert (await knowledge.get_node("T02"))["ancestors"][-1] == "M02"
+
+    report = await importer.import_curriculum(changed, source=path.name)
+    assert report.updated == {"topics": ["T02"], "knowledge_points": ["KP01_1"]}
+    assert report.deleted == {"modules": ["M02"], "knowledge_points": ["KP01_2"]}
+    assert (preview.created, preview.updated, preview.deleted) == (report.created, report.updated, report.deleted)
+    assert cache.version == version + 1
+
+    kp_names = (await db_session.execute(select(KnowledgePoint.kp_id, KnowledgePoint.kp_name))).all()
+    assert sorted(kp_names) == [("KP01_1", "零点分段"), ("KP02_1", "路程与坐标互化")]
+    topic = (await db_session.execute(select(Topic.path).where(Topic.topic_id == "T02"))).scalar_one()
+    assert topic == f"{c1}/M01/T02"
+    assert (await knowledge.get_node("M01"))["descendant_kps"] == ["KP01_1", "KP02_1"]
+    with pytest.raises(NotFoundException):
+        await knowledge.get_node("M02")
+
+    assert not (await importer.import_curriculum(changed, source=path.name)).changed
@@ -0,0 +1,309 @@
+"""
+工具层单元测试
+"""
+import pytest
+
+from tests.conftest import make_ocr_response
+
+
+@pytest.mark.asyncio
+async def test_async_ocr_client_recognize(mock_ocr_client, ocr_calls):
+    """测试异步 OCR 客户端识别并复用 token"""
+    first = await mock_ocr_client.recognize_paper_cut_edu(b"\x89PNG fake")
+    second = await mock_ocr_client.recognize_paper_cut_edu(b"\x89PNG fake")
+
+    assert first["question_number"] == "24"
+    assert first["score"] == "10"
+    assert first["question_type"] == "essay"
+    assert second["confidence"] == first["confidence"]
+    # token 只请求一次
+    assert sum(1 for p in ocr_calls if p.endswith("/token")) == 1
+
+
+def test_parse_ocr_response_empty():
+    """测试解析空响应"""
+    from app.utils.baidu_ocr import BaiduOCRClient
+
+    result = BaiduOCRClient()._parse_ocr_response({})
+    assert result["text"] == ""
+    assert result["question_type"] == "unknown"
+
+    parsed = BaiduOCRClient()._parse_ocr_response(make_ocr_response(qus_type="0"))
+    assert parsed["question_type"] == "choice"
+
+
+@pytest.mark.asyncio
+async def test_token_manager_single_flight(tmp_path):
+    """测试并发刷新合并为一次请求，且 token 持久化后可复用"""
+    import asyncio
+    from app.utils.baidu_token import BaiduTokenManager
+
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"access_token": f"token-{len(calls)}", "expires_in": 2592000}
+
+    cache_path = str(tmp_path / "token.json")
+    manager = BaiduTokenManager(fetch, api_key="ak", cache_path=cache_path, refresh_margin=3600)
+
+    tokens = await asyncio.gather(*[manager.get_token() for _ in range(10)])
+    assert set(tokens) == {"token-1"}
+    assert len(calls) == 1
+
+    # 新进程 / 新 worker 直接读取持久化的 token
+    restarted = BaiduTokenManager(fetch, api_key="ak", cache_path=cache_path, refresh_margin=3600)
+    assert await restarted.get_token() == "token-1"
+    assert len(calls) == 1
+
+    # API Key 不同时不复用
+    other = BaiduTokenManager(fetch, api_key="other", cache_path=cache_path, refresh_margin=3600)
+    assert await other.get_token() == "token-2"
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_and_aimd_limiter():
+    """测试令牌桶限速与 AIMD 并发调整"""
+    import time
+    from app.utils.rate_limiter import TokenBucket, AIMDConcurrencyLimiter
+
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    # 突发 1 个，其余 2 个按 50 QPS 排队
+    assert time.monotonic() - start >= 0.035
+
+    limiter = AIMDConcurrencyLimiter(initial=8, min_limit=1, max_limit=8)
+    limiter.on_overload()
+    assert limiter.limit == 4
+    limiter.on_success()
+    assert 4 < limiter.limit < 5
+    for _ in range(10):
+        limiter.on_overload()
+    assert limiter.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_async_ocr_client_retries_quota_errors(mock_ocr_client, ocr_calls):
+    """测试 QPS 超限（error_code 18）时退避重试，不可重试的错误直接失败"""
+    import httpx
+    from app.utils.baidu_ocr import BaiduOCRError
+
+    responses = [
+        {"error_code": 18, "error_msg": "Open api qps request limit reached"},
+        make_ocr_response(),
+        {"error_code": 17, "error_msg": "Open api daily request limit reached"},
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        ocr_calls.append(request.url.path)
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "t", "expires_in": 2592000})
+        return httpx.Response(200, json=responses.pop(0))
+
+    await mock_ocr_client._http.aclose()
+    mock_ocr_client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    result = await mock_ocr_client.recognize_paper_cut_edu(b"\x89PNG fake")
+    assert result["question_number"] == "24"
+    assert mock_ocr_client.concurrency_limiter.limit < 8
+
+    with pytest.raises(BaiduOCRError) as exc_info:
+        await mock_ocr_client.recognize_paper_cut_edu(b"\x89PNG fake")
+    assert "code: 17" in str(exc_info.value)
+    assert exc_info.value.error_code == 17
+    assert exc_info.value.retryable is False
+    assert sum(1 for p in ocr_calls if p.endswith("/paper_cut_edu")) == 3
+
+
+def test_circuit_breaker_transitions(monkeypatch):
+    """测试熔断器 closed -> open -> half_open -> closed"""
+    import time
+    from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+    breaker = CircuitBreaker("test", window_size=4, min_calls=4, failure_rate_threshold=0.5,
+                             open_seconds=10, half_open_max_calls=2)
+    breaker.record_success(10)
+    breaker.record_success(10)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    # open_seconds 之后进入 half_open，只放行有限的探测请求
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request() and breaker.allow_request()
+    assert breaker.allow_request() is False
+    breaker.record_success(10)
+    breaker.record_success(10)
+    assert breaker.state == CLOSED
+
+
+def test_circuit_breaker_slow_calls():
+    """测试慢调用率过高时熔断"""
+    from app.utils.circuit_breaker import CircuitBreaker, OPEN
+
+    breaker = CircuitBreaker("test", window_size=5, min_calls=5, slow_call_ms=1000, slow_call_rate_threshold=0.8)
+    for _ in range(5):
+        breaker.record_success(5000)
+    assert breaker.state == OPEN
+
+
+@pytest.mark.asyncio
+async def test_spool_upload(tmp_path, monkeypatch):
+    """测试流式落盘：增量哈希、文件头校验与大小上限"""
+    import hashlib
+    import io
+    import os
+    from fastapi import UploadFile
+    from app.core.config import get_settings
+    from app.core.exceptions import ValidationException
+    from app.utils.upload_spool import spool_upload
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "max_file_size", 1000)
+
+    image = b"\xff\xd8\xff\xe0" + b"j" * 600
+    upload = await spool_upload(UploadFile(io.BytesIO(image), filename="a.jpg"), chunk_size=128)
+    assert upload.size == len(image)
+    assert upload.content_hash == hashlib.sha256(image).hexdigest()
+
+    file_path = upload.persist()
+    assert file_path.startswith("uploads/ocr/") and file_path.endswith(".jpg")
+    assert not os.path.exists(upload.temp_path)
+    with open(upload.path, "rb") as f:
+        assert f.read() == image
+
+    for data in (b"GIF89a" + b"g" * 100, b"\xff\xd8\xff", b"\xff\xd8\xff\xe0" + b"j" * 2000):
+        with pytest.raises(ValidationException):
+            await spool_upload(UploadFile(io.BytesIO(data), filename="bad.jpg"), chunk_size=128)
+    assert os.listdir(tmp_path / ".spool") == []
+
+
+@pytest.mark.asyncio
+async def test_recognize_file_streams_same_form_body(mock_ocr_client, tmp_path, monkeypatch):
+    """测试从文件流式编码的请求体与一次性编码的表单参数一致"""
+    import os
+    import httpx
+    from urllib.parse import parse_qs
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "upload_path", str(tmp_path / "uploads"))
+
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/oauth/2.0/token"):
+            return httpx.Response(200, json={"access_token": "test-token", "expires_in": 2592000})
+        bodies.append((request.headers.get("content-length"), request.content))
+        return httpx.Response(200, json=make_ocr_response())
+
+    await mock_ocr_client._http.aclose()
+    mock_ocr_client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    image = bytes(range(256)) * 700  # 跨越多个编码块，包含 + / = 等需要转义的字符
+    image_path = tmp_path / "page.png"
+    image_path.write_bytes(image)
+
+    await mock_ocr_client.recognize_paper_cut_edu(image)
+    await mock_ocr_client.recognize_paper_cut_edu_file(str(image_path))
+
+    (_, eager), (length, streamed) = bodies
+    assert int(length) == len(streamed)
+    assert parse_qs(streamed.decode()) == parse_qs(eager.decode())
+    # 请求体临时文件识别后删除
+    assert os.listdir(tmp_path / "uploads" / ".spool") == []
+
+
+def test_preprocess_image():
+    """测试图片预处理：EXIF 旋转、缩放、灰度与 WebP 转码"""
+    import io
+    from PIL import Image
+    from app.utils.image_preprocess import preprocess_image
+
+    # 横拍的 4000x3000 照片，EXIF 标记需要旋转 90 度
+    photo = Image.new("RGB", (4000, 3000), (200, 180, 160))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=95, exif=exif)
+
+    output, stats = preprocess_image(buffer.getvalue(), max_side=1000)
+    result = Image.open(io.BytesIO(output))
+    assert result.size == (750, 1000)
+    assert result.mode == "L"
+    assert stats["exif_orientation"] == 6
+    assert stats["saved_bytes"] > 0
+    assert set(stats["timings_ms"]) >= {"decode", "rotate", "resize", "grayscale", "encode", "total"}
+
+    webp = io.BytesIO()
+    Image.new("RGBA", (64, 64), (0, 0, 0, 0)).save(webp, format="WEBP")
+    output, stats = preprocess_image(webp.getvalue())
+    assert Image.open(io.BytesIO(output)).format == "JPEG"
+    assert stats["source_format"] == "WEBP"
+    assert stats["kept_original"] is False
+
+
+def test_validate_image_header_transcodable(monkeypatch):
+    """测试启用预处理后才接受 WebP/HEIC"""
+    from app.core.config import get_settings
+    from app.core.exceptions import ValidationException
+    from app.utils.image_validation import validate_image_header
+
+    webp = b"RIFF\x00\x00\x00\x00WEBP"
+    heic = b"\x00\x00\x00\x18ftypheic"
+    for header in (webp, heic):
+        with pytest.raises(ValidationException):
+            validate_image_header(header)
+
+    monkeypatch.setattr(get_settings(), "ocr_preprocess_enabled", True)
+    for header in (webp, heic):
+        validate_image_header(header)
+    with pytest.raises(ValidationException):
+        validate_image_header(b"GIF89a\x00\x00\x00\x00\x00\x00")
+
+
+@pytest.mark.asyncio
+async def test_mock_ocr_server_replay(tmp_path, monkeypatch):
+    """测试 mock OCR 服务：按图片回放语料，按比例返回配额错误"""
+    import json
+    import httpx
+    from app.core.config import get_settings
+    from app.utils.baidu_ocr import AsyncBaiduOCRClient
+    from scripts.mock_ocr_server import LatencyModel, MockOCRConfig, create_app
+
+    monkeypatch.setattr(get_settings(), "baidu_ocr_base_url", "http://mock-ocr")
+    monkeypatch.setattr(get_settings(), "baidu_token_cache_path", str(tmp_path / "token.json"))
+    monkeypatch.setattr(get_settings(), "baidu_ocr_qps", 0)
+    monkeypatch.setattr(get_settings(), "baidu_ocr_retry_base_delay", 0.001)
+
+    corpus_dir = tmp_path / "corpus"
+    corpus_dir.mkdir()
+    (corpus_dir / "a.json").write_text(json.dumps(make_ocr_response("1.（5分）计算 1+1")), encoding="utf-8")
+    (corpus_dir / "b.json").write_text(json.dumps(make_ocr_response("2.（5分）计算 2+2")), encoding="utf-8")
+
+    async def recognize_with(config: MockOCRConfig, image: bytes) -> dict:
+        transport = httpx.ASGITransport(app=create_app(config))
+        client = AsyncBaiduOCRClient(http_client=httpx.AsyncClient(transport=transport))
+        try:
+            return await client.recognize_paper_cut_edu(image)
+        finally:
+            await client.aclose()
+
+    config = MockOCRConfig(corpus_dir=str(corpus_dir), latency=LatencyModel.parse("uniform:0,1"), seed=1)
+    first = await recognize_with(config, b"\x89PNG page")
+    again = await recognize_with(config, b"\x89PNG page")
+    assert first["question_number"] in ("1", "2")
+    assert again["text"] == first["text"]
+
+    quota = MockOCRConfig(corpus_dir=str(corpus_dir), quota_rate=1.0)
+    with pytest.raises(Exception, match="qps"):
+        await recognize_with(quota, b"\x89PNG page")
+
+    with pytest.raises(ValueError):
+        LatencyModel.parse("lognormal:800")
@@ -1,5 +1,5 @@
 import apiClient from './client';
-import type { Curriculum, Module, Topic } from '../types/knowledge';
+import type { Curriculum, Module, Topic, KnowledgeSearchItem } from '../types/knowledge';
 
 export const knowledgeApi = {
   // Get all curriculums
@@ -22,6 +22,15 @@ export const knowledgeApi = {
     return apiClient.get(`/api/knowledge/topics/${id}`);
   },
 
+  // Autocomplete by name, pinyin, pinyin initials or code
+  search: async (
+    q: string,
+    limit: number = 10,
+    kind?: KnowledgeSearchItem['kind']
+  ): Promise<{ items: KnowledgeSearchItem[] }> => {
+    return apiClient.get('/api/v1/knowledge/search', { params: { q, limit, kind } });
+  },
+
   // Health check
   healthCheck: async () => {
     return apiClient.get('/api/knowledge/health');
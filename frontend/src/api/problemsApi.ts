@@ -17,6 +17,31 @@ export interface OCRResult {
     color: string;
   };
   ocr_record_id?: number;
+  cache_hit?: boolean;
+  ocr_pending?: boolean;
+  error?: string;
+  error_code?: string;
+}
+
+export interface PaperQuestion {
+  problem_id: string;
+  question_index: number;
+  question_number?: string;
+  question_type?: string;
+  score?: string;
+  content: string;
+  quality_grade?: string;
+  qus_location?: { points: { x: number; y: number }[] };
+}
+
+export interface PaperOCRResult {
+  success: boolean;
+  ocr_record_id?: number;
+  total_questions: number;
+  problems: PaperQuestion[];
+  confidence_score?: number;
+  processing_time_ms?: number;
+  cache_hit?: boolean;
   error?: string;
   error_code?: string;
 }
@@ -32,6 +57,7 @@ export interface Problem {
   quality_score?: string;
   tags?: string;
   ocr_record_id?: number;
+  question_index?: number;
   created_at: string;
   updated_at: string;
 }
@@ -43,6 +69,31 @@ export interface ProblemListResponse {
   items: Problem[];
 }
 
+export interface ProblemCursorPage {
+  total: number | null;
+  size: number;
+  next_cursor: string | null;
+  has_more: boolean;
+  items: Problem[];
+}
+
+export interface ProblemStats {
+  total: number;
+  by_status: Record<string, number>;
+  by_question_type: Record<string, number>;
+  by_quality_score: Record<string, number>;
+}
+
+export interface ProblemSearchHit extends Problem {
+  score: number;
+  snippet: string;  // HTML，命中词以 <mark> 包裹
+}
+
+export interface ProblemSearchResponse {
+  items: ProblemSearchHit[];
+  has_more: boolean;  // offset + limit 之后还有命中
+}
+
 export const problemsApi = {
   /**
    * OCR 识别并保存到题库
@@ -63,6 +114,25 @@ export const problemsApi = {
     }
   },
 
+  /**
+   * 整页试卷识别：每道题各生成一条题目
+   */
+  recognizePaper: async (file: File): Promise<PaperOCRResult> => {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    try {
+      return await apiClient.post('/api/v1/ocr/recognize-paper', formData, {
+        headers: {
+          'Content-Type': 'multipart/form-data',
+        },
+        timeout: 60000,
+      }) as PaperOCRResult;
+    } catch (error: any) {
+      throw new Error(error.response?.data?.detail || '整页识别失败');
+    }
+  },
+
   /**
    * 重新识别
    */
@@ -94,6 +164,49 @@ export const problemsApi = {
     }
   },
 
+  /**
+   * 全文检索题目（全部命中按相关度排序后分页）
+   */
+  search: async (
+    q: string,
+    filters: { status?: string; question_type?: string; kp_id?: string; limit?: number; offset?: number } = {}
+  ): Promise<ProblemSearchResponse> => {
+    try {
+      return await apiClient.get('/api/v1/problems/search', { params: { q, ...filters } }) as ProblemSearchResponse;
+    } catch (error: any) {
+      throw new Error(error.response?.data?.detail || '搜索题目失败');
+    }
+  },
+
+  /**
+   * 获取题目统计（按状态、题型、质量等级分布）
+   */
+  getStats: async (): Promise<ProblemStats> => {
+    try {
+      return await apiClient.get('/api/v1/problems/stats') as ProblemStats;
+    } catch (error: any) {
+      throw new Error(error.response?.data?.detail || '获取题目统计失败');
+    }
+  },
+
+  /**
+   * 游标分页获取题目列表（传入上一页的 next_cursor 获取下一页）
+   */
+  getListByCursor: async (
+    cursor?: string | null,
+    size: number = 20,
+    filters: { status?: string; question_type?: string; with_total?: boolean } = {}
+  ): Promise<ProblemCursorPage> => {
+    try {
+      const params: any = { size, ...filters };
+      if (cursor) params.cursor = cursor;
+
+      return await apiClient.get('/api/v1/problems/', { params }) as ProblemCursorPage;
+    } catch (error: any) {
+      throw new Error(error.response?.data?.detail || '获取题目列表失败');
+    }
+  },
+
   /**
    * 获取题目详情
    */
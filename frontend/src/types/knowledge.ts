@@ -64,5 +64,14 @@ export interface Curriculum {
   overall_progress?: number;
 }
 
+export interface KnowledgeSearchItem {
+  kind: 'module' | 'topic' | 'knowledge_point';
+  id: number;
+  code: string;
+  name: string;
+  path: string[];
+  matched_by: 'name' | 'code' | 'alias' | 'pinyin_initials' | 'pinyin' | 'substring';
+}
+
 export type GradeType = '七年级' | '八年级' | '九年级';
 export type SemesterType = '上册' | '下册';